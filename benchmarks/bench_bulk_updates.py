@@ -0,0 +1,51 @@
+"""Compare row-by-row status updates with the bulk ProspectionDB APIs.
+
+Usage:
+    python -m benchmarks.bench_bulk_updates --rows 10000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.db_prospection import ProspectionDB
+
+
+def create_db(db_path: str, nb_companies: int) -> ProspectionDB:
+    db = ProspectionDB(db_path)
+    db.init_db()
+    con = db.connection()
+    con.executemany('INSERT INTO company (company_name, company_link, is_added) VALUES (?, ?, 0)',
+                    ((f'Company {i}', f'linkedin.com/company/company-{i}') for i in range(nb_companies)))
+    con.commit()
+    return db
+
+
+def timed(label: str, count: int, func) -> None:
+    start = time.perf_counter()
+    changed = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:>8.3f} s {count / elapsed:>12.0f} rows/s  ({changed} changed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with create_db(str(Path(tmpdir) / 'row_by_row.db'), args.rows) as db:
+            companies = db.get_all_companies_not_added()
+            timed('row by row', args.rows, lambda: [db.updateAddedCompany(c) for c in companies] and len(companies))
+
+        with create_db(str(Path(tmpdir) / 'bulk.db'), args.rows) as db:
+            ids = [c.id for c in db.get_all_companies_not_added()]
+            timed('bulk ids', args.rows, lambda: db.mark_companies_added(ids))
+
+        with create_db(str(Path(tmpdir) / 'predicate.db'), args.rows) as db:
+            timed('bulk predicate', args.rows, lambda: db.mark_companies_added_where('is_added = 0'))
+
+
+if __name__ == '__main__':
+    main()
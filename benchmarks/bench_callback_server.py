@@ -0,0 +1,138 @@
+"""Request latency and server threads of the callback server under concurrent reports.
+
+Compares the asyncio CallbackServer with the ThreadingHTTPServer it replaced (kept
+here, reduced to /report), both fed by the same http.client clients. The old server
+answers in HTTP/1.0 and closes every connection, the clients then reconnect for
+each request; the new one keeps them alive.
+
+Usage:
+    python -m benchmarks.bench_callback_server --clients 50 --requests 200
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.callback_server import start_result_server
+from src.result_store import ResultStore
+
+
+class LegacyReportHandler(BaseHTTPRequestHandler):
+    store: ResultStore
+
+    def do_POST(self):  # noqa: N802
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))) or "{}")
+        self.store.add_result(str(payload["task_id"]), payload)
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self.end_headers()
+
+    def log_message(self, format, *args):  # noqa: A002
+        return
+
+
+class LegacyServer:
+    def __init__(self, store: ResultStore):
+        handler = type("ResultHandler", (LegacyReportHandler,), {"store": store})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@dataclass
+class LoadResult:
+    server: str
+    requests: int
+    seconds: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    # threads alive on top of the clients while the load ran
+    peak_server_threads: int
+    # connections reset or refused, the request is then sent again
+    errors: int
+
+    def __str__(self):
+        return (f"{self.server:<10} {self.requests / self.seconds:>10.0f} req/s  p50 {self.p50_ms:>7.2f} ms"
+                f"  p95 {self.p95_ms:>7.2f} ms  p99 {self.p99_ms:>7.2f} ms"
+                f"  server threads {self.peak_server_threads:>4}  errors {self.errors:>5}")
+
+
+def run_load(name: str, server, clients: int, requests: int) -> LoadResult:
+    latencies: list[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    done = threading.Event()
+    peak = [0]
+
+    def sample_threads():
+        while not done.is_set():
+            peak[0] = max(peak[0], threading.active_count())
+            time.sleep(0.001)
+
+    def client(index):
+        connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=30)
+        timings = []
+        failures = 0
+        for attempt in range(requests):
+            body = json.dumps({"task_id": f"{index}-{attempt}", "url": "https://x", "status": "follow"})
+            start = time.perf_counter()
+            while True:
+                try:
+                    connection.request("POST", "/report", body=body, headers={"Content-Type": "application/json"})
+                    connection.getresponse().read()
+                    break
+                except (ConnectionError, http.client.HTTPException):
+                    failures += 1
+                    connection.close()
+            timings.append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            latencies.extend(timings)
+            errors[0] += failures
+
+    baseline = threading.active_count()
+    sampler = threading.Thread(target=sample_threads, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+    seconds = time.perf_counter() - start
+    done.set()
+    sampler.join()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return LoadResult(name, len(latencies), seconds, statistics.median(latencies) * 1000,
+                      quantiles[94] * 1000, quantiles[98] * 1000, max(0, peak[0] - baseline - clients - 1), errors[0])
+
+
+def main(argv=None) -> list[LoadResult]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name, start_server in (("threading", LegacyServer), ("asyncio", start_result_server)):
+        server = start_server(ResultStore())
+        try:
+            result = run_load(name, server, args.clients, args.requests)
+        finally:
+            server.close()
+        print(result)
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare a full read of a wide BuiltWith export with the projected, typed read.
+
+Usage:
+    python -m benchmarks.bench_csv_projection --rows 50000 --extra-columns 300
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.generators import ExportShape, write_builtwith_csv
+from src.csv_parser import PYARROW_AVAILABLE, BuiltwithCSVParser
+
+
+def full_read(path: Path):
+    # what ProspectParser did before column projection
+    df = pd.read_csv(path, sep=',', low_memory=False, skiprows=1)
+    df.columns = map(str.lower, df.columns)
+    return df
+
+
+def projected_read(path: Path, engine: str = 'c'):
+    # the parser reads lazily, building the companies is what reads the export
+    return BuiltwithCSVParser(str(path), 'Company', 'Linkedin', '', engine=engine).get_companies()
+
+
+def measure(label: str, func, *args) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24} {elapsed:>8.2f} s {peak / 1024 / 1024:>10.1f} MiB peak")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    # the shape options of run_suite, wide by default : the technology columns are the ones projected out
+    parser.add_argument('--extra-columns', type=int, default=300)
+    parser.add_argument('--duplicate-rate', type=float, default=ExportShape.duplicate_rate)
+    parser.add_argument('--seed', type=int, default=ExportShape.seed)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'builtwith.csv'
+        write_builtwith_csv(path, ExportShape(args.rows, extra_columns=args.extra_columns,
+                                              duplicate_rate=args.duplicate_rate, seed=args.seed))
+        print(f"{args.rows} rows x {args.extra_columns + 3} columns, {path.stat().st_size / 1024 / 1024:.1f} MiB")
+
+        measure('full read', full_read, path)
+        measure('projected read (c)', projected_read, path)
+        if PYARROW_AVAILABLE:
+            measure('projected read (pyarrow)', projected_read, path, 'pyarrow')
+
+
+if __name__ == '__main__':
+    main()
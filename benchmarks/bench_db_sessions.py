@@ -0,0 +1,87 @@
+"""Compare per-call sqlite connections with the session-based ProspectionDB.
+
+Usage:
+    python -m benchmarks.bench_db_sessions --companies 100000 --updates 100000
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from src.db_prospection import CompanyDB, ProspectionDB
+
+
+def create_db(db_path: str, nb_companies: int) -> None:
+    db = ProspectionDB(db_path)
+    db.init_db()
+    con = db.connection()
+    con.executemany('INSERT INTO company (company_name, company_link, is_added) VALUES (?, ?, 0)',
+                    ((f'Company {i}', f'linkedin.com/company/company-{i}') for i in range(nb_companies)))
+    con.commit()
+    db.close()
+
+
+# what every ProspectionDB method did before sessions : connect, run one statement, close
+def per_call_update(db_path: str, company: CompanyDB) -> None:
+    con = sqlite3.connect(db_path)
+    cur = con.cursor()
+    cur.execute('UPDATE company SET is_added = 1 WHERE rowid = ?', (company.id,))
+    con.commit()
+    cur.close()
+    con.close()
+
+
+def per_call_read(db_path: str, company_id: int) -> tuple:
+    con = sqlite3.connect(db_path)
+    cur = con.cursor()
+    cur.execute('SELECT rowid, company_name, company_link FROM company WHERE rowid = ?', (company_id,))
+    row = cur.fetchone()
+    cur.close()
+    con.close()
+    return row
+
+
+def session_read(db: ProspectionDB, company_id: int) -> tuple:
+    cur = db.connection().cursor()
+    cur.execute('SELECT rowid, company_name, company_link FROM company WHERE rowid = ?', (company_id,))
+    row = cur.fetchone()
+    cur.close()
+    return row
+
+
+def timed(label: str, count: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:>8.2f} s {count / elapsed:>12.0f} ops/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=100_000)
+    parser.add_argument('--updates', type=int, default=100_000)
+    args = parser.parse_args()
+
+    companies = [CompanyDB(i, '', '') for i in range(1, args.updates + 1)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        legacy_path = str(Path(tmpdir) / 'per_call.db')
+        session_path = str(Path(tmpdir) / 'session.db')
+        create_db(legacy_path, args.companies)
+        create_db(session_path, args.companies)
+        # the legacy files must stay in rollback journal mode to reproduce the old behaviour
+        con = sqlite3.connect(legacy_path)
+        con.execute('PRAGMA journal_mode = DELETE')
+        con.close()
+
+        timed('per-call updates', args.updates, lambda: [per_call_update(legacy_path, c) for c in companies])
+        timed('per-call reads', args.updates, lambda: [per_call_read(legacy_path, c.id) for c in companies])
+
+        with ProspectionDB(session_path) as db:
+            timed('session updates', args.updates, lambda: [db.updateAddedCompany(c) for c in companies])
+            timed('session reads', args.updates, lambda: [session_read(db, c.id) for c in companies])
+
+
+if __name__ == '__main__':
+    main()
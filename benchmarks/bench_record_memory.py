@@ -0,0 +1,87 @@
+"""Memory taken by the parsed records of a large Mantiks export, per representation.
+
+Compares one plain dataclass per row with a new Company per employee (what parse() used
+to build), the slotted records sharing their interned companies, and RecordColumns.
+The export is parsed once, only building the records is measured.
+
+Usage:
+    python -m benchmarks.bench_record_memory --rows 1000000 --employees-per-company 50
+"""
+
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+from benchmarks.generators import ExportShape, write_mantiks_csv
+from src.csv_parser import MantiksCSVParser
+
+
+@dataclass
+class LegacyCompany:
+    name: str
+    link: str
+
+
+@dataclass
+class LegacyEmployee:
+    link: str
+    company: LegacyCompany
+
+
+def legacy_records(parser, df):
+    companies = [LegacyCompany(row[parser.company_name_column], row[parser.company_link_column])
+                 for row in df.drop_duplicates(subset=[parser.company_link_column]).to_dict(orient='records')]
+    employees = [LegacyEmployee(row[parser.employee_link_column],
+                                LegacyCompany(row[parser.company_name_column], row[parser.company_link_column]))
+                 for row in df.to_dict(orient='records')]
+    return companies, employees
+
+
+def interned_records(parser, df):
+    return parser.records_from_df(df, pool={})
+
+
+def record_columns(parser, df):
+    return parser.columns_from_df(df)
+
+
+def measure(label: str, func, *args) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    gc.collect()  # pandas leaves reference cycles behind, they are not part of the result
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{label:<20} {elapsed:>8.2f} s {retained / 1024 / 1024:>10.1f} MiB retained {peak / 1024 / 1024:>10.1f} MiB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--employees-per-company', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'mantiks.csv'
+        write_mantiks_csv(path, ExportShape(args.rows, extra_columns=1, duplicate_rate=0.0,
+                                            employees_per_company=args.employees_per_company))
+        print(f"{args.rows} rows, ~{args.employees_per_company} employees per company, "
+              f"{path.stat().st_size / 1024 / 1024:.1f} MiB")
+
+        csv_parser = MantiksCSVParser(str(path), 'Company name', 'Company LinkedIn', 'LinkedIn profil', chunksize=args.rows)
+        df = csv_parser.clean_df(csv_parser.open_as_df(str(path), csv_parser.parser_provider))
+
+        measure('legacy dataclasses', legacy_records, csv_parser, df)
+        measure('interned records', interned_records, csv_parser, df.copy())
+        measure('record columns', record_columns, csv_parser, df.copy())
+
+
+if __name__ == '__main__':
+    main()
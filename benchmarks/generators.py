@@ -0,0 +1,115 @@
+"""Seeded generators of realistic provider exports and prospection databases.
+
+The same arguments and seed always produce the same files, so benchmark runs on
+different commits read exactly the same data.
+"""
+
+import csv
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.db_prospection import ProspectionDB
+from src.linkedin_company_follow import linkedin_url_key
+
+MANTIKS_COLUMNS = ('Company name', 'Company LinkedIn', 'LinkedIn profil')
+BUILTWITH_COLUMNS = ('Company', 'Linkedin', '')
+
+JOB_TITLES = ('CEO', 'CTO', 'Head of Sales', 'Sales Manager', 'Developer', 'Marketing Manager', 'Product Owner')
+COUNTRIES = ('France', 'Germany', 'Spain', 'United Kingdom', 'United States')
+
+
+@dataclass(frozen=True)
+class ExportShape:
+    """What a generated export looks like."""
+
+    rows: int
+    # columns besides the mapped ones : job titles, locations, technologies...
+    extra_columns: int = 10
+    # share of the rows repeating a previous row, as when several searches overlap
+    duplicate_rate: float = 0.05
+    employees_per_company: int = 20
+    seed: int = 42
+
+
+def company_link(rng: random.Random, company_id: int) -> str:
+    """The spellings found in real exports for the same company page"""
+    slug = f'company-{company_id}'
+    return rng.choice((
+        f'https://www.linkedin.com/company/{slug}',
+        f'https://www.linkedin.com/company/{slug}/',
+        f'http://linkedin.com/company/{slug}',
+        f'linkedin.com/company/{slug}',
+    ))
+
+
+def profile_link(rng: random.Random, person_id: int) -> str:
+    return rng.choice((
+        f'https://www.linkedin.com/in/person-{person_id}',
+        f'https://www.linkedin.com/in/person-{person_id}/',
+        f'linkedin.com/in/person-{person_id}',
+    ))
+
+
+def write_mantiks_csv(path: Path, shape: ExportShape) -> None:
+    """One row per employee, the company repeated on each of them, a few rows without profile"""
+    rng = random.Random(shape.seed)
+    companies = max(1, shape.rows // shape.employees_per_company)
+    header = list(MANTIKS_COLUMNS) + ['Job title'] + [f'Field {i}' for i in range(shape.extra_columns - 1)]
+    written: list[list[str]] = []
+    with path.open('w', encoding='utf-8', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        for i in range(shape.rows):
+            if written and rng.random() < shape.duplicate_rate:
+                row = rng.choice(written)
+            else:
+                company_id = rng.randrange(companies)
+                profile = profile_link(rng, i) if rng.random() > 0.02 else ''
+                row = [f'Company {company_id}', company_link(rng, company_id), profile, rng.choice(JOB_TITLES)]
+                row += [rng.choice(COUNTRIES) for _ in range(shape.extra_columns - 1)]
+                if len(written) < 10_000:
+                    written.append(row)
+            writer.writerow(row)
+
+
+def write_builtwith_csv(path: Path, shape: ExportShape) -> None:
+    """Banner line, then one row per website, sites of the same company sharing its LinkedIn page"""
+    rng = random.Random(shape.seed)
+    companies = max(1, shape.rows // 2)
+    header = ['Domain', 'Company', 'Linkedin', 'Country'] + [f'Technology {i}' for i in range(shape.extra_columns - 1)]
+    written: list[list[str]] = []
+    with path.open('w', encoding='utf-8', newline='') as handle:
+        handle.write('BuiltWith export\n')
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        for i in range(shape.rows):
+            if written and rng.random() < shape.duplicate_rate:
+                row = rng.choice(written)
+            else:
+                company_id = rng.randrange(companies)
+                row = [f'site{i}.com', f'Company {company_id}', company_link(rng, company_id), rng.choice(COUNTRIES)]
+                row += [rng.choice(('', '2021-03-01', 'Yes')) for _ in range(shape.extra_columns - 1)]
+                if len(written) < 10_000:
+                    written.append(row)
+            writer.writerow(row)
+
+
+def create_prospection_db(db_path: str, companies: int, employees_per_company: int = 20,
+                          added_rate: float = 0.3, seed: int = 42) -> None:
+    """A migrated database as left by previous imports and follow sessions, added_rate of it already added"""
+    rng = random.Random(seed)
+    with ProspectionDB(db_path) as db:
+        db.init_db()
+        con = db.connection()
+        company_links = (f'https://www.linkedin.com/company/company-{i}' for i in range(companies))
+        con.executemany(
+            'INSERT INTO company (company_name, company_link, company_key, is_added) VALUES (?, ?, ?, ?)',
+            ((f'Company {i}', link, linkedin_url_key(link), rng.random() < added_rate)
+             for i, link in enumerate(company_links)))
+        profile_links = (f'https://www.linkedin.com/in/person-{i}' for i in range(companies * employees_per_company))
+        con.executemany(
+            'INSERT INTO employee (employee_link, employee_key, company_id, is_added) VALUES (?, ?, ?, ?)',
+            ((link, linkedin_url_key(link), i // employees_per_company + 1, rng.random() < added_rate)
+             for i, link in enumerate(profile_links)))
+        con.commit()
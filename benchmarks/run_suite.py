@@ -0,0 +1,224 @@
+"""Time the parse, ingest, stats, listing and status-update paths at several data sizes.
+
+Every case reads data made by the seeded generators, so two runs on different commits
+measure the same work. Results go to a JSON file; pass the file of a previous run to
+--compare to print how every case changed.
+
+Usage:
+    python -m benchmarks.run_suite --sizes 1000,10000,100000 --output bench-results.json
+    python -m benchmarks.run_suite --output bench-new.json --compare bench-results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from benchmarks.generators import (
+    BUILTWITH_COLUMNS,
+    MANTIKS_COLUMNS,
+    ExportShape,
+    create_prospection_db,
+    write_builtwith_csv,
+    write_mantiks_csv,
+)
+from src.csv_parser import BuiltwithCSVParser, MantiksCSVParser, ParserProviderType
+from src.db_prospection import ProspectionDB
+from src.ingestion_pipeline import IngestionSource, run_pipeline
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+# a case at least this much slower than in the compared run is reported as a regression
+REGRESSION_THRESHOLD = 1.2
+
+
+@dataclass
+class Case:
+    """One measured path. setup() runs before every repetition, untimed, and its result is given to run()."""
+
+    name: str
+    run: Callable
+    # number of rows the case goes through, to report a throughput
+    items: int
+    setup: Optional[Callable] = None
+    teardown: Optional[Callable] = None
+
+
+@dataclass
+class CaseResult:
+    case: str
+    size: int
+    items: int
+    repeat: int
+    min_seconds: float
+    median_seconds: float
+    items_per_second: float
+
+
+def time_case(case: Case, size: int, repeat: int) -> CaseResult:
+    timings = []
+    # the first run only warms the page cache and sqlite's caches up
+    for _ in range(repeat + 1):
+        state = case.setup() if case.setup else None
+        start = time.perf_counter()
+        case.run(state)
+        timings.append(time.perf_counter() - start)
+        if case.teardown:
+            case.teardown(state)
+    timings = timings[1:]
+    best = min(timings)
+    return CaseResult(case.name, size, case.items, repeat, best, statistics.median(timings),
+                      case.items / best if best else 0.0)
+
+
+def parse_cases(workdir: Path, size: int, shape_args: dict) -> list[Case]:
+    mantiks = workdir / f'mantiks-{size}.csv'
+    builtwith = workdir / f'builtwith-{size}.csv'
+    write_mantiks_csv(mantiks, ExportShape(size, **shape_args))
+    write_builtwith_csv(builtwith, ExportShape(size, **shape_args))
+
+    def mantiks_records(_):
+        parser = MantiksCSVParser(str(mantiks), *MANTIKS_COLUMNS)
+        parser.get_companies()
+        parser.get_user_profiles()
+
+    def mantiks_columns(_):
+        for _columns in MantiksCSVParser(str(mantiks), *MANTIKS_COLUMNS, chunksize=10_000).iter_columns():
+            pass
+
+    def builtwith_records(_):
+        BuiltwithCSVParser(str(builtwith), *BUILTWITH_COLUMNS).get_companies()
+
+    sources = [
+        IngestionSource(ParserProviderType.MANTIKS, str(mantiks), *MANTIKS_COLUMNS, 'mantiks'),
+        IngestionSource(ParserProviderType.BUILT_WITH, str(builtwith), *BUILTWITH_COLUMNS, 'builtwith'),
+    ]
+
+    def fresh_db():
+        db_path = workdir / f'ingest-{size}.db'
+        for suffix in ('', '-wal', '-shm'):
+            Path(f'{db_path}{suffix}').unlink(missing_ok=True)
+        with ProspectionDB(str(db_path)) as db:
+            db.init_db()
+        return str(db_path)
+
+    return [
+        Case('parse.mantiks.records', mantiks_records, size),
+        Case('parse.mantiks.columns', mantiks_columns, size),
+        Case('parse.builtwith.records', builtwith_records, size),
+        Case('ingest.in_process', lambda db_path: run_pipeline(sources, db_path, workers=0), 2 * size, fresh_db),
+        Case('ingest.workers', lambda db_path: run_pipeline(sources, db_path, workers=2), 2 * size, fresh_db),
+    ]
+
+
+def db_cases(db: ProspectionDB, size: int, employees_per_company: int) -> list[Case]:
+    companies = max(1, size // employees_per_company)
+    update_batch = max(1, companies // 10)
+
+    def stats(_):
+        db.get_companies_stats()
+        db.get_employees_stats()
+
+    def not_added_ids(_=None):
+        return [company.id for company in db.iter_companies_not_added(limit=update_batch)]
+
+    return [
+        Case('stats.aggregate', stats, companies + size),
+        Case('stats.counters', stats, companies + size,
+             setup=lambda _=None: db.enable_stats_counters(), teardown=lambda _: db.disable_stats_counters()),
+        Case('listing.employees_not_added', lambda _: sum(1 for _e in db.iter_employees_not_added()), size),
+        Case('listing.recent_companies_added',
+             lambda _: list(db.iter_companies_added(limit=100, order='desc')), 100),
+        Case('update.bulk_companies', lambda ids: db.mark_companies_added(ids), update_batch,
+             setup=not_added_ids, teardown=lambda ids: db.mark_companies_added(ids, is_added=False)),
+    ]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes: list[int], repeat: int, shape_args: dict, workdir: Path, log=print) -> list[CaseResult]:
+    results = []
+    for size in sizes:
+        cases = parse_cases(workdir, size, shape_args)
+        db_path = workdir / f'prospection-{size}.db'
+        create_prospection_db(str(db_path), max(1, size // shape_args['employees_per_company']),
+                              shape_args['employees_per_company'], seed=shape_args['seed'])
+        with ProspectionDB(str(db_path)) as db:
+            for case in cases + db_cases(db, size, shape_args['employees_per_company']):
+                result = time_case(case, size, repeat)
+                log(f"{result.case:<34} {size:>9} {result.min_seconds:>10.4f} s {result.items_per_second:>14.0f} items/s")
+                results.append(result)
+    return results
+
+
+def compare(results: list[CaseResult], previous_path: str, log=print) -> int:
+    """Print the change of every case against a previous run, returns the number of regressions"""
+    previous = json.loads(Path(previous_path).read_text(encoding='utf-8'))
+    baseline = {(r['case'], r['size']): r['min_seconds'] for r in previous['results']}
+    log(f"\nCompared with {previous['meta'].get('commit') or previous_path}:")
+    regressions = 0
+    for result in results:
+        before = baseline.get((result.case, result.size))
+        if not before:
+            continue
+        ratio = result.min_seconds / before
+        flag = 'SLOWER' if ratio >= REGRESSION_THRESHOLD else ''
+        regressions += bool(flag)
+        log(f"{result.case:<34} {result.size:>9} {ratio:>8.2f}x {flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='comma separated numbers of export rows / database employees')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--extra-columns', type=int, default=10)
+    parser.add_argument('--duplicate-rate', type=float, default=0.05)
+    parser.add_argument('--employees-per-company', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench-results.json')
+    parser.add_argument('--compare', help='JSON file of a previous run')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    shape_args = {'extra_columns': args.extra_columns, 'duplicate_rate': args.duplicate_rate,
+                  'employees_per_company': args.employees_per_company, 'seed': args.seed}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = run_suite(sizes, args.repeat, shape_args, Path(tmpdir))
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'shape': shape_args,
+        },
+        'results': [asdict(result) for result in results],
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
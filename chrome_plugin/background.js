@@ -1,24 +1,189 @@
-(async () => {
-  const reportResult = async (payload) => {
+(() => {
+  const LOG_PREFIX = '[LinkedIn Auto Follow]';
+  // reports waiting to reach the CLI, kept in chrome.storage so that they survive the service worker
+  const OUTBOX_KEY = 'reportOutbox';
+  const BATCH_SIZE = 20;
+  const BASE_RETRY_DELAY_MS = 1000;
+  const MAX_RETRY_DELAY_MS = 60 * 1000;
+  // older reports are dropped, the CLI waiting for them is long gone
+  const MAX_REPORT_AGE_MS = 60 * 60 * 1000;
+  const FLUSH_ALARM = 'flush-report-outbox';
+
+  const storageGet = (keys) =>
+    new Promise((resolve, reject) => {
+      chrome.storage.local.get(keys, (result) => {
+        if (chrome.runtime.lastError) {
+          reject(new Error(chrome.runtime.lastError.message || 'storage read failed'));
+          return;
+        }
+        resolve(result);
+      });
+    });
+
+  const storageSet = (items) =>
+    new Promise((resolve, reject) => {
+      chrome.storage.local.set(items, () => {
+        if (chrome.runtime.lastError) {
+          reject(new Error(chrome.runtime.lastError.message || 'storage write failed'));
+          return;
+        }
+        resolve();
+      });
+    });
+
+  // read-modify-write of the outbox, one at a time
+  let outboxLock = Promise.resolve();
+  const updateOutbox = (update) => {
+    const run = outboxLock.then(async () => {
+      const stored = await storageGet({ [OUTBOX_KEY]: [] });
+      const outbox = update(stored[OUTBOX_KEY] || []);
+      await storageSet({ [OUTBOX_KEY]: outbox });
+      return outbox;
+    });
+    outboxLock = run.catch(() => {});
+    return run;
+  };
+
+  const readOutbox = () => {
+    const run = outboxLock.then(() => storageGet({ [OUTBOX_KEY]: [] })).then((stored) => stored[OUTBOX_KEY] || []);
+    outboxLock = run.catch(() => {});
+    return run;
+  };
+
+  const entryKey = (entry) => `${entry.port}:${entry.report.task_id}`;
+  // tells apart two reports of the same task, when a newer one is queued while the older is sent
+  let entrySequence = 0;
+  const entryId = (entry) => `${entryKey(entry)}:${entry.id}`;
+
+  const enqueueReport = async (payload) => {
     const { port, taskId, url, status, reason = '' } = payload;
     if (!port || !taskId || !url || !status) {
       throw new Error('Missing reporting fields.');
     }
 
-    const endpoint = `http://127.0.0.1:${port}/report`;
-    await fetch(endpoint, {
+    const entry = {
+      port,
+      report: { task_id: taskId, url, status, reason },
+      queuedAt: Date.now(),
+      id: `${Date.now().toString(36)}-${(entrySequence += 1)}`,
+    };
+    // a task is reported once, the latest report wins
+    return updateOutbox((outbox) => [...outbox.filter((queued) => entryKey(queued) !== entryKey(entry)), entry]);
+  };
+
+  const retryDelay = (failures) =>
+    failures <= 0 ? 0 : Math.min(MAX_RETRY_DELAY_MS, BASE_RETRY_DELAY_MS * 2 ** (failures - 1));
+
+  let failures = 0;
+  let retryTimer = null;
+
+  const cancelRetry = () => {
+    if (retryTimer !== null) {
+      clearTimeout(retryTimer);
+      retryTimer = null;
+    }
+  };
+
+  const scheduleRetry = () => {
+    cancelRetry();
+    failures += 1;
+    retryTimer = setTimeout(() => {
+      retryTimer = null;
+      flushOutbox();
+    }, retryDelay(failures));
+    // the timer is lost when the service worker stops, the alarm isn't
+    chrome.alarms?.create(FLUSH_ALARM, { periodInMinutes: 1 });
+  };
+
+  const sendBatch = async (port, entries) => {
+    const response = await fetch(`http://127.0.0.1:${port}/report/batch`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({
-        task_id: taskId,
-        url,
-        status,
-        reason,
-      }),
+      body: JSON.stringify({ reports: entries.map((entry) => entry.report) }),
       keepalive: true,
     });
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+    const { rejected = [] } = await response.json();
+    rejected.forEach(({ task_id: taskId, error }) =>
+      console.warn(`${LOG_PREFIX} Report of ${taskId} rejected by the CLI: ${error}`),
+    );
   };
 
+  // send everything queued, port by port in batches of BATCH_SIZE; resolves to the reports left
+  let flushing = null;
+  let flushAgain = false;
+  const flushOutbox = () => {
+    if (flushing) {
+      // reports queued meanwhile may have been read too late
+      flushAgain = true;
+      return flushing;
+    }
+    flushing = (async () => {
+      const oldest = Date.now() - MAX_REPORT_AGE_MS;
+      const outbox = await updateOutbox((entries) => entries.filter((entry) => entry.queuedAt >= oldest));
+
+      const byPort = new Map();
+      outbox.forEach((entry) => byPort.set(entry.port, [...(byPort.get(entry.port) || []), entry]));
+
+      let failed = false;
+      for (const [port, entries] of byPort) {
+        for (let start = 0; start < entries.length; start += BATCH_SIZE) {
+          const batch = entries.slice(start, start + BATCH_SIZE);
+          try {
+            await sendBatch(port, batch);
+          } catch (error) {
+            // the CLI of this port is down or gone, the others may still listen
+            console.warn(`${LOG_PREFIX} Unable to send results to the CLI on port ${port}.`, error);
+            failed = true;
+            break;
+          }
+          // rejected reports are dropped as well, sending them again won't help. Only the reports
+          // sent are removed, a newer report of the same task queued meanwhile is still to send
+          const sent = new Set(batch.map(entryId));
+          await updateOutbox((current) => current.filter((entry) => !sent.has(entryId(entry))));
+        }
+      }
+
+      const left = await readOutbox();
+      if (failed) {
+        scheduleRetry();
+      } else {
+        failures = 0;
+        cancelRetry();
+        if (left.length === 0) {
+          chrome.alarms?.clear(FLUSH_ALARM);
+        }
+      }
+      return left;
+    })().finally(() => {
+      flushing = null;
+      if (flushAgain) {
+        flushAgain = false;
+        flushOutbox();
+      }
+    });
+    return flushing;
+  };
+
+  const backgroundApi = {
+    OUTBOX_KEY,
+    BATCH_SIZE,
+    MAX_REPORT_AGE_MS,
+    enqueueReport,
+    flushOutbox,
+    readOutbox,
+    retryDelay,
+    cancelRetry,
+    retryState: () => ({ failures, scheduled: retryTimer !== null }),
+  };
+
+  if (typeof module !== 'undefined' && module.exports) {
+    module.exports = backgroundApi;
+    return;
+  }
+
   chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
     if (message.action === 'close_tab' && sender.tab?.id) {
       chrome.tabs.remove(sender.tab.id);
@@ -26,13 +191,27 @@
     }
 
     if (message.action === 'report_result') {
-      reportResult(message)
-        .then(() => sendResponse({ ok: true }))
+      // acknowledged once persisted, the outbox delivers it even if the CLI isn't reachable yet
+      enqueueReport(message)
+        .then(() => {
+          sendResponse({ ok: true, queued: true });
+          cancelRetry();
+          flushOutbox();
+        })
         .catch((error) => {
-          console.warn('[LinkedIn Auto Follow] Failed to report result.', error);
+          console.warn(`${LOG_PREFIX} Failed to queue result.`, error);
           sendResponse({ ok: false, error: error?.message || 'unknown error' });
         });
       return true; // keep the message channel open for async response
     }
   });
+
+  chrome.alarms?.onAlarm.addListener((alarm) => {
+    if (alarm.name === FLUSH_ALARM) {
+      flushOutbox();
+    }
+  });
+
+  chrome.runtime.onStartup.addListener(() => flushOutbox());
+  flushOutbox();
 })();
@@ -0,0 +1,168 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const storage = {};
+
+global.chrome = {
+  runtime: {
+    lastError: null,
+  },
+  storage: {
+    local: {
+      get: (defaults, callback) => {
+        const result = {};
+        Object.keys(defaults).forEach((key) => {
+          result[key] = key in storage ? structuredClone(storage[key]) : defaults[key];
+        });
+        callback(result);
+      },
+      set: (items, callback) => {
+        Object.assign(storage, structuredClone(items));
+        callback();
+      },
+    },
+  },
+  alarms: {
+    created: [],
+    create: (name) => global.chrome.alarms.created.push(name),
+    clear: () => {},
+  },
+};
+
+let batches = [];
+let serverUp = true;
+global.fetch = async (url, options) => {
+  if (!serverUp) {
+    throw new TypeError('Failed to fetch');
+  }
+  const { reports } = JSON.parse(options.body);
+  batches.push({ url, reports });
+  const accepted = reports.filter((report) => report.status).map((report) => report.task_id);
+  const rejected = reports
+    .filter((report) => !report.status)
+    .map((report) => ({ task_id: report.task_id, error: 'Missing fields: status' }));
+  return { ok: true, status: 200, json: async () => ({ accepted, rejected }) };
+};
+
+const {
+  OUTBOX_KEY,
+  BATCH_SIZE,
+  MAX_REPORT_AGE_MS,
+  enqueueReport,
+  flushOutbox,
+  readOutbox,
+  retryDelay,
+  cancelRetry,
+  retryState,
+} = require('./background.js');
+
+const report = (taskId, port = 4000) => ({
+  port,
+  taskId,
+  url: `https://www.linkedin.com/company/${taskId}/`,
+  status: 'follow',
+});
+
+test.beforeEach(async () => {
+  batches = [];
+  serverUp = true;
+  storage[OUTBOX_KEY] = [];
+  await flushOutbox();
+});
+
+test('reports are persisted before being sent', async () => {
+  await enqueueReport(report('a'));
+
+  assert.deepEqual(storage[OUTBOX_KEY].map((entry) => entry.report.task_id), ['a']);
+  assert.deepEqual(storage[OUTBOX_KEY][0].report, {
+    task_id: 'a',
+    url: 'https://www.linkedin.com/company/a/',
+    status: 'follow',
+    reason: '',
+  });
+});
+
+test('incomplete reports are refused', async () => {
+  await assert.rejects(enqueueReport({ port: 4000, taskId: 'a' }), /Missing reporting fields/);
+  assert.deepEqual(await readOutbox(), []);
+});
+
+test('a task is queued once, with its latest report', async () => {
+  await enqueueReport(report('a'));
+  await enqueueReport({ ...report('a'), status: 'error', reason: 'timeout' });
+
+  const outbox = await readOutbox();
+  assert.equal(outbox.length, 1);
+  assert.equal(outbox[0].report.status, 'error');
+});
+
+test('the outbox is flushed in batches, port by port', async () => {
+  for (let index = 0; index < BATCH_SIZE + 5; index += 1) {
+    await enqueueReport(report(`a${index}`));
+  }
+  await enqueueReport(report('b', 5000));
+
+  assert.deepEqual(await flushOutbox(), []);
+  assert.deepEqual(
+    batches.map(({ url, reports }) => [url, reports.length]),
+    [
+      ['http://127.0.0.1:4000/report/batch', BATCH_SIZE],
+      ['http://127.0.0.1:4000/report/batch', 5],
+      ['http://127.0.0.1:5000/report/batch', 1],
+    ],
+  );
+});
+
+test('rejected reports are dropped', async () => {
+  await enqueueReport(report('a'));
+  storage[OUTBOX_KEY][0].report.status = '';
+
+  assert.deepEqual(await flushOutbox(), []);
+});
+
+test('a report queued while its task is being sent is kept', async () => {
+  await enqueueReport(report('a'));
+  const send = global.fetch;
+  global.fetch = async (url, options) => {
+    global.fetch = send;
+    await enqueueReport({ ...report('a'), status: 'error', reason: 'timeout' });
+    return send(url, options);
+  };
+
+  const left = await flushOutbox();
+
+  assert.deepEqual(batches.map(({ reports }) => reports.map((sent) => sent.status)), [['follow']]);
+  assert.deepEqual(left.map((entry) => entry.report.status), ['error']);
+  assert.deepEqual(await flushOutbox(), []);
+  assert.deepEqual(batches.map(({ reports }) => reports.map((sent) => sent.status)), [['follow'], ['error']]);
+});
+
+test('failed flushes keep the reports and back off', async () => {
+  serverUp = false;
+  await enqueueReport(report('a'));
+
+  assert.equal((await flushOutbox()).length, 1);
+  assert.deepEqual(retryState(), { failures: 1, scheduled: true });
+  assert.equal((await flushOutbox()).length, 1);
+  assert.deepEqual(retryState(), { failures: 2, scheduled: true });
+  assert.ok(chrome.alarms.created.includes('flush-report-outbox'));
+
+  serverUp = true;
+  assert.deepEqual(await flushOutbox(), []);
+  assert.deepEqual(retryState(), { failures: 0, scheduled: false });
+  cancelRetry();
+});
+
+test('the retry delay doubles up to a minute', () => {
+  assert.deepEqual([1, 2, 3, 4].map(retryDelay), [1000, 2000, 4000, 8000]);
+  assert.equal(retryDelay(20), 60000);
+});
+
+test('expired reports are dropped without being sent', async () => {
+  await enqueueReport(report('old'));
+  storage[OUTBOX_KEY][0].queuedAt = Date.now() - MAX_REPORT_AGE_MS - 1;
+  await enqueueReport(report('new'));
+
+  assert.deepEqual(await flushOutbox(), []);
+  assert.deepEqual(batches[0].reports.map((sent) => sent.task_id), ['new']);
+});
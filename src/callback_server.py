@@ -0,0 +1,294 @@
+"""Local HTTP server the Chrome extension talks to, on 127.0.0.1.
+
+``GET /launch?task_id=..&url=..`` serves a page handing the task to the extension
+before redirecting to the company page, ``POST /report`` delivers the result of a
+task to the ResultStore, and ``POST /report/batch`` several of them at once, as
+flushed by the outbox of the extension.  ``GET /metrics`` exposes the metrics of
+the server, its store and whatever the CLI registers, in the Prometheus text
+format.  Everything runs on one asyncio event loop, in a
+background thread when started by start_result_server: connections are kept
+alive between requests and no thread is spawned per request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Awaitable, Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from src.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from src.result_store import ResultStore
+
+HOST = "127.0.0.1"
+# idle keep-alive connections are closed after this many seconds
+KEEP_ALIVE_TIMEOUT = 15.0
+MAX_BODY_SIZE = 1024 * 1024
+REQUEST_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# outcomes of the reports counted by the ResultStore, timeouts have a metric of their own
+REPORT_OUTCOMES = ("reported", "delivered", "duplicate", "late", "unknown", "evicted")
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: str
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Response:
+    status: HTTPStatus
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+
+    @classmethod
+    def error(cls, status: HTTPStatus, message: str) -> "Response":
+        return cls(status, f"{status.value} {status.phrase}: {message}\n".encode("utf-8"))
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class CallbackServer:
+    def __init__(self, store: ResultStore, host: str = HOST, port: int = 0, page_duration: float = 60.0,
+                 metrics: Optional[MetricsRegistry] = None) -> None:
+        self.store = store
+        self.host = host
+        self.port = port
+        self.page_duration = page_duration
+        self.routes: dict[tuple[str, str], Handler] = {
+            ("GET", "/launch"): self._handle_launch,
+            ("POST", "/report"): self._handle_report,
+            ("POST", "/report/batch"): self._handle_report_batch,
+            ("GET", "/metrics"): self._handle_metrics,
+        }
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self._register_metrics()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _register_metrics(self) -> None:
+        self._request_latency = self.metrics.histogram(
+            "prospection_http_request_duration_seconds", "Time spent handling the requests of the callback server",
+            REQUEST_LATENCY_BUCKETS, ("method", "path", "status"))
+        reports = self.metrics.counter("prospection_reports_total", "Reports received from the extension, by outcome",
+                                       ("outcome",))
+        reports.set_function(lambda: {(outcome,): count for outcome, count in self.store.counters_snapshot().items()
+                                      if outcome in REPORT_OUTCOMES})
+        self.metrics.counter("prospection_callback_timeouts_total",
+                             "Tasks the extension did not report within the callback timeout").set_function(
+            lambda: self.store.counters_snapshot().get("timeouts", 0))
+        self.metrics.gauge("prospection_tasks_waiting", "Launched tasks waiting for their report").set_function(
+            lambda: self.store.waiting)
+        self.metrics.gauge("prospection_reports_unclaimed", "Reports kept for reconciliation").set_function(
+            lambda: self.store.unclaimed)
+
+    @property
+    def server_address(self) -> tuple[str, int]:
+        return self.host, self.port
+
+    async def start_serving(self) -> None:
+        """Listen on the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop_serving(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start(self) -> "CallbackServer":
+        """Serve from an event loop of its own, in a daemon thread"""
+        started = threading.Event()
+        errors: list[BaseException] = []
+
+        async def serve() -> None:
+            try:
+                await self.start_serving()
+            except OSError as exc:  # raised by start() instead
+                errors.append(exc)
+                return
+            finally:
+                started.set()
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:  # close() was called
+                pass
+
+        self._thread = threading.Thread(target=asyncio.run, args=(serve(),), name="callback-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def close(self) -> None:
+        """Stop the server started by start(), and wait for its thread"""
+        if self._thread is None:
+            return
+        if self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        self._thread.join()
+        self._thread = None
+        self._server = None
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request, keep_alive = await self._read_request(reader)
+                if request is None:
+                    break
+                if isinstance(request, Response):
+                    response = request
+                    keep_alive = False
+                else:
+                    response = await self.dispatch(request)
+                writer.write(self._serialize(response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """(Request, keep alive), (error Response, False) for a malformed one, or (None, False) once closed"""
+        request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+        if not request_line.strip():
+            return None, False
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            return Response.error(HTTPStatus.BAD_REQUEST, "Malformed request line"), False
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            return Response.error(HTTPStatus.BAD_REQUEST, "Invalid Content-Length"), False
+        if length > MAX_BODY_SIZE:
+            return Response.error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large"), False
+        body = await reader.readexactly(length) if length > 0 else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        parsed = urlparse(target)
+        return Request(method.upper(), parsed.path, parsed.query, body, headers), keep_alive
+
+    async def dispatch(self, request: Request) -> Response:
+        start = time.perf_counter()
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            response = Response.error(HTTPStatus.NOT_FOUND, "Unexpected endpoint")
+        else:
+            response = await handler(request)
+        # unknown routes share one label, they would make a series each
+        method, path = (request.method, request.path) if handler else ("other", "other")
+        self._request_latency.observe(time.perf_counter() - start, method=method, path=path,
+                                      status=str(response.status.value))
+        return response
+
+    @staticmethod
+    def _serialize(response: Response, keep_alive: bool) -> bytes:
+        head = [f"HTTP/1.1 {response.status.value} {response.status.phrase}"]
+        if response.status != HTTPStatus.NO_CONTENT:
+            head.append(f"Content-Type: {response.content_type}")
+            head.append(f"Content-Length: {len(response.body)}")
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body
+
+    @staticmethod
+    def _report_error(report) -> Optional[str]:
+        if not isinstance(report, dict):
+            return "Expected a JSON object"
+        missing = [name for name in ("task_id", "url", "status") if name not in report]
+        return f"Missing fields: {', '.join(missing)}" if missing else None
+
+    async def _handle_report(self, request: Request) -> Response:
+        try:
+            payload = json.loads(request.body or b"{}")
+        except json.JSONDecodeError:
+            return Response.error(HTTPStatus.BAD_REQUEST, "Invalid JSON payload")
+
+        error = self._report_error(payload)
+        if error:
+            return Response.error(HTTPStatus.BAD_REQUEST, error)
+
+        self.store.add_result(str(payload["task_id"]), payload)
+        return Response(HTTPStatus.NO_CONTENT)
+
+    async def _handle_report_batch(self, request: Request) -> Response:
+        """{"reports": [...]} -> {"accepted": [task_id...], "rejected": [{"task_id", "error"}...]}
+
+        Invalid reports are rejected one by one, so that the extension drops them from its
+        outbox instead of sending them again with the valid ones.
+        """
+        try:
+            payload = json.loads(request.body or b"{}")
+        except json.JSONDecodeError:
+            return Response.error(HTTPStatus.BAD_REQUEST, "Invalid JSON payload")
+        reports = payload.get("reports") if isinstance(payload, dict) else None
+        if not isinstance(reports, list):
+            return Response.error(HTTPStatus.BAD_REQUEST, "Expected a reports list")
+
+        accepted, rejected = [], []
+        for report in reports:
+            error = self._report_error(report)
+            if error:
+                rejected.append({"task_id": report.get("task_id") if isinstance(report, dict) else None,
+                                 "error": error})
+                continue
+            task_id = str(report["task_id"])
+            self.store.add_result(task_id, report)
+            accepted.append(task_id)
+        body = json.dumps({"accepted": accepted, "rejected": rejected}).encode("utf-8")
+        return Response(HTTPStatus.OK, body, "application/json")
+
+    async def _handle_metrics(self, request: Request) -> Response:
+        return Response(HTTPStatus.OK, self.metrics.render().encode("utf-8"), METRICS_CONTENT_TYPE)
+
+    async def _handle_launch(self, request: Request) -> Response:
+        params = parse_qs(request.query)
+        task_id = params.get("task_id", [""])[0]
+        target_url = params.get("url", [""])[0]
+
+        if not task_id or not target_url:
+            return Response.error(HTTPStatus.BAD_REQUEST, "task_id and url are required")
+
+        if urlparse(target_url).scheme not in {"http", "https"}:
+            return Response.error(HTTPStatus.BAD_REQUEST, "Only http/https targets are supported.")
+
+        payload = json.dumps({"task_id": task_id, "port": self.port, "page_duration": self.page_duration})
+        escaped_payload = payload.replace("</", "<\\/")
+        body = f"""<!DOCTYPE html>
+<meta charset="utf-8">
+<title>LinkedIn Prospection Launcher</title>
+<script>
+  window.name = 'prospection::{escaped_payload}';
+  window.location.replace({json.dumps(target_url)});
+</script>
+"""
+        return Response(HTTPStatus.OK, body.encode("utf-8"), "text/html; charset=utf-8")
+
+
+def start_result_server(store: ResultStore, page_duration: float = 60.0, port: int = 0,
+                        metrics: Optional[MetricsRegistry] = None) -> CallbackServer:
+    return CallbackServer(store, port=port, page_duration=page_duration, metrics=metrics).start()
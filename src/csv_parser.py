@@ -1,17 +1,34 @@
+import io
+import re
 from abc import ABC, abstractmethod
+from typing import Iterator, Optional
 
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass
+from urllib.parse import unquote
 
-@dataclass
+from src.linkedin_company_follow import LINKEDIN_URL_PATTERN, linkedin_url_key
+
+try:  # pragma: no cover - pyarrow is an optional, faster csv engine
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ModuleNotFoundError:  # pragma: no cover
+    PYARROW_AVAILABLE = False
+
+# records are frozen so that a company can be shared by all of its employees, and slotted to stay small
+@dataclass(frozen=True, slots=True)
 class Company:
     name: str
     link: str
+    # canonical LinkedIn key of link, see linkedin_url_key
+    key: Optional[str] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Employee:
     link: str
     company: Company
+    key: Optional[str] = None
 
 unknown_company = Company(name='unknown', link='')
 
@@ -20,26 +37,230 @@ class ParserProviderType(Enum):
     MANTIKS = 'mantiks'
     BUILT_WITH = 'builtwith'
 
+def linkedin_url_keys(urls: pd.Series) -> pd.Series:
+    """Vectorized linkedin_url_key : canonical keys of a whole column of urls, None where there is no key"""
+    parts = urls.astype('string').str.strip().str.lower().str.extract(LINKEDIN_URL_PATTERN)
+    slugs = parts[1]
+    # percent-decoding can't be vectorized, only the few slugs that need it go through python
+    encoded = slugs.str.contains('%', regex=False, na=False)
+    if encoded.any():
+        slugs = slugs.where(~encoded, slugs[encoded].map(lambda slug: unquote(slug).lower()))
+    keys = (parts[0] + '/' + slugs).astype(object)
+    return keys.where(keys.notna(), None)
+
+def company_identity(name, link, key) -> str:
+    """What makes two parsed companies the same one : their canonical key, else their link, else their name"""
+    if key is not None:
+        return key
+    if link is not None:
+        return f'link:{link}'
+    return f'name:{name}' if name is not None else ''
+
+
+@dataclass(frozen=True, eq=False)
+class RecordColumns:
+    """Parsed records of a batch stored column by column, to hand them to visitors in bulk.
+
+    The company columns hold every distinct company of the batch once : the first
+    ``listed_companies`` are the companies of the batch, the others are only referenced
+    by employees. ``employee_companies`` is the index of the company of each employee,
+    -1 standing for unknown_company.
+    """
+
+    company_names: list
+    company_links: list
+    company_keys: list
+    listed_companies: int
+    employee_links: list
+    employee_keys: list
+    employee_companies: np.ndarray
+
+    @classmethod
+    def from_records(cls, companies: list[Company], employees: list[Employee]) -> 'RecordColumns':
+        index: dict[Company, int] = {}
+        for company in companies:
+            if company is not None:
+                index.setdefault(company, len(index))
+        listed = len(index)
+        employee_companies = np.fromiter((index.setdefault(employee.company, len(index)) for employee in employees),
+                                         dtype=np.int64, count=len(employees))
+        return cls(
+            [company.name for company in index],
+            [company.link for company in index],
+            [company.key if company.key is not None else linkedin_url_key(company.link) for company in index],
+            listed,
+            [employee.link for employee in employees],
+            [employee.key if employee.key is not None else linkedin_url_key(employee.link) for employee in employees],
+            employee_companies,
+        )
+
+    def company_rows(self) -> Iterator[tuple]:
+        """(name, link, key) of the listed companies"""
+        return zip(self.company_names[:self.listed_companies], self.company_links[:self.listed_companies],
+                   self.company_keys[:self.listed_companies])
+
+    def employee_rows(self) -> Iterator[tuple]:
+        """(link, key, company name, company link, company key) of every employee"""
+        names = self.company_names + [unknown_company.name]
+        links = self.company_links + [unknown_company.link]
+        keys = self.company_keys + [unknown_company.key]
+        # -1 picks the unknown_company values appended last
+        return ((link, key, names[company], links[company], keys[company])
+                for link, key, company in zip(self.employee_links, self.employee_keys, self.employee_companies.tolist()))
+
+    def to_records(self, pool: Optional[dict[str, Company]] = None) -> tuple[list[Company], list[Employee]]:
+        """Build the records, one Company object per company shared by its employees.
+
+        Companies are interned in ``pool`` by company_identity, pass the same dict for every
+        batch of a file so that a company met again in a later batch is not built twice.
+        """
+        pool = {} if pool is None else pool
+        interned = []
+        for name, link, key in zip(self.company_names, self.company_links, self.company_keys):
+            identity = company_identity(name, link, key)
+            company = pool.get(identity)
+            if company is None:
+                company = pool[identity] = Company(name, link, key)
+            interned.append(company)
+        interned.append(unknown_company)
+        employees = [Employee(link, interned[company], key)
+                     for link, key, company in zip(self.employee_links, self.employee_keys,
+                                                   self.employee_companies.tolist())]
+        return interned[:self.listed_companies], employees
+
+
+# kinds of linkedin_url_key accepted in the company and employee link columns
+COMPANY_URL_KINDS = ('company', 'school', 'showcase')
+PROFILE_URL_KINDS = ('in',)
+
+# reason column of the rejects file
+REJECT_INVALID_COMPANY_LINK = 'invalid_company_link'
+REJECT_INVALID_EMPLOYEE_LINK = 'invalid_employee_link'
+REJECT_NO_LINK = 'no_link'
+REJECT_DUPLICATE = 'duplicate'
+
+# scheme and host of an url (group 1), then the rest of it (group 2)
+_URL_HOST_PATTERN = r'^((?:[a-z][a-z0-9+.-]*://)?[^/?#]*)(.*)$'
+
+
+def normalize_links(links: pd.Series) -> pd.Series:
+    """Lower-case the scheme and host of a column of stripped urls, leaving the path as it is"""
+    parts = links.str.extract(_URL_HOST_PATTERN, flags=re.IGNORECASE)
+    return parts[0].str.lower() + parts[1]
+
+
+# number of csv rows read at once when streaming an export
+DEFAULT_CHUNK_SIZE = 10_000
+
+CSV_ENGINES = ('c', 'pyarrow')
+
+# lines before the first data row of each export : the header, plus a banner line for BuiltWith
+HEADER_LINES = {ParserProviderType.MANTIKS: 1, ParserProviderType.BUILT_WITH: 2}
+
+
+def header_length(path, parser_provider: ParserProviderType) -> int:
+    """Number of bytes taken by the header lines of an export"""
+    with open(path, 'rb') as handle:
+        for _ in range(HEADER_LINES[parser_provider]):
+            handle.readline()
+        return handle.tell()
+
+
+class FileRangeReader(io.RawIOBase):
+    """Binary stream over the first header_size bytes of a file followed by its byte range [start, end).
+
+    Lets pandas parse only the rows appended to an export since a previous import, with the
+    header still in front of them. end=None reads up to the end of the file.
+    """
+
+    def __init__(self, path, header_size: int, start: int, end: Optional[int] = None):
+        super().__init__()
+        self._file = open(path, 'rb')
+        self._segments = [(start, end)]
+        if header_size and start > 0:
+            self._segments.insert(0, (0, min(header_size, start)))
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._segments:
+            position, end = self._segments[0]
+            size = len(buffer) if end is None else min(len(buffer), end - position)
+            data = self._file.read(size) if size > 0 and self._file.seek(position) == position else b''
+            if not data:
+                self._segments.pop(0)
+                continue
+            buffer[:len(data)] = data
+            self._segments[0] = (position + len(data), end)
+            return len(data)
+        return 0
+
+    def close(self):
+        self._file.close()
+        super().close()
+
 class ProspectParser(ABC):
+    """Reads the companies and employees of a provider export.
+
+    Nothing is read when the parser is created : the first call to get_companies() or
+    get_user_profiles() reads and cleans the export, then builds the records of that entity
+    (get_user_profiles() builds the companies too) and drops the DataFrame. Asking for the
+    employees after the companies reads the export again. The iter_* generators stream the
+    export instead and never hold all of it.
+    """
 
-    companies: list[Company] = []
-    employees: list[Employee] = []
+    parser_provider: ParserProviderType
+    chunksize: Optional[int] = None
+    # part of the file to read, see FileRangeReader
+    start_offset: int = 0
+    end_offset: Optional[int] = None
+    # data rows read by the last read of the export, and how many of them normalize_df rejected,
+    # the rows that only lost their employee link are in the rejects file but not counted
+    rows_read: int = 0
+    rows_rejected: int = 0
+    # csv file receiving the rejected rows with their reason, none are kept when None
+    rejects_path: Optional[str] = None
+    _rejects_started: bool = False
 
     def get_companies(self) -> list[Company]:
-        return self.companies
+        if self._companies is None:
+            self._companies, _ = self.read_columns(employees=False).to_records(self._pool)
+        return self._companies
 
     def get_user_profiles(self) ->list[Employee]:
-        return self.employees
+        if self._employees is None:
+            companies, self._employees = self.read_columns().to_records(self._pool)
+            if self._companies is None:
+                self._companies = companies
+        return self._employees
 
     def __init__(self,
                  path,
                  company_name_column: str,
                  company_link_column: str,
-                 employee_link_column: str):
+                 employee_link_column: str,
+                 engine: str = 'c',
+                 start_offset: int = 0,
+                 end_offset: Optional[int] = None,
+                 rejects_path: Optional[str] = None):
+        if engine not in CSV_ENGINES:
+            raise ValueError(f"Unknown csv engine '{engine}', expected one of {', '.join(CSV_ENGINES)}.")
+        if engine == 'pyarrow' and not PYARROW_AVAILABLE:
+            raise ValueError("The pyarrow csv engine requires the optional 'pyarrow' package.")
         self.path = path
         self.company_name_column = company_name_column.lower()
         self.company_link_column = company_link_column.lower()
         self.employee_link_column = employee_link_column.lower()
+        self.engine = engine
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.rejects_path = rejects_path
+        # built on first access, see get_companies / get_user_profiles
+        self._companies: Optional[list[Company]] = None
+        self._employees: Optional[list[Employee]] = None
+        # companies interned by company_identity, shared by both lists
+        self._pool: dict[str, Company] = {}
 
     def filter_df(self, df, column_name):
         if column_name not in df.columns:
@@ -47,39 +268,266 @@ class ProspectParser(ABC):
         df_copy = df[df[column_name].notnull()]
         return df_copy.drop_duplicates(subset=[column_name])
 
-    def open_as_df(self, file_path, parser_provider: ParserProviderType):
+    def read_csv_kwargs(self, parser_provider: ParserProviderType, engine: str = 'c') -> dict:
         if parser_provider == ParserProviderType.MANTIKS:
-                return pd.read_csv(file_path, sep=',')
+                kwargs = {'sep': ','}
         elif parser_provider == ParserProviderType.BUILT_WITH:
-                return pd.read_csv(file_path, sep=',', low_memory=False, skiprows=1)
+                # the first line of a BuiltWith export is a banner, the header is on the second one
+                if engine == 'pyarrow':
+                    # pandas maps skiprows to rows *after* the header for pyarrow, header=1 skips the banner instead
+                    kwargs = {'sep': ',', 'header': 1}
+                else:
+                    kwargs = {'sep': ',', 'low_memory': False, 'skiprows': 1}
+        kwargs['engine'] = engine
+        return kwargs
+
+    def resolve_columns(self, file_path, parser_provider: ParserProviderType) -> list[str]:
+        """Read the header only and return the real names of the configured columns.
+
+        Matching is case-insensitive, the first column wins when several only differ by case.
+        """
+        header = pd.read_csv(file_path, nrows=0, **self.read_csv_kwargs(parser_provider))
+        wanted = {self.company_name_column, self.company_link_column, self.employee_link_column}
+        resolved = {}
+        for column in header.columns:
+            lowered = column.lower()
+            if lowered in wanted and lowered not in resolved:
+                resolved[lowered] = column
+        return list(resolved.values())
+
+    def projected_csv_kwargs(self, file_path, parser_provider: ParserProviderType, engine: str) -> dict:
+        # only the needed columns are read, as plain strings : no type inference over hundreds of columns
+        usecols = self.resolve_columns(file_path, parser_provider)
+        kwargs = self.read_csv_kwargs(parser_provider, engine)
+        kwargs['usecols'] = usecols
+        kwargs['dtype'] = {column: str for column in usecols}
+        return kwargs
+
+    def open_data(self, file_path, parser_provider: ParserProviderType):
+        """The path itself, or a stream over the header and [start_offset, end_offset) when only part of the file is read"""
+        if self.start_offset == 0 and self.end_offset is None:
+            return file_path
+        header_size = header_length(file_path, parser_provider) if self.start_offset else 0
+        return io.BufferedReader(FileRangeReader(file_path, header_size, self.start_offset, self.end_offset))
+
+    def open_as_df(self, file_path, parser_provider: ParserProviderType):
+        data = self.open_data(file_path, parser_provider)
+        try:
+            return pd.read_csv(data, **self.projected_csv_kwargs(file_path, parser_provider, self.engine))
+        finally:
+            if data is not file_path:
+                data.close()
+
+    def open_as_chunks(self, file_path, parser_provider: ParserProviderType, chunksize: int):
+        data = self.open_data(file_path, parser_provider)
+        try:
+            # the pyarrow engine can't read by chunks, streaming always goes through the c engine
+            yield from pd.read_csv(data, chunksize=chunksize, **self.projected_csv_kwargs(file_path, parser_provider, 'c'))
+        finally:
+            if data is not file_path:
+                data.close()
+
+    def normalize_df(self, df) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Clean a parsed chunk with column operations only, returns (kept rows, rejected rows).
+
+        Cells are stripped and empty ones become missing, url hosts are lower-cased. A row is
+        rejected when its company link is not a LinkedIn company url, when it has no link at all,
+        or when it repeats the link of a previous row of the chunk : its employee link, or its
+        company link when it has no employee. An employee link that is not a profile url is
+        blanked, the company of the row is kept. Rejected rows, and the rows whose employee link
+        was blanked, keep their original values and get a ``reason`` column.
+        """
+        header = list(df.columns)
+        df.columns = map(str.lower, df.columns)
+        clean = df.apply(lambda column: column.astype('string').str.strip())
+        clean = clean.mask(clean == '')
+
+        reason = pd.Series(pd.NA, index=df.index, dtype='string')
+        blanked = pd.Series(False, index=df.index)
+        link_columns = []
+        for column, kinds in ((self.company_link_column, COMPANY_URL_KINDS),
+                              (self.employee_link_column, PROFILE_URL_KINDS)):
+            if column not in clean.columns:
+                continue
+            clean[column] = normalize_links(clean[column])
+            kind = clean[column].str.lower().str.extract(LINKEDIN_URL_PATTERN)[0]
+            invalid = clean[column].notna() & ~kind.isin(kinds)
+            if column == self.company_link_column:
+                reason = reason.mask(invalid, REJECT_INVALID_COMPANY_LINK)
+            else:
+                # only the employee is lost, e.g. a people-search url of the company in the profile column
+                blanked = invalid
+                clean[column] = clean[column].mask(invalid)
+            link_columns.append(column)
+
+        # employee link first : a company shows up on many rows of a Mantiks export, once per employee
+        dedup_key = pd.Series(pd.NA, index=df.index, dtype='string')
+        for column in reversed(link_columns):
+            dedup_key = dedup_key.fillna(clean[column])
+        reason = reason.mask(reason.isna() & dedup_key.isna(), REJECT_NO_LINK)
+        valid = reason.isna()
+        reason = reason.mask(valid & dedup_key.where(valid).duplicated(), REJECT_DUPLICATE)
+
+        rejected = reason.notna()
+        reported = rejected | blanked
+        reason = reason.mask(~rejected & blanked, REJECT_INVALID_EMPLOYEE_LINK)
+        rejects = df[reported].set_axis(header, axis=1).assign(reason=reason[reported])
+        # back to plain python values, missing cells are stored as NULL
+        kept = clean[~rejected].astype(object)
+        return kept.where(kept.notna(), None), rejects
+
+    def write_rejects(self, rejects: pd.DataFrame) -> None:
+        """Append rejected rows to rejects_path, the file is truncated by the first call of a parse"""
+        if self.rejects_path is None:
+            return
+        rejects.to_csv(self.rejects_path, mode='a' if self._rejects_started else 'w',
+                       header=not self._rejects_started, index=False)
+        self._rejects_started = True
+
+    def clean_df(self, df) -> pd.DataFrame:
+        kept, rejects = self.normalize_df(df)
+        self.rows_rejected += len(df) - len(kept)
+        self.write_rejects(rejects)
+        return kept
 
+    def _company_pairs(self, df) -> pd.DataFrame:
+        """(name, link) of the company of every row of df"""
+        def column(name):
+            return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+        return pd.DataFrame({'name': column(self.company_name_column), 'link': column(self.company_link_column)})
 
-    def parse(self, parser_provider: ParserProviderType):
-        df = self.open_as_df(self.path, parser_provider)
+    def columns_from_df(self, df, employees: bool = True) -> RecordColumns:
+        """Records of a chunk as RecordColumns, built with column operations only.
+
+        Companies are deduplicated by link like before, then merged by company_identity with the
+        companies of the employee rows, so each company is stored once whatever the number of employees.
+        Keys and identities are only computed once per distinct (name, link) pair.
+        With ``employees`` False the employee columns are left empty.
+        """
         df.columns = map(str.lower, df.columns)
+        has_company_name = self.company_name_column in df.columns
+
+        df_employees = self.filter_df(df if employees else df.iloc[:0], self.employee_link_column)
+        employee_links = df_employees[self.employee_link_column]
+        listed = self._company_pairs(self.filter_df(df, self.company_link_column)) if has_company_name else None
+        if has_company_name:
+            rows = pd.concat([listed, self._company_pairs(df_employees)], ignore_index=True)
+        else:
+            rows = self._company_pairs(df.iloc[:0])
+
+        # thousands of employee rows share a few distinct companies
+        row_pairs = rows.groupby(['name', 'link'], dropna=False, sort=False).ngroup().to_numpy()
+        pairs = rows[~rows.duplicated(['name', 'link'])].reset_index(drop=True)
+        pairs['key'] = linkedin_url_keys(pairs['link'])
+        # company_identity, on columns
+        identity = pairs['key'].astype('string')
+        identity = identity.fillna('link:' + pairs['link'].astype('string'))
+        identity = identity.fillna('name:' + pairs['name'].astype('string')).fillna('')
+        pair_companies, _ = pd.factorize(identity)
+        row_companies = pair_companies[row_pairs] if len(rows) else np.empty(0, dtype=np.int64)
+
+        unique = pairs[~identity.duplicated()].astype(object)
+        unique = unique.where(unique.notna(), None)
+        listed_count = len(listed) if has_company_name else 0
+        listed_companies = int(row_companies[:listed_count].max()) + 1 if listed_count else 0
+        if has_company_name:
+            employee_companies = row_companies[listed_count:].astype(np.int64)
+        else:
+            employee_companies = np.full(len(df_employees), -1, dtype=np.int64)
+
+        return RecordColumns(
+            unique['name'].tolist(),
+            unique['link'].tolist(),
+            unique['key'].tolist(),
+            listed_companies,
+            employee_links.astype(object).tolist(),
+            linkedin_url_keys(employee_links).tolist(),
+            employee_companies,
+        )
+
+    def records_from_df(self, df, pool: Optional[dict[str, Company]] = None) -> tuple[list[Company], list[Employee]]:
+        return self.columns_from_df(df).to_records(pool)
+
+    @property
+    def records_built(self) -> bool:
+        """Both entities are built already"""
+        return self._companies is not None and self._employees is not None
+
+    def read_columns(self, employees: bool = True) -> RecordColumns:
+        """The whole export as one RecordColumns, read and cleaned on every call, no DataFrame is kept"""
+        df = self.open_as_df(self.path, self.parser_provider)
+        self.rows_read, self.rows_rejected, self._rejects_started = len(df), 0, False
+        return self.columns_from_df(self.clean_df(df), employees)
 
-        df_companies = self.filter_df(df, self.company_link_column)
-        df_employees = self.filter_df(df, self.employee_link_column)
-
-        self.companies = [
-            Company(row[self.company_name_column],
-                    row[self.company_link_column]) if self.company_name_column in df.columns else None ## if no company name, set to None
-            for row in df_companies.to_dict(orient='records')
-        ]
-        self.employees = [
-            Employee(row[self.employee_link_column],
-                     Company(row[self.company_name_column],
-                            row[self.company_link_column]) if self.company_name_column in df.columns else unknown_company) ## if no company name, set to None
-            for row in df_employees.to_dict(orient='records')
-        ]
+    def parse(self):
+        """Read the export again and build both entities now, in one read"""
+        self._companies, self._employees, self._pool = None, None, {}
+        self.get_user_profiles()
+
+    def iter_columns(self, chunksize: Optional[int] = None, employees: bool = True) -> Iterator[RecordColumns]:
+        """Stream the export chunk by chunk as RecordColumns, without building a record per row.
+
+        Only one chunk is held in memory at a time. Unlike iter_batches, links repeated in
+        different chunks are not skipped : the unique indexes of the database drop them.
+        """
+        chunksize = chunksize or self.chunksize or DEFAULT_CHUNK_SIZE
+        self.rows_read, self.rows_rejected, self._rejects_started = 0, 0, False
+        for df in self.open_as_chunks(self.path, self.parser_provider, chunksize):
+            self.rows_read += len(df)
+            yield self.columns_from_df(self.clean_df(df), employees)
+
+    def iter_batches(self, chunksize: Optional[int] = None) -> Iterator[tuple[list[Company], list[Employee]]]:
+        """Stream the export chunk by chunk, yielding (companies, employees) for each chunk.
+
+        Only one chunk is held in memory at a time. Links already yielded by a previous
+        chunk are skipped so the output matches get_companies() and get_user_profiles(),
+        and a company met in several chunks is the same object in all of them.
+        """
+        pool: dict[str, Company] = {}
+        seen_company_links = set()
+        seen_employee_links = set()
+        for columns in self.iter_columns(chunksize):
+            companies, employees = columns.to_records(pool)
+            companies = [c for c in companies if c.link not in seen_company_links]
+            employees = [e for e in employees if e.link not in seen_employee_links]
+            seen_company_links.update(c.link for c in companies)
+            seen_employee_links.update(e.link for e in employees)
+            yield companies, employees
+
+    def iter_companies(self, chunksize: Optional[int] = None) -> Iterator[Company]:
+        """Companies of the export one by one, no employee record is built"""
+        pool: dict[str, Company] = {}
+        seen_links = set()
+        for columns in self.iter_columns(chunksize, employees=False):
+            companies, _ = columns.to_records(pool)
+            for company in companies:
+                if company.link not in seen_links:
+                    seen_links.add(company.link)
+                    yield company
+
+    def iter_employees(self, chunksize: Optional[int] = None) -> Iterator[Employee]:
+        for _, employees in self.iter_batches(chunksize):
+            yield from employees
 
 class MantiksCSVParser(ProspectParser):
-    def __init__(self, path, company_name_column: str, company_link_column: str, employee_link_column: str):
-        super().__init__(path, company_name_column, company_link_column, employee_link_column)
-        self.parse(ParserProviderType.MANTIKS)
+    parser_provider = ParserProviderType.MANTIKS
+
+    def __init__(self, path, company_name_column: str, company_link_column: str, employee_link_column: str,
+                 chunksize: Optional[int] = None, engine: str = 'c',
+                 start_offset: int = 0, end_offset: Optional[int] = None, rejects_path: Optional[str] = None):
+        super().__init__(path, company_name_column, company_link_column, employee_link_column, engine,
+                         start_offset, end_offset, rejects_path)
+        # with a chunksize, the visitors stream the file (see iter_batches) instead of reading it at once
+        self.chunksize = chunksize
 
 
 class BuiltwithCSVParser(ProspectParser):
-    def __init__(self, path, company_name_column: str, company_link_column: str, employee_link_column: str):
-        super().__init__(path, company_name_column, company_link_column, employee_link_column)
-        self.parse(ParserProviderType.BUILT_WITH)
+    parser_provider = ParserProviderType.BUILT_WITH
+
+    def __init__(self, path, company_name_column: str, company_link_column: str, employee_link_column: str,
+                 chunksize: Optional[int] = None, engine: str = 'c',
+                 start_offset: int = 0, end_offset: Optional[int] = None, rejects_path: Optional[str] = None):
+        super().__init__(path, company_name_column, company_link_column, employee_link_column, engine,
+                         start_offset, end_offset, rejects_path)
+        # with a chunksize, the visitors stream the file (see iter_batches) instead of reading it at once
+        self.chunksize = chunksize
@@ -12,28 +12,277 @@ class EmployeeDB:
     link: str
     company: CompanyDB
 
+@dataclass
+class IngestedFileDB:
+    path: str
+    size: int
+    mtime: float
+    content_hash: str
+    companies: int = 0
+    employees: int = 0
+    ingested_at: str = ''
+    # data rows consumed so far and hash of the header lines, used to import only appended rows
+    rows: int = 0
+    header_hash: str = ''
+
 import sqlite3
+import threading
+from typing import Iterable, Iterator, Optional, Sequence
+
+from src.linkedin_company_follow import linkedin_url_key
+
+@dataclass
+class FollowResultDB:
+    task_id: str
+    company_id: Optional[int]
+    url: str
+    status: str
+    reason: Optional[str] = None
+    reported_at: str = ''
+
+# applied to every connection when it is opened
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -65536',  # negative value is in KiB : 64 MiB
+    'PRAGMA temp_store = MEMORY',
+)
+
+# Schema migrations, applied in order by ProspectionDB.migrate().
+# The schema version stored in PRAGMA user_version is the number of migrations already applied,
+# so a migration must never be edited or removed once released : append a new one instead.
+MIGRATIONS: tuple[tuple[str, ...], ...] = (
+    # 1 : listing of what is left to add (is_added = 0) without scanning the whole tables
+    (
+        '''CREATE INDEX IF NOT EXISTS idx_company_not_added ON company (is_added) WHERE is_added = 0''',
+        '''CREATE INDEX IF NOT EXISTS idx_employee_not_added ON employee (is_added) WHERE is_added = 0''',
+    ),
+    # 2 : employees of a company
+    (
+        '''CREATE INDEX IF NOT EXISTS idx_employee_company_id ON employee (company_id)''',
+    ),
+    # 3 : case-insensitive company name lookups done when linking employees to their company
+    (
+        '''CREATE INDEX IF NOT EXISTS idx_company_lower_name ON company (lower(company_name))''',
+    ),
+    # 4 : one row per employee profile so that ON CONFLICT DO NOTHING actually deduplicates.
+    # Existing duplicates are merged first, keeping the oldest row and whether any copy was added.
+    (
+        '''UPDATE employee SET is_added = 1
+           WHERE is_added = 0 AND employee_link IN
+               (SELECT employee_link FROM employee GROUP BY employee_link HAVING count(*) > 1 AND max(is_added) = 1)''',
+        '''DELETE FROM employee
+           WHERE employee_link IS NOT NULL AND rowid NOT IN
+               (SELECT min(rowid) FROM employee WHERE employee_link IS NOT NULL GROUP BY employee_link)''',
+        '''CREATE UNIQUE INDEX IF NOT EXISTS idx_employee_link ON employee (employee_link)''',
+    ),
+    # 5 : "last N added" listings walk these backwards from the highest rowid
+    (
+        '''CREATE INDEX IF NOT EXISTS idx_company_added ON company (is_added) WHERE is_added = 1''',
+        '''CREATE INDEX IF NOT EXISTS idx_employee_added ON employee (is_added) WHERE is_added = 1''',
+    ),
+    # 6 : ledger of the imported export files, unchanged files are skipped on the next import
+    (
+        '''CREATE TABLE IF NOT EXISTS ingested_file
+           (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, content_hash TEXT NOT NULL,
+           companies INTEGER NOT NULL DEFAULT 0, employees INTEGER NOT NULL DEFAULT 0, ingested_at TEXT NOT NULL)''',
+        '''CREATE INDEX IF NOT EXISTS idx_ingested_file_hash ON ingested_file (content_hash)''',
+    ),
+    # 7 : incremental re-import of growing exports, size and content_hash then describe the consumed prefix
+    (
+        '''ALTER TABLE ingested_file ADD COLUMN rows INTEGER NOT NULL DEFAULT 0''',
+        "ALTER TABLE ingested_file ADD COLUMN header_hash TEXT NOT NULL DEFAULT ''",
+    ),
+    # 8 : canonical LinkedIn key (see linkedin_url_key) so that the same company or profile spelled
+    # differently by two providers is stored once. Existing rows are backfilled and merged on their key,
+    # keeping the oldest row, whether any copy was added, and moving the employees to the kept company.
+    (
+        '''ALTER TABLE company ADD COLUMN company_key TEXT''',
+        '''ALTER TABLE employee ADD COLUMN employee_key TEXT''',
+        '''UPDATE company SET company_key = linkedin_key(company_link)''',
+        '''UPDATE employee SET employee_key = linkedin_key(employee_link)''',
+        '''CREATE TEMP TABLE company_key_merge (duplicate_id INTEGER PRIMARY KEY, kept_id INTEGER NOT NULL)''',
+        '''INSERT INTO company_key_merge (duplicate_id, kept_id)
+           SELECT company.rowid, kept.kept_id FROM company
+           JOIN (SELECT company_key, min(rowid) AS kept_id FROM company
+                 WHERE company_key IS NOT NULL GROUP BY company_key HAVING count(*) > 1) AS kept
+             ON kept.company_key = company.company_key
+           WHERE company.rowid <> kept.kept_id''',
+        '''UPDATE company SET is_added = 1
+           WHERE is_added IS NOT 1 AND rowid IN
+               (SELECT kept_id FROM company_key_merge JOIN company AS duplicate ON duplicate.rowid = duplicate_id
+                WHERE duplicate.is_added = 1)''',
+        '''UPDATE employee SET company_id = (SELECT kept_id FROM company_key_merge WHERE duplicate_id = employee.company_id)
+           WHERE company_id IN (SELECT duplicate_id FROM company_key_merge)''',
+        '''DELETE FROM company WHERE rowid IN (SELECT duplicate_id FROM company_key_merge)''',
+        '''DROP TABLE company_key_merge''',
+        '''UPDATE employee SET is_added = 1
+           WHERE is_added = 0 AND employee_key IN
+               (SELECT employee_key FROM employee GROUP BY employee_key HAVING count(*) > 1 AND max(is_added) = 1)''',
+        '''DELETE FROM employee
+           WHERE employee_key IS NOT NULL AND rowid NOT IN
+               (SELECT min(rowid) FROM employee WHERE employee_key IS NOT NULL GROUP BY employee_key)''',
+        '''CREATE UNIQUE INDEX IF NOT EXISTS idx_company_key ON company (company_key)''',
+        '''CREATE UNIQUE INDEX IF NOT EXISTS idx_employee_key ON employee (employee_key)''',
+    ),
+    # 9 : outcome of every follow attempt made by the follow CLI in --queue-db mode,
+    # failed attempts of a company are counted to stop retrying the ones that keep failing
+    (
+        '''CREATE TABLE IF NOT EXISTS follow_result
+           (task_id TEXT PRIMARY KEY, company_id INTEGER, url TEXT NOT NULL, status TEXT NOT NULL,
+           reason TEXT, reported_at TEXT NOT NULL, FOREIGN KEY (company_id) REFERENCES company (rowid))''',
+        '''CREATE INDEX IF NOT EXISTS idx_follow_result_company ON follow_result (company_id, status)''',
+        '''CREATE INDEX IF NOT EXISTS idx_follow_result_status ON follow_result (status, reported_at)''',
+        '''CREATE INDEX IF NOT EXISTS idx_follow_result_reported_at ON follow_result (reported_at)''',
+    ),
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# rows fetched per query by the iter_* listings
+DEFAULT_PAGE_SIZE = 1000
+SQLITE_MAX_ROWID = 2 ** 63 - 1
+
+# tables whose progress is reported by get_companies_stats / get_employees_stats
+STATS_ENTITIES = ('company', 'employee')
+
+# statuses reported by the Chrome extension meaning that the company page is followed
+FOLLOWED_STATUSES = ('follow', 'already followed')
+
+
+def _stats_counter_triggers(entity: str) -> tuple[str, ...]:
+    """Triggers keeping the stats_counter row of an entity in sync with its table.
+
+    ``IS`` is used instead of ``=`` so that a NULL is_added counts as neither added nor remaining.
+    """
+    return (
+        f'''CREATE TRIGGER IF NOT EXISTS {entity}_stats_insert AFTER INSERT ON {entity} BEGIN
+               UPDATE stats_counter SET total = total + 1,
+                   added = added + (NEW.is_added IS 1), remaining = remaining + (NEW.is_added IS 0)
+               WHERE entity = '{entity}';
+           END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {entity}_stats_delete AFTER DELETE ON {entity} BEGIN
+               UPDATE stats_counter SET total = total - 1,
+                   added = added - (OLD.is_added IS 1), remaining = remaining - (OLD.is_added IS 0)
+               WHERE entity = '{entity}';
+           END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {entity}_stats_update AFTER UPDATE OF is_added ON {entity} BEGIN
+               UPDATE stats_counter SET
+                   added = added - (OLD.is_added IS 1) + (NEW.is_added IS 1),
+                   remaining = remaining - (OLD.is_added IS 0) + (NEW.is_added IS 0)
+               WHERE entity = '{entity}';
+           END''',
+    )
+
 class ProspectionDB:
+    """Access to the prospection database.
 
-    def __init__(self, db_path: str):
+    Each thread gets its own long-lived connection, opened on first use and kept until close().
+    The object can be used as a context manager to close all of them on exit.
+    """
+
+    def __init__(self, db_path: str, timeout: float = 5.0):
         self.db_path = db_path
+        self.timeout = timeout
+        self._connections: dict[int, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new connection configured with CONNECTION_PRAGMAS."""
+        # check_same_thread is off so close() can be called from any thread,
+        # each connection is still only used by the thread that opened it
+        con = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            con.execute(pragma)
+        # the pragma would replace the timeout given to sqlite3.connect otherwise
+        con.execute(f'PRAGMA busy_timeout = {int(self.timeout * 1000)}')
+        # used by the migrations to backfill company_key / employee_key
+        con.create_function('linkedin_key', 1, linkedin_url_key, deterministic=True)
+        return con
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the connection of the calling thread, opening it if needed."""
+        thread_id = threading.get_ident()
+        con = self._connections.get(thread_id)
+        if con is None:
+            con = self.connect()
+            with self._lock:
+                self._connections[thread_id] = con
+        return con
+
+    def close(self):
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for con in connections:
+            con.close()
 
     def init_db(self, drop_existing: bool = False):
-        con = sqlite3.connect(self.db_path)
+        con = self.connection()
         cur = con.cursor()
 
         # Create table
         if drop_existing:
+            # counters would no longer match the tables
+            self.disable_stats_counters()
             cur.execute('''DROP TABLE IF EXISTS company''')
+            # the migrations add columns to employee, it has to be created again along with company
+            cur.execute('''DROP TABLE IF EXISTS employee''')
+            # the follow results point to the dropped companies
+            cur.execute('''DROP TABLE IF EXISTS follow_result''')
+            # the imported files have to be imported again
+            cur.execute('''DROP TABLE IF EXISTS ingested_file''')
+            # the dropped tables took their indexes with them
+            cur.execute('PRAGMA user_version = 0')
 
         cur.execute('''CREATE TABLE IF NOT EXISTS company
                        (company_name TEXT, company_link TEXT UNIQUE, is_added BOOLEAN)''')
         cur.execute('''CREATE TABLE IF NOT EXISTS employee
                     (employee_link TEXT, company_id INTEGER, is_added BOOLEAN,
                     FOREIGN KEY (company_id) REFERENCES company (rowid))''')
+        con.commit()
+        cur.close()
+        self.migrate()
+
+    def schema_version(self) -> int:
+        return self.connection().execute('PRAGMA user_version').fetchone()[0]
+
+    def migrate(self) -> int:
+        """Apply the pending MIGRATIONS in place, each one in its own transaction.
+
+        Returns the schema version of the database afterwards.
+        """
+        con = self.connection()
+        while True:
+            cur = con.cursor()
+            try:
+                # the version is read under the write lock so concurrent processes never apply a migration twice
+                cur.execute('BEGIN IMMEDIATE')
+                version = cur.execute('PRAGMA user_version').fetchone()[0]
+                if version > SCHEMA_VERSION:
+                    raise RuntimeError(f"Database schema version {version} is newer than this code ({SCHEMA_VERSION}).")
+                if version == SCHEMA_VERSION:
+                    con.rollback()
+                    break
+                for statement in MIGRATIONS[version]:
+                    cur.execute(statement)
+                cur.execute(f'PRAGMA user_version = {version + 1}')
+                con.commit()
+            except (sqlite3.Error, RuntimeError):
+                con.rollback()
+                raise
+            finally:
+                cur.close()
+        return self.schema_version()
 
     def show_all_companies(self):
-        con = sqlite3.connect(self.db_path)
+        con = self.connection()
         cur = con.cursor()
         # select all companies
         cur.execute('SELECT * FROM company')
@@ -42,10 +291,9 @@ class ProspectionDB:
         for row in rows:
             print(row)
         cur.close()
-        con.close()
 
     def show_all_employees(self):
-        con = sqlite3.connect(self.db_path)
+        con = self.connection()
         cur = con.cursor()
         # select all employees
         cur.execute('SELECT * FROM employee')
@@ -54,97 +302,167 @@ class ProspectionDB:
         for row in rows:
             print(row)
         cur.close()
-        con.close()
 
     def get_all_companies_not_added(self) -> list[CompanyDB]:
-        con = sqlite3.connect(self.db_path)
-        cur = con.cursor()
-        # select all companies
-        cur.execute('SELECT rowid, company_name, company_link FROM company WHERE is_added = 0')
-        rows = cur.fetchall()
-        companies = [CompanyDB(row[0], row[1], row[2]) for row in rows]
-        cur.close()
-        con.close()
-        return companies
+        return list(self.iter_companies_not_added())
 
     def get_all_employees_not_added(self) -> list[EmployeeDB]:
-        con = sqlite3.connect(self.db_path)
-        cur = con.cursor()
-        # select all employees
-        cur.execute('SELECT e.rowid, e.employee_link,'
-                     'c.rowid, c.company_name, c.company_link'
-                    ' FROM employee e LEFT JOIN company c on c.rowid = e.company_id WHERE e.is_added = 0')
-        rows = cur.fetchall()
-        employees = [EmployeeDB(row[0], row[1], CompanyDB(row[2], row[3], row[4])) for row in rows]
+        return list(self.iter_employees_not_added())
+
+    def iter_companies_not_added(self, limit: Optional[int] = None, order: str = 'asc',
+                                 page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[CompanyDB]:
+        """Iterate over companies not added yet, by rowid, reading page_size rows at a time"""
+        return self._iter_companies(0, limit, order, page_size)
+
+    def iter_companies_added(self, limit: Optional[int] = None, order: str = 'asc',
+                             page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[CompanyDB]:
+        """Iterate over added companies, by rowid. order='desc' gives the most recent first"""
+        return self._iter_companies(1, limit, order, page_size)
+
+    def iter_employees_not_added(self, limit: Optional[int] = None, order: str = 'asc',
+                                 page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[EmployeeDB]:
+        """Iterate over employees not added yet, by rowid, reading page_size rows at a time"""
+        return self._iter_employees(0, limit, order, page_size)
+
+    def iter_employees_added(self, limit: Optional[int] = None, order: str = 'asc',
+                             page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[EmployeeDB]:
+        """Iterate over added employees, by rowid. order='desc' gives the most recent first"""
+        return self._iter_employees(1, limit, order, page_size)
+
+    def _iter_companies(self, is_added: int, limit: Optional[int], order: str, page_size: int) -> Iterator[CompanyDB]:
+        query = 'SELECT rowid, company_name, company_link FROM company WHERE is_added = ? AND rowid {} ? ORDER BY rowid {} LIMIT ?'
+        for row in self._iter_pages(query, is_added, limit, order, page_size):
+            yield CompanyDB(row[0], row[1], row[2])
+
+    def iter_companies_to_follow(self, max_attempts: int = 0, limit: Optional[int] = None,
+                                 page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[CompanyDB]:
+        """Companies not added yet, by rowid, without those that failed max_attempts times already (0 = no limit)
+
+        Companies without a link (the 'unknown' placeholder of the imports) can't be followed and are skipped.
+        """
+        query = ("SELECT rowid, company_name, company_link FROM company c WHERE is_added = ? AND rowid {} ?"
+                 f" AND {self._to_follow_condition(max_attempts)} ORDER BY rowid {{}} LIMIT ?")
+        return (CompanyDB(row[0], row[1], row[2]) for row in self._iter_pages(query, 0, limit, 'asc', page_size))
+
+    def count_companies_to_follow(self, max_attempts: int = 0) -> int:
+        """Number of companies iter_companies_to_follow would return"""
+        cur = self.connection().cursor()
+        cur.execute(f'SELECT count(*) FROM company c WHERE is_added = 0 AND {self._to_follow_condition(max_attempts)}')
+        count = cur.fetchone()[0]
         cur.close()
-        con.close()
-        return employees
+        return count
 
-    def updateAddedEmployee(self, employee: EmployeeDB):
-        con = sqlite3.connect(self.db_path)
-        cur = con.cursor()
-        # update employee
-        cur.execute('UPDATE employee SET is_added = 1 WHERE rowid = ?', (employee.id,))
-        con.commit()
+    def is_company_to_follow(self, company_id: int, max_attempts: int = 0) -> bool:
+        """Whether iter_companies_to_follow would still return this company"""
+        cur = self.connection().cursor()
+        cur.execute(f'SELECT count(*) FROM company c WHERE rowid = ? AND is_added = 0'
+                    f' AND {self._to_follow_condition(max_attempts)}', (company_id,))
+        found = cur.fetchone()[0] > 0
         cur.close()
-        con.close()
+        return found
+
+    @staticmethod
+    def _to_follow_condition(max_attempts: int) -> str:
+        # the company of the rows is aliased c
+        condition = "coalesce(c.company_link, '') != ''"
+        if max_attempts > 0:
+            condition += (" AND (SELECT count(*) FROM follow_result f WHERE f.company_id = c.rowid"
+                          f" AND f.status = 'error') < {int(max_attempts)}")
+        return condition
+
+    def _iter_employees(self, is_added: int, limit: Optional[int], order: str, page_size: int) -> Iterator[EmployeeDB]:
+        query = ('SELECT e.rowid, e.employee_link, c.rowid, c.company_name, c.company_link'
+                 ' FROM employee e LEFT JOIN company c on c.rowid = e.company_id'
+                 ' WHERE e.is_added = ? AND e.rowid {} ? ORDER BY e.rowid {} LIMIT ?')
+        for row in self._iter_pages(query, is_added, limit, order, page_size):
+            yield EmployeeDB(row[0], row[1], CompanyDB(row[2], row[3], row[4]))
+
+    def _iter_pages(self, query: str, is_added: int, limit: Optional[int], order: str, page_size: int) -> Iterator[tuple]:
+        """Keyset pagination over rowid : every page is a bounded index scan starting after the last rowid seen.
+
+        Each page is fetched and its cursor closed before rows are yielded, so callers can
+        update rows (e.g. mark them as added) while iterating.
+        """
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"order must be 'asc' or 'desc', not '{order}'")
+        if page_size <= 0:
+            raise ValueError('page_size must be positive')
+        query = query.format('>', 'ASC') if order == 'asc' else query.format('<', 'DESC')
+        last_rowid = 0 if order == 'asc' else SQLITE_MAX_ROWID
+        remaining = limit
+        con = self.connection()
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            cur = con.cursor()
+            cur.execute(query, (is_added, last_rowid, size))
+            rows = cur.fetchall()
+            cur.close()
+            yield from rows
+            if len(rows) < size:
+                return
+            last_rowid = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def updateAddedEmployee(self, employee: EmployeeDB):
+        self.mark_employees_added([employee.id])
 
     def updateAddedCompany(self, company: CompanyDB):
-        con = sqlite3.connect(self.db_path)
+        self.mark_companies_added([company.id])
+
+    def mark_companies_added(self, company_ids: Iterable[int], is_added: bool = True) -> int:
+        """Set is_added on all the given companies in one transaction, returns the number of rows changed"""
+        return self._mark_ids('company', company_ids, is_added)
+
+    def mark_employees_added(self, employee_ids: Iterable[int], is_added: bool = True) -> int:
+        """Set is_added on all the given employees in one transaction, returns the number of rows changed"""
+        return self._mark_ids('employee', employee_ids, is_added)
+
+    def mark_companies_added_where(self, where: str, params: Sequence = (), is_added: bool = True) -> int:
+        """Set is_added on every company matching the SQL predicate ``where`` (trusted code only, values go in params)"""
+        return self._mark_where('company', where, params, is_added)
+
+    def mark_employees_added_where(self, where: str, params: Sequence = (), is_added: bool = True) -> int:
+        """Set is_added on every employee matching the SQL predicate ``where`` (trusted code only, values go in params)"""
+        return self._mark_where('employee', where, params, is_added)
+
+    def _mark_ids(self, table: str, ids: Iterable[int], is_added: bool) -> int:
+        # rows already in the requested state are left alone so the count only reflects real changes
+        return self._execute_update(
+            lambda cur: cur.executemany(f'UPDATE {table} SET is_added = ? WHERE rowid = ? AND is_added IS NOT ?',
+                                        ((is_added, row_id, is_added) for row_id in ids)))
+
+    def _mark_where(self, table: str, where: str, params: Sequence, is_added: bool) -> int:
+        return self._execute_update(
+            lambda cur: cur.execute(f'UPDATE {table} SET is_added = ? WHERE ({where}) AND is_added IS NOT ?',
+                                    (is_added, *params, is_added)))
+
+    def _execute_update(self, run) -> int:
+        con = self.connection()
         cur = con.cursor()
-        # update company
-        cur.execute('UPDATE company SET is_added = 1 WHERE rowid = ?', (company.id,))
-        con.commit()
-        cur.close()
-        con.close()
+        try:
+            run(cur)
+            changed = max(cur.rowcount, 0)
+            con.commit()
+        except sqlite3.Error:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+        return changed
 
     def get_companies_stats(self) -> dict:
         """Get statistics about companies (total, added, remaining)"""
-        con = sqlite3.connect(self.db_path)
-        cur = con.cursor()
-        
-        # Get total companies
-        cur.execute('SELECT COUNT(*) FROM company')
-        total = cur.fetchone()[0]
-        
-        # Get added companies
-        cur.execute('SELECT COUNT(*) FROM company WHERE is_added = 1')
-        added = cur.fetchone()[0]
-        
-        # Get remaining companies
-        cur.execute('SELECT COUNT(*) FROM company WHERE is_added = 0')
-        remaining = cur.fetchone()[0]
-        
-        cur.close()
-        con.close()
-        
-        return {
-            'total': total,
-            'added': added,
-            'remaining': remaining,
-            'percentage_added': (added / total * 100) if total > 0 else 0
-        }
+        return self._get_stats('company')
 
     def get_employees_stats(self) -> dict:
         """Get statistics about employees (total, added, remaining)"""
-        con = sqlite3.connect(self.db_path)
-        cur = con.cursor()
-        
-        # Get total employees
-        cur.execute('SELECT COUNT(*) FROM employee')
-        total = cur.fetchone()[0]
-        
-        # Get added employees
-        cur.execute('SELECT COUNT(*) FROM employee WHERE is_added = 1')
-        added = cur.fetchone()[0]
-        
-        # Get remaining employees
-        cur.execute('SELECT COUNT(*) FROM employee WHERE is_added = 0')
-        remaining = cur.fetchone()[0]
-        
-        cur.close()
-        con.close()
-        
+        return self._get_stats('employee')
+
+    def _get_stats(self, entity: str) -> dict:
+        # counters are read in O(1) when enabled, otherwise all counts come from one aggregate pass
+        counters = self._read_counters(entity) if self.has_stats_counters() else None
+        total, added, remaining = counters if counters is not None else self._count_stats(entity)
         return {
             'total': total,
             'added': added,
@@ -152,30 +470,169 @@ class ProspectionDB:
             'percentage_added': (added / total * 100) if total > 0 else 0
         }
 
-    def get_all_companies_added(self) -> list[CompanyDB]:
-        """Get all companies that have been added"""
-        con = sqlite3.connect(self.db_path)
+    def _count_stats(self, entity: str) -> tuple[int, int, int]:
+        if entity not in STATS_ENTITIES:
+            raise ValueError(f"Unknown entity '{entity}'")
+        cur = self.connection().cursor()
+        cur.execute(f'''SELECT count(*), coalesce(sum(is_added IS 1), 0), coalesce(sum(is_added IS 0), 0)
+                        FROM {entity}''')
+        total, added, remaining = cur.fetchone()
+        cur.close()
+        return total, added, remaining
+
+    def _read_counters(self, entity: str) -> Optional[tuple[int, int, int]]:
+        cur = self.connection().cursor()
+        cur.execute('SELECT total, added, remaining FROM stats_counter WHERE entity = ?', (entity,))
+        row = cur.fetchone()
+        cur.close()
+        return row
+
+    def has_stats_counters(self) -> bool:
+        cur = self.connection().cursor()
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_counter'")
+        exists = cur.fetchone() is not None
+        cur.close()
+        return exists
+
+    def enable_stats_counters(self):
+        """Create the trigger-maintained stats_counter table and fill it from the current rows.
+
+        Totals then come back in constant time, at the cost of one counter update per written row.
+        """
+        con = self.connection()
+        cur = con.cursor()
+        try:
+            cur.execute('BEGIN IMMEDIATE')
+            cur.execute('''CREATE TABLE IF NOT EXISTS stats_counter
+                           (entity TEXT PRIMARY KEY, total INTEGER NOT NULL,
+                           added INTEGER NOT NULL, remaining INTEGER NOT NULL)''')
+            for entity in STATS_ENTITIES:
+                for trigger in _stats_counter_triggers(entity):
+                    cur.execute(trigger)
+            self._rebuild_counters(cur)
+            con.commit()
+        except sqlite3.Error:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def disable_stats_counters(self):
+        con = self.connection()
         cur = con.cursor()
-        
-        cur.execute('SELECT rowid, company_name, company_link FROM company WHERE is_added = 1')
+        for entity in STATS_ENTITIES:
+            for event in ('insert', 'delete', 'update'):
+                cur.execute(f'DROP TRIGGER IF EXISTS {entity}_stats_{event}')
+        cur.execute('DROP TABLE IF EXISTS stats_counter')
+        con.commit()
+        cur.close()
+
+    def check_stats_counters(self, rebuild: bool = False) -> dict:
+        """Compare the counters with an aggregate pass over the tables.
+
+        Returns {entity: (counters, actual)} for every entity whose counters drifted,
+        and resets them to the actual values when rebuild is True.
+        """
+        if not self.has_stats_counters():
+            return {}
+        con = self.connection()
+        cur = con.cursor()
+        try:
+            # read both sides in the same transaction so concurrent writers can't fake a drift
+            cur.execute('BEGIN IMMEDIATE')
+            mismatches = {}
+            for entity in STATS_ENTITIES:
+                counters = self._read_counters(entity)
+                actual = self._count_stats(entity)
+                if counters != actual:
+                    mismatches[entity] = (counters, actual)
+            if mismatches and rebuild:
+                self._rebuild_counters(cur)
+            con.commit()
+        except sqlite3.Error:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+        return mismatches
+
+    def _rebuild_counters(self, cur):
+        for entity in STATS_ENTITIES:
+            total, added, remaining = self._count_stats(entity)
+            cur.execute('INSERT OR REPLACE INTO stats_counter (entity, total, added, remaining) VALUES (?, ?, ?, ?)',
+                        (entity, total, added, remaining))
+
+    def record_follow_result(self, result: FollowResultDB):
+        """Store a follow attempt and mark its company as added when followed, in one transaction"""
+        con = self.connection()
+        cur = con.cursor()
+        try:
+            cur.execute('BEGIN IMMEDIATE')
+            cur.execute('''INSERT OR REPLACE INTO follow_result (task_id, company_id, url, status, reason, reported_at)
+                           VALUES (?, ?, ?, ?, ?, coalesce(nullif(?, ''), datetime('now')))''',
+                        (result.task_id, result.company_id, result.url, result.status, result.reason,
+                         result.reported_at))
+            if result.company_id is not None and result.status in FOLLOWED_STATUSES:
+                cur.execute('UPDATE company SET is_added = 1 WHERE rowid = ? AND is_added IS NOT 1',
+                            (result.company_id,))
+            con.commit()
+        except sqlite3.Error:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def get_follow_stats(self) -> dict:
+        """Number of follow attempts per reported status"""
+        cur = self.connection().cursor()
+        cur.execute('SELECT status, count(*) FROM follow_result GROUP BY status ORDER BY status')
+        stats = dict(cur.fetchall())
+        cur.close()
+        return stats
+
+    def iter_follow_results(self, limit: Optional[int] = None, status: Optional[str] = None) -> Iterator[FollowResultDB]:
+        """Follow attempts, most recent first, only those with the given status if any"""
+        where, params = ('WHERE status = ?', (status,)) if status is not None else ('', ())
+        cur = self.connection().cursor()
+        cur.execute(f'''SELECT task_id, company_id, url, status, reason, reported_at FROM follow_result {where}
+                        ORDER BY reported_at DESC, rowid DESC LIMIT ?''', (*params, -1 if limit is None else limit))
         rows = cur.fetchall()
-        companies = [CompanyDB(row[0], row[1], row[2]) for row in rows]
-        
         cur.close()
-        con.close()
-        return companies
+        for row in rows:
+            yield FollowResultDB(*row)
+
+    def get_all_companies_added(self) -> list[CompanyDB]:
+        """Get all companies that have been added"""
+        return list(self.iter_companies_added())
 
     def get_all_employees_added(self) -> list[EmployeeDB]:
         """Get all employees that have been added"""
-        con = sqlite3.connect(self.db_path)
+        return list(self.iter_employees_added())
+
+    def get_ingested_file(self, path: str) -> Optional[IngestedFileDB]:
+        cur = self.connection().cursor()
+        cur.execute('''SELECT path, size, mtime, content_hash, companies, employees, ingested_at, rows, header_hash
+                       FROM ingested_file WHERE path = ?''', (path,))
+        row = cur.fetchone()
+        cur.close()
+        return IngestedFileDB(*row) if row else None
+
+    def has_ingested_content(self, content_hash: str) -> bool:
+        """Whether a file with this content was already imported, whatever its path"""
+        cur = self.connection().cursor()
+        cur.execute('SELECT 1 FROM ingested_file WHERE content_hash = ? LIMIT 1', (content_hash,))
+        found = cur.fetchone() is not None
+        cur.close()
+        return found
+
+    def record_ingested_file(self, ingested_file: IngestedFileDB):
+        con = self.connection()
         cur = con.cursor()
-        
-        cur.execute('SELECT e.rowid, e.employee_link, '
-                   'c.rowid, c.company_name, c.company_link '
-                   'FROM employee e LEFT JOIN company c on c.rowid = e.company_id WHERE e.is_added = 1')
-        rows = cur.fetchall()
-        employees = [EmployeeDB(row[0], row[1], CompanyDB(row[2], row[3], row[4])) for row in rows]
-        
+        cur.execute('''INSERT OR REPLACE INTO ingested_file
+                       (path, size, mtime, content_hash, companies, employees, ingested_at, rows, header_hash)
+                       VALUES (?, ?, ?, ?, ?, ?, coalesce(nullif(?, ''), datetime('now')), ?, ?)''',
+                    (ingested_file.path, ingested_file.size, ingested_file.mtime, ingested_file.content_hash,
+                     ingested_file.companies, ingested_file.employees, ingested_file.ingested_at,
+                     ingested_file.rows, ingested_file.header_hash))
+        con.commit()
         cur.close()
-        con.close()
-        return employees
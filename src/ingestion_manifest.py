@@ -0,0 +1,213 @@
+"""Declarative description of the exports to import, and the ledger that skips unchanged files.
+
+The manifest is a JSON file listing, for every source, its provider, its path and
+the columns to read (the same mapping ``MantiksCSVParser``/``BuiltwithCSVParser``
+take)::
+
+    {
+      "sources": [
+        {"provider": "builtwith", "path": "Builtwith/*.csv",
+         "company_name_column": "Company", "company_link_column": "Linkedin", "employee_link_column": ""}
+      ]
+    }
+
+Relative paths are resolved from the manifest directory and may be glob patterns,
+so a new export dropped in a watched directory is picked up by the next run.
+Every imported file is recorded in the ``ingested_file`` table with its size,
+mtime and content hash; files whose size and mtime did not change are skipped
+without being read, and files whose content hash is already known are skipped
+after hashing.  Exports that only grew since their last import (the same search
+downloaded again) are re-read from the byte offset already consumed.  An export
+modified within the last SETTLE_SECONDS may still be written : its rows are only
+read up to the last newline, a partial last row is left for the next run.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+from src.csv_parser import ParserProviderType, header_length
+from src.db_prospection import IngestedFileDB, ProspectionDB
+from src.ingestion_pipeline import IngestionSource, PipelineReport
+
+REQUIRED_SOURCE_FIELDS = ("provider", "path", "company_name_column", "company_link_column")
+HASH_BLOCK_SIZE = 1024 * 1024
+# an export not modified for this long is complete, even when it doesn't end with a newline
+SETTLE_SECONDS = 60
+
+
+@dataclass
+class PlannedSource:
+    """A source that has to be imported, with the ledger entry to record once it is."""
+
+    source: IngestionSource
+    ledger_entry: IngestedFileDB
+    # only the rows appended since the previous import are read
+    incremental: bool = False
+
+
+def load_manifest(manifest_path: str) -> list[IngestionSource]:
+    path = Path(manifest_path)
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except OSError as exc:
+        raise ValueError(f"Unable to read manifest '{manifest_path}': {exc}") from exc
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Manifest '{manifest_path}' is not valid JSON: {exc}") from exc
+
+    entries = payload.get("sources") if isinstance(payload, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"Manifest '{manifest_path}' must contain a 'sources' list.")
+
+    sources: list[IngestionSource] = []
+    seen_paths: set[str] = set()
+    for position, entry in enumerate(entries, start=1):
+        missing = [name for name in REQUIRED_SOURCE_FIELDS if not isinstance(entry, dict) or name not in entry]
+        if missing:
+            raise ValueError(f"Source #{position} of '{manifest_path}' is missing: {', '.join(missing)}")
+        try:
+            provider = ParserProviderType(entry["provider"])
+        except ValueError as exc:
+            known = ", ".join(provider.value for provider in ParserProviderType)
+            raise ValueError(f"Source #{position} has unknown provider '{entry['provider']}' (expected {known})") from exc
+
+        pattern = os.path.expanduser(entry["path"])
+        if not os.path.isabs(pattern):
+            pattern = str(path.parent / pattern)
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            logging.warning(f"Source #{position} of '{manifest_path}' does not match any file: {entry['path']}")
+
+        for file_path in matches:
+            if file_path in seen_paths:
+                continue
+            seen_paths.add(file_path)
+            description = entry.get("description") if len(matches) == 1 else None
+            sources.append(IngestionSource(
+                provider,
+                file_path,
+                entry["company_name_column"],
+                entry["company_link_column"],
+                entry.get("employee_link_column", ""),
+                description or os.path.basename(file_path),
+            ))
+    return sources
+
+
+def hash_file(file_path: str, size: Optional[int] = None, checkpoint: Optional[int] = None) -> tuple[str, Optional[str]]:
+    """sha256 of the first ``size`` bytes of a file (all of it by default).
+
+    When ``checkpoint`` is given, the hash of the first ``checkpoint`` bytes is computed in the
+    same pass and returned as the second value, otherwise the second value is None.
+    """
+    digest = hashlib.sha256()
+    checkpoint_hash = digest.hexdigest() if checkpoint == 0 else None
+    position = 0
+    with open(file_path, "rb") as handle:
+        while size is None or position < size:
+            limit = HASH_BLOCK_SIZE if size is None else min(HASH_BLOCK_SIZE, size - position)
+            if checkpoint is not None and position < checkpoint:
+                limit = min(limit, checkpoint - position)
+            block = handle.read(limit)
+            if not block:
+                break
+            digest.update(block)
+            position += len(block)
+            if position == checkpoint:
+                checkpoint_hash = digest.hexdigest()
+    return digest.hexdigest(), checkpoint_hash
+
+
+def complete_rows_end(file_path: str, size: int) -> int:
+    """Offset just after the last newline in the first ``size`` bytes of a file, 0 when there is none"""
+    position = size
+    with open(file_path, "rb") as handle:
+        while position > 0:
+            start = max(0, position - HASH_BLOCK_SIZE)
+            handle.seek(start)
+            newline = handle.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+    return 0
+
+
+def hash_header(source: IngestionSource) -> str:
+    with open(source.path, "rb") as handle:
+        return hashlib.sha256(handle.read(header_length(source.path, source.provider))).hexdigest()
+
+
+def plan_ingestion(db: ProspectionDB, sources: list[IngestionSource],
+                   force: bool = False) -> tuple[list[PlannedSource], list[IngestionSource]]:
+    """Split ``sources`` into the files to import and the ones the ledger says are unchanged.
+
+    A file that only grew since its last import, same header and same bytes up to the size
+    recorded in the ledger, is planned with a byte range covering the appended rows only.
+    Any other change falls back to a full import. The planned range always ends at the size
+    that was hashed, so rows appended while importing are left for the next run, and before
+    a partial last row when the file was modified less than SETTLE_SECONDS ago.
+    Missing files are kept in the plan so the pipeline reports them as errors.
+    """
+    planned: list[PlannedSource] = []
+    skipped: list[IngestionSource] = []
+    for source in sources:
+        try:
+            stat = os.stat(source.path)
+        except OSError:
+            planned.append(PlannedSource(source, IngestedFileDB(source.path, 0, 0.0, "")))
+            continue
+
+        known = db.get_ingested_file(source.path)
+        if not force and known and known.size == stat.st_size and known.mtime == stat.st_mtime:
+            skipped.append(source)
+            continue
+
+        end = stat.st_size
+        if time.time() - stat.st_mtime < SETTLE_SECONDS:
+            # may still be written, the ledger records the end of the last complete row
+            end = complete_rows_end(source.path, stat.st_size)
+            if end == 0 or (not force and known and known.size == end and known.mtime == stat.st_mtime):
+                skipped.append(source)
+                continue
+
+        checkpoint = known.size if known and known.size < end else None
+        content_hash, prefix_hash = hash_file(source.path, end, checkpoint)
+        entry = IngestedFileDB(source.path, end, stat.st_mtime, content_hash,
+                               header_hash=hash_header(source))
+        if not force and db.has_ingested_content(entry.content_hash):
+            # touched or copied but same content : only refresh the fingerprint
+            if known:
+                entry.companies, entry.employees, entry.rows = known.companies, known.employees, known.rows
+            db.record_ingested_file(entry)
+            skipped.append(source)
+            continue
+
+        appended = (not force and known is not None and prefix_hash is not None
+                    and prefix_hash == known.content_hash and entry.header_hash == known.header_hash)
+        if appended:
+            entry.companies, entry.employees, entry.rows = known.companies, known.employees, known.rows
+            source = replace(source, start_offset=known.size, end_offset=end)
+        else:
+            source = replace(source, start_offset=0, end_offset=end)
+        planned.append(PlannedSource(source, entry, incremental=appended))
+    return planned, skipped
+
+
+def record_ingestion(db: ProspectionDB, planned: list[PlannedSource], report: PipelineReport) -> None:
+    """Record in the ledger every planned file the pipeline imported without error."""
+    for planned_source, timing in zip(planned, report.sources):
+        if timing.error or not planned_source.ledger_entry.content_hash:
+            continue
+        entry = planned_source.ledger_entry
+        entry.companies += timing.companies
+        entry.employees += timing.employees
+        entry.rows += timing.rows
+        db.record_ingested_file(entry)
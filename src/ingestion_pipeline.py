@@ -0,0 +1,269 @@
+"""Parallel ingestion of provider exports into the prospection database.
+
+A pool of processes parses the exports concurrently, chunk by chunk, and sends
+the record batches through a bounded queue to the calling process, which is the
+only writer : it commits in large transactions so SQLite never sees two writers
+competing for the lock.  Total time is then close to the time needed to parse
+the largest export instead of the sum of all of them.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import queue as queue_module
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.csv_parser import BuiltwithCSVParser, MantiksCSVParser, ParserProviderType, ProspectParser, RecordColumns
+from src.db_prospection import ProspectionDB
+from src.parser_visitors import SQLLiteSaveVisitor, unknown_company
+
+# rows read per chunk by the parsing workers
+PIPELINE_CHUNK_SIZE = 10_000
+# records written by the writer between two commits
+DEFAULT_COMMIT_EVERY = 200_000
+# seconds the writer waits for a batch before checking that the workers are still alive
+POOL_POLL_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class IngestionSource:
+    """One provider export and the names of the columns to read from it."""
+
+    provider: ParserProviderType
+    path: str
+    company_name_column: str
+    company_link_column: str
+    employee_link_column: str
+    description: str
+    # byte range of the file to read : everything by default, only the appended rows on incremental imports
+    start_offset: int = 0
+    end_offset: Optional[int] = None
+    # csv file receiving the rows rejected by the parser's validation, see ProspectParser.normalize_df
+    rejects_path: Optional[str] = None
+
+
+@dataclass
+class SourceTiming:
+    description: str
+    parse_seconds: float = 0.0
+    write_seconds: float = 0.0
+    rows: int = 0
+    rejected: int = 0
+    companies: int = 0
+    employees: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class PipelineReport:
+    sources: list[SourceTiming] = field(default_factory=list)
+    wall_seconds: float = 0.0
+    writer_wait_seconds: float = 0.0
+    commits: int = 0
+
+    def log(self) -> None:
+        for timing in self.sources:
+            status = f"FAILED ({timing.error})" if timing.error else "ok"
+            logging.info(
+                f"{timing.description}: parse {timing.parse_seconds:.2f}s, write {timing.write_seconds:.2f}s, "
+                f"{timing.rows} rows ({timing.rejected} rejected), {timing.companies} companies, {timing.employees} employees - {status}"
+            )
+        parse_total = sum(timing.parse_seconds for timing in self.sources)
+        write_total = sum(timing.write_seconds for timing in self.sources)
+        logging.info(
+            f"Total: wall {self.wall_seconds:.2f}s, parse (sum over workers) {parse_total:.2f}s, "
+            f"write {write_total:.2f}s, writer waiting for batches {self.writer_wait_seconds:.2f}s, "
+            f"{self.commits} commits"
+        )
+
+
+def create_parser(source: IngestionSource, chunksize: Optional[int] = PIPELINE_CHUNK_SIZE) -> ProspectParser:
+    parser_class = MantiksCSVParser if source.provider == ParserProviderType.MANTIKS else BuiltwithCSVParser
+    return parser_class(source.path, source.company_name_column, source.company_link_column,
+                        source.employee_link_column, chunksize=chunksize,
+                        start_offset=source.start_offset, end_offset=source.end_offset,
+                        rejects_path=source.rejects_path)
+
+
+class BatchWriter:
+    """Single writer of the pipeline : saves batches through one connection and commits every commit_every records."""
+
+    def __init__(self, db_path: str, has_been_added: bool = False, commit_every: int = DEFAULT_COMMIT_EVERY):
+        self.visitor = SQLLiteSaveVisitor(db_path, has_been_added)
+        self.commit_every = commit_every
+        self.commits = 0
+        self._pending = 0
+        self.con: Optional[sqlite3.Connection] = None
+        self.cur: Optional[sqlite3.Cursor] = None
+
+    def __enter__(self):
+        self.con = ProspectionDB(self.visitor.db_path, timeout=30.0).connect()
+        self.cur = self.con.cursor()
+        self.visitor.create_staging_tables(self.cur)
+        self.visitor.save_batch(self.cur, [unknown_company], [])
+        return self
+
+    def write(self, columns: RecordColumns) -> None:
+        self.visitor.save_columns(self.cur, columns)
+        self._pending += columns.listed_companies + len(columns.employee_links)
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self) -> None:
+        self.con.commit()
+        self.commits += 1
+        self._pending = 0
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.con.rollback()
+        finally:
+            self.cur.close()
+            self.con.close()
+
+
+_worker_queue = None
+_worker_started = None
+
+
+def _init_worker(queue, started) -> None:
+    global _worker_queue, _worker_started
+    _worker_queue, _worker_started = queue, started
+
+
+def _parse_worker(index: int, source: IngestionSource, chunksize: int) -> None:
+    """Runs in a pool process : stream the batches of one export to the writer, then report the parse time.
+
+    The reported time includes waiting for room in the queue when the writer is the bottleneck.
+    """
+    start = time.perf_counter()
+    error = None
+    parser = None
+    # lets the writer notice that this process died without reporting. A SimpleQueue writes
+    # right away, a Queue would lose the message if the process died before its feeder thread sent it
+    _worker_started.put((index, os.getpid()))
+    try:
+        parser = create_parser(source, chunksize)
+        # columns rather than records : far less to pickle through the queue
+        for columns in parser.iter_columns():
+            _worker_queue.put(('batch', index, columns))
+    except Exception as exc:  # reported to the writer, the other files keep going
+        error = f"{type(exc).__name__}: {exc}"
+    finally:
+        rows, rejected = (parser.rows_read, parser.rows_rejected) if parser is not None else (0, 0)
+        _worker_queue.put(('done', index, time.perf_counter() - start, rows, rejected, error))
+
+
+def run_pipeline(sources: list[IngestionSource], db_path: str, workers: int,
+                 chunksize: int = PIPELINE_CHUNK_SIZE, commit_every: int = DEFAULT_COMMIT_EVERY,
+                 has_been_added: bool = False) -> PipelineReport:
+    """Parse ``sources`` with ``workers`` processes and write everything through a single BatchWriter.
+
+    With ``workers`` set to 0 the files are parsed one after another in the calling process.
+    """
+    report = PipelineReport(sources=[SourceTiming(source.description) for source in sources])
+    start = time.perf_counter()
+
+    with BatchWriter(db_path, has_been_added, commit_every) as writer:
+        if workers <= 0:
+            for source, timing in zip(sources, report.sources):
+                _write_in_process(source, chunksize, writer, timing)
+        else:
+            _write_from_pool(sources, workers, chunksize, writer, report)
+        report.commits = writer.commits + 1  # final commit on exit
+
+    report.wall_seconds = time.perf_counter() - start
+    return report
+
+
+def _write_batch(writer: BatchWriter, timing: SourceTiming, columns: RecordColumns) -> None:
+    write_start = time.perf_counter()
+    writer.write(columns)
+    timing.write_seconds += time.perf_counter() - write_start
+    timing.companies += columns.listed_companies
+    timing.employees += len(columns.employee_links)
+
+
+def _write_in_process(source: IngestionSource, chunksize: int, writer: BatchWriter, timing: SourceTiming) -> None:
+    parser = create_parser(source, chunksize)
+    batches = parser.iter_columns()
+    while True:
+        parse_start = time.perf_counter()
+        try:
+            batch = next(batches, None)
+        except Exception as exc:  # same as in the pool : a broken file doesn't stop the others
+            timing.error = f"{type(exc).__name__}: {exc}"
+            batch = None
+        timing.parse_seconds += time.perf_counter() - parse_start
+        if batch is None:
+            timing.rows, timing.rejected = parser.rows_read, parser.rows_rejected
+            return
+        _write_batch(writer, timing, batch)
+
+
+def _write_from_pool(sources: list[IngestionSource], workers: int, chunksize: int, writer: BatchWriter,
+                     report: PipelineReport) -> None:
+    context = multiprocessing.get_context()
+    # bounded so that fast parsers wait for the writer instead of piling batches up in memory
+    queue = context.Queue(maxsize=max(4, workers * 4))
+    started_queue = context.SimpleQueue()
+    with context.Pool(min(workers, len(sources)) or 1, initializer=_init_worker,
+                      initargs=(queue, started_queue)) as pool:
+        results = [pool.apply_async(_parse_worker, (index, source, chunksize)) for index, source in enumerate(sources)]
+        pool.close()
+
+        started: dict[int, int] = {}  # index -> pid of the worker parsing it
+        done: set[int] = set()
+        lost = False
+        while len(done) < len(sources):
+            wait_start = time.perf_counter()
+            try:
+                message = queue.get(timeout=POOL_POLL_SECONDS)
+            except queue_module.Empty:
+                # a worker that failed outside of _parse_worker or died never sends 'done'
+                while not started_queue.empty():
+                    index, pid = started_queue.get()
+                    started[index] = pid
+                for index, error in _lost_workers(results, started, done, context):
+                    report.sources[index].error = error
+                    done.add(index)
+                    lost = True
+                continue
+            finally:
+                report.writer_wait_seconds += time.perf_counter() - wait_start
+
+            kind, index = message[0], message[1]
+            timing = report.sources[index]
+            if kind == 'batch':
+                _write_batch(writer, timing, message[2])
+            elif index not in done:
+                timing.parse_seconds, timing.rows, timing.rejected, timing.error = message[2:6]
+                done.add(index)
+        # the task of a dead worker stays pending forever, the pool is terminated on exit instead
+        if not lost:
+            pool.join()
+
+
+def _lost_workers(results: list, started: dict[int, int], done: set[int], context) -> list[tuple[int, str]]:
+    """(index, error) of the sources whose worker will never report"""
+    alive = {process.pid for process in context.active_children()}
+    lost = []
+    for index, result in enumerate(results):
+        if index in done:
+            continue
+        if result.ready() and not result.successful():
+            try:
+                result.get()
+            except Exception as exc:
+                lost.append((index, f"{type(exc).__name__}: {exc}"))
+        elif index in started and started[index] not in alive:
+            lost.append((index, "worker process died"))
+    return lost
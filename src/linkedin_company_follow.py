@@ -8,8 +8,10 @@ decision making logic (e.g. determining whether a button represents the
 
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 from typing import Iterable, Optional, Sequence, Set
+from urllib.parse import unquote
 
 try:  # pragma: no cover - fallback used only when Selenium is absent (unit tests)
     from selenium.webdriver.common.by import By
@@ -41,6 +43,17 @@ LOGIN_FORM_SELECTORS: tuple[str, ...] = (
     "button[data-litms-control-urn='login-submit']",
 )
 
+# Matches lower-cased LinkedIn company and profile URLs whatever their spelling: with or
+# without scheme, www. or a locale subdomain (fr.linkedin.com), an optional locale path
+# segment, trailing slashes, query strings or fragments.  Group 1 is the page kind and
+# group 2 its slug.
+LINKEDIN_URL_PATTERN = (
+    r"^(?:https?://)?(?:[a-z0-9-]+\.)*linkedin\.com"
+    r"(?:/(?!in/)[a-z]{2}(?:-[a-z]{2})?)?"
+    r"/(company|school|showcase|in)/([^/?#\s]+)"
+)
+_LINKEDIN_URL_RE = re.compile(LINKEDIN_URL_PATTERN)
+
 
 @dataclass(frozen=True)
 class ButtonSnapshot:
@@ -70,6 +83,22 @@ def normalise_company_url(url: str) -> str:
     return f"https://{trimmed.lstrip('/')}"
 
 
+def linkedin_url_key(url: Optional[str]) -> Optional[str]:
+    """Reduce a LinkedIn company or profile URL to a stable key such as ``company/acme``.
+
+    Every spelling of the same page gives the same key, so it can be used to deduplicate
+    records coming from different providers.  Returns ``None`` for anything that is not a
+    LinkedIn company, school, showcase or profile URL.
+    """
+
+    if not isinstance(url, str):
+        return None
+    match = _LINKEDIN_URL_RE.match(url.strip().lower())
+    if not match:
+        return None
+    return f"{match.group(1)}/{unquote(match.group(2)).lower()}"
+
+
 def collect_button_texts(button) -> Set[str]:  # type: ignore[no-untyped-def]
     """Collect visible texts for a Selenium WebElement button.
 
@@ -1,39 +1,45 @@
 from IPython.utils.openpy import source_to_unicode
 
-from db_prospection import ProspectionDB
+import os
+import sys
+from itertools import islice
 import time
 import webbrowser
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db_prospection import ProspectionDB
 
 # more than this number can lead to not loaded pages
 def add_company_with_validation(nb_open_companies_at_once: int = 8):
     prospection_db = ProspectionDB('prospection_data.db')
-    all_companies = prospection_db.get_all_companies_not_added()
-    print('Total nb companies not added : ' + str(len(all_companies)))
+    print('Total nb companies not added : ' + str(prospection_db.get_companies_stats()['remaining']))
+    # companies are read page by page as they are opened, never all at once
+    all_companies = prospection_db.iter_companies_not_added()
 
-    counter = 0
     companies_to_open = []
+    next_companies = list(islice(all_companies, nb_open_companies_at_once))
 
     def update_companies_status():
-        for c in companies_to_open:
-            prospection_db.updateAddedCompany(c)
+        prospection_db.mark_companies_added([c.id for c in companies_to_open])
 
     while(True):
         update_companies_status()
 
-        if counter >= len(all_companies):
+        if not next_companies:
             print('No more employee to open')
             break
 
         user_input = input("Press 'Y' to continue...")
         if user_input in ['y', 'Y']:
             # open new companies in browser
-            companies_to_open = all_companies[counter:counter + nb_open_companies_at_once]
+            companies_to_open = next_companies
             for company in companies_to_open:
                 link =  company.link if company.link.startswith('http') else 'http://' + company.link
                 webbrowser.open(link)
                 print('Opening company : ' + company.name + " - " + company.link)
                 time.sleep(1)
-            counter += nb_open_companies_at_once
+            next_companies = list(islice(all_companies, nb_open_companies_at_once))
         else:
             break
 
@@ -57,16 +63,21 @@ def auto_add_companies(max_nb_companies_to_add: int) -> bool:
     max_nb_companies_to_add = random.randint(int(max_nb_companies_to_add / 2), max_nb_companies_to_add)
     print('Random number of companies to add : ' + str(max_nb_companies_to_add))
 
-    companies_to_add = prospection_db.get_all_companies_not_added()[:max_nb_companies_to_add]
+    companies_to_add = list(prospection_db.iter_companies_not_added(limit=max_nb_companies_to_add))
 
 
     print('Total nb companies not added : ' + str(len(companies_to_add)))
-    for company in companies_to_add:
-        link =  company.link if company.link.startswith('http') else 'http://' + company.link
-        webbrowser.open(link)
-        print('Opening company : ' + str(company.name) + " - " + company.link)
-        prospection_db.updateAddedCompany(company)
-        time.sleep(1)
+    opened_ids = []
+    try:
+        for company in companies_to_add:
+            link =  company.link if company.link.startswith('http') else 'http://' + company.link
+            webbrowser.open(link)
+            print('Opening company : ' + str(company.name) + " - " + company.link)
+            opened_ids.append(company.id)
+            time.sleep(1)
+    finally:
+        # one transaction for the whole batch, also when interrupted
+        prospection_db.mark_companies_added(opened_ids)
     return len(companies_to_add) > 0
 
 if __name__ == '__main__':
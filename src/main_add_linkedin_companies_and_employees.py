@@ -1,76 +1,84 @@
 """Queue-based launcher that relies on the Chrome extension for automation.
 
-The script reads company URLs from a queue file (or from standard inputs),
+The script reads company URLs from a queue file, from the companies not added
+yet in the prospection database (--queue-db), or from standard inputs,
 opens each page in the default browser, and waits for the Chrome extension
 to report whether the Follow action succeeded.  Results are appended to a CSV
-log as they arrive, and completed URLs are removed from the queue file so the
-list can be reused between runs.
+log as they arrive, and completed URLs are recorded in the queue journal and
+dropped from the queue file at the end of the run, so the list can be reused
+between runs.  In --queue-db mode every result is stored in the follow_result
+table and followed companies are marked as added.
+
+Reports the extension delivers after the timeout of their task (it keeps them in
+an outbox until the CLI answers) are reconciled by task_id: the timeout error is
+replaced by the reported result in the summary and the database, and the result
+is written again to the outputs.
 """
 
 from __future__ import annotations
 
 import argparse
-import json
+import io
 import sys
-import threading
 import time
 import uuid
 import webbrowser
-from dataclasses import dataclass
-from datetime import UTC, datetime
-from html import escape
-from http import HTTPStatus
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import chain, islice
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence
-from urllib.parse import parse_qs, quote, urlparse, urlunparse
+from typing import Iterable, Iterator, List, Optional, Sequence
+from urllib.parse import quote
 
+from src.callback_server import start_result_server
+from src.db_prospection import FollowResultDB, ProspectionDB
 from src.linkedin_company_follow import merge_unique_urls, normalise_company_url
-
-
-@dataclass
-class FollowResult:
-    url: str
-    status: str
-    reason: Optional[str] = None
-
-    def as_dict(self) -> dict:
-        payload = {"url": self.url, "status": self.status}
-        if self.reason:
-            payload["reason"] = self.reason
-        return payload
+from src.queue_journal import JournaledQueue, QueueEntry
+from src.quota_ledger import QuotaLedger
+from src.result_sinks import (
+    SINK_FORMATS,
+    CsvResultSink,
+    FlushPolicy,
+    FollowResult,
+    MultiResultSink,
+    ResultSink,
+    ResultSummary,
+    open_output_sink,
+    open_result_sink,
+    print_summary,
+)
+from src.result_store import ResultStore
+
+# seconds between two checks for late reports during --reconcile-grace
+RECONCILE_POLL_INTERVAL = 0.25
+LAUNCH_TO_REPORT_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180)
+# reasons are free text, the rarer ones past this many are counted together
+MAX_RESULT_SERIES = 100
 
 
 def render_results(
-    results: List[FollowResult],
+    results: Iterable[FollowResult],
     output_format: str,
     output_path: Optional[str] = None,
 ) -> str:
-    if output_format == "json":
-        payload = [result.as_dict() for result in results]
-        rendered = json.dumps(payload, indent=2)
-    else:
-        lines = []
-        header = f"{'URL':<80} | STATUS         | REASON"
-        lines.append(header)
-        lines.append("-" * len(header))
+    buffer = io.StringIO()
+    with open_output_sink(output_format, buffer) as sink:
         for result in results:
-            reason = result.reason or ""
-            lines.append(f"{result.url:<80} | {result.status:<14} | {reason}")
-        rendered = "\n".join(lines)
+            sink.write(result)
+    rendered = buffer.getvalue()
 
     if output_path:
         destination = Path(output_path)
         destination.parent.mkdir(parents=True, exist_ok=True)
-        text_to_write = rendered if rendered.endswith("\n") else f"{rendered}\n"
-        destination.write_text(text_to_write, encoding="utf-8")
+        destination.write_text(rendered, encoding="utf-8")
 
-    print(rendered)
+    print(rendered, end="")
     return rendered
 
 
-def compute_exit_code(results: List[FollowResult]) -> int:
-    return 0 if all(result.status != "error" for result in results) else 1
+def compute_exit_code(results: Iterable[FollowResult]) -> int:
+    summary = ResultSummary()
+    for result in results:
+        summary.add(result)
+    return summary.exit_code()
 
 
 def read_queue_file(queue_file: str) -> List[str]:
@@ -90,22 +98,16 @@ def read_queue_file(queue_file: str) -> List[str]:
 def write_queue_file(queue_file: str, remaining_urls: Sequence[str]) -> None:
     path = Path(queue_file)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as handle:
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
         for url in remaining_urls:
             handle.write(f"{url}\n")
+    temp_path.replace(path)
 
 
 def append_incremental_result(destination: str, result: FollowResult) -> None:
-    path = Path(destination)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    header_needed = not path.exists()
-    timestamp = datetime.now(UTC).isoformat(timespec="seconds")
-    reason = result.reason or ""
-
-    with path.open("a", encoding="utf-8") as handle:
-        if header_needed:
-            handle.write("timestamp,url,status,reason\n")
-        handle.write(f"{timestamp},{result.url},{result.status},{reason}\n")
+    with CsvResultSink.append_to(destination) as sink:
+        sink.write(result)
 
 
 def parse_urls(args: argparse.Namespace) -> List[str]:
@@ -135,158 +137,6 @@ def parse_urls(args: argparse.Namespace) -> List[str]:
     return list(urls)
 
 
-class DailyQuotaTracker:
-    """Tracks the number of processed URLs per calendar day."""
-
-    def __init__(self, path: Optional[str] = None) -> None:
-        self.path = Path(path) if path else Path.home() / ".prospection_daily_quota.json"
-        self._load_state()
-
-    def _load_state(self) -> None:
-        self.current_date = datetime.now().astimezone().date()
-        self.count = 0
-        if not self.path.exists():
-            return
-        try:
-            payload = json.loads(self.path.read_text(encoding="utf-8"))
-            stored_date = payload.get("date")
-            stored_count = payload.get("count", 0)
-            if stored_date == self.current_date.isoformat():
-                self.count = int(stored_count)
-        except Exception:
-            self.count = 0
-
-    def _persist(self) -> None:
-        data = {"date": self.current_date.isoformat(), "count": self.count}
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(json.dumps(data), encoding="utf-8")
-
-    def remaining(self, limit: int) -> int:
-        if limit <= 0:
-            return float("inf")
-        return max(0, limit - self.count)
-
-    def record(self, limit: int) -> None:
-        if limit <= 0:
-            return
-        self.count += 1
-        self._persist()
-
-
-class ResultStore:
-    """Thread-safe store that blocks until the extension reports a result."""
-
-    def __init__(self) -> None:
-        self._results: dict[str, dict] = {}
-        self._condition = threading.Condition()
-
-    def add_result(self, task_id: str, payload: dict) -> None:
-        with self._condition:
-            self._results[task_id] = payload
-            self._condition.notify_all()
-
-    def wait_for(self, task_id: str, timeout: float) -> Optional[dict]:
-        deadline = time.time() + timeout
-        with self._condition:
-            while task_id not in self._results:
-                remaining = deadline - time.time()
-                if remaining <= 0:
-                    return None
-                self._condition.wait(timeout=remaining)
-            return self._results.pop(task_id)
-
-
-class _ResultRequestHandler(BaseHTTPRequestHandler):
-    store: ResultStore  # populated dynamically
-
-    def _handle_report(self) -> None:
-        length = int(self.headers.get("Content-Length", "0"))
-        try:
-            payload = json.loads(self.rfile.read(length) or "{}")
-        except json.JSONDecodeError:
-            self.send_error(HTTPStatus.BAD_REQUEST, "Invalid JSON payload")
-            return
-
-        missing = [field for field in ("task_id", "url", "status") if field not in payload]
-        if missing:
-            self.send_error(HTTPStatus.BAD_REQUEST, f"Missing fields: {', '.join(missing)}")
-            return
-
-        task_id = str(payload["task_id"])
-        self.store.add_result(task_id, payload)
-        self.send_response(HTTPStatus.NO_CONTENT)
-        self.end_headers()
-
-    def _handle_launch(self, query: str, page_duration: float) -> None:
-        params = parse_qs(query)
-        task_id = params.get("task_id", [""])[0]
-        target_url = params.get("url", [""])[0]
-
-        if not task_id or not target_url:
-            self.send_error(HTTPStatus.BAD_REQUEST, "task_id and url are required")
-            return
-
-        # Basic validation
-        parsed = urlparse(target_url)
-        if parsed.scheme not in {"http", "https"}:
-            self.send_error(HTTPStatus.BAD_REQUEST, "Only http/https targets are supported.")
-            return
-
-        payload = json.dumps(
-            {
-                "task_id": task_id,
-                "port": self.server.server_address[1],
-                "page_duration": page_duration,
-            }
-        )
-        escaped_payload = payload.replace("</", "<\\/")
-        body = f"""<!DOCTYPE html>
-<meta charset="utf-8">
-<title>LinkedIn Prospection Launcher</title>
-<script>
-  window.name = 'prospection::{escaped_payload}';
-  window.location.replace({json.dumps(target_url)});
-</script>
-"""
-        encoded = body.encode("utf-8")
-
-        self.send_response(HTTPStatus.OK)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(encoded)))
-        self.end_headers()
-        self.wfile.write(encoded)
-
-    def do_POST(self) -> None:  # noqa: N802 (BaseHTTPRequestHandler API)
-        if self.path == "/report":
-            self._handle_report()
-        else:
-            self.send_error(HTTPStatus.NOT_FOUND, "Unexpected endpoint")
-
-    def do_GET(self) -> None:  # noqa: N802
-        parsed = urlparse(self.path)
-        if parsed.path == "/launch":
-            duration = getattr(self.server, "page_duration", 60.0)
-            self._handle_launch(parsed.query, duration)
-            return
-        self.send_error(HTTPStatus.NOT_FOUND, "Unexpected endpoint")
-
-    def log_message(self, format: str, *args) -> None:  # noqa: A003 - matching BaseHTTPRequestHandler
-        return  # Silence the built-in HTTP server logging
-
-
-def start_result_server(store: ResultStore) -> ThreadingHTTPServer:
-    handler_class = type(
-        "ResultHandler",
-        (_ResultRequestHandler,),
-        {"store": store},
-    )
-    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
-    server.page_duration = 60.0
-    thread = threading.Thread(target=server.serve_forever, daemon=True)
-    thread.start()
-    return server
-
-
 def parse_arguments(argv: Optional[list[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Launch LinkedIn company pages so the Chrome extension can follow them.",
@@ -294,103 +144,226 @@ def parse_arguments(argv: Optional[list[str]] = None) -> argparse.Namespace:
 
     parser.add_argument("urls", nargs="*", help="LinkedIn company URLs to follow")
     parser.add_argument("--input-file", help="Path to a file containing company URLs (one per line)")
-    parser.add_argument("--queue-file", help="Path to a persistent queue file (one URL per line)")
-    parser.add_argument("--queue-output", help="CSV file that receives incremental processing results")
+    queue_source = parser.add_mutually_exclusive_group()
+    queue_source.add_argument("--queue-file", help="Path to a persistent queue file (one URL per line)")
+    queue_source.add_argument("--queue-db", nargs="?", const="prospection_data.db",
+                              help="Follow the companies not added yet in this prospection database (default: %(const)s)")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="With --queue-db, skip companies that already failed this many times (0 to always retry)")
+    parser.add_argument("--queue-output", help="File that receives incremental processing results (CSV, JSONL or Parquet)")
+    parser.add_argument("--queue-output-format", choices=SINK_FORMATS,
+                        help="Format of --queue-output, taken from its extension by default (CSV if unknown)")
+    parser.add_argument("--flush-every", type=int, default=None,
+                        help="Flush --queue-output after this many results (default: every result, 1000 for parquet)")
     parser.add_argument("--callback-timeout", type=float, default=90, help="Seconds to wait for the extension to report a result")
+    parser.add_argument("--reconcile-grace", type=float, default=10,
+                        help="Seconds to keep waiting, after the last launch, for the reports of tasks that timed out")
+    parser.add_argument("--port", type=int, default=0,
+                        help="Port of the local callback server, which also serves /metrics (default: any free port)")
     parser.add_argument("--delay-between", type=float, default=90, help="Delay between URL launches in seconds")
     parser.add_argument("--page-duration", type=float, default=60, help="Seconds to keep each tab open before the extension is allowed to close it")
     parser.add_argument("--daily-limit", type=int, default=100, help="Maximum number of URLs to process per calendar day (set to 0 to disable)")
+    parser.add_argument("--quota-file", help="SQLite file counting the URLs processed per day (default: ~/.prospection_daily_quota.db)")
     parser.add_argument("--output-format", choices=("table", "json"), default="table", help="Output results as a table or JSON array")
     parser.add_argument("--output-path", help="Optional path to save the rendered results")
 
     return parser.parse_args(argv)
 
 
+def open_result_sinks(args: argparse.Namespace) -> ResultSink:
+    """The table or JSON array on stdout, --output-path and --queue-output, written as results arrive"""
+    sinks = [open_output_sink(args.output_format, sys.stdout)]
+    if args.output_path:
+        destination = Path(args.output_path)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        sinks.append(open_output_sink(args.output_format, destination.open("w", encoding="utf-8"), owns_stream=True))
+    if args.queue_output:
+        # without --flush-every each format keeps its own default, parquet writes a row group per flush
+        policy = FlushPolicy(every=args.flush_every) if args.flush_every else None
+        sinks.append(open_result_sink(args.queue_output, args.queue_output_format, policy))
+    return MultiResultSink(sinks)
+
+
+def _follow_result_row(task_id: str, entry: QueueEntry, result: FollowResult) -> FollowResultDB:
+    return FollowResultDB(task_id, entry.company_id, result.url, result.status, result.reason)
+
+
+def print_notice(message: str, output_format: str) -> None:
+    # stdout stays a valid JSON document in json format, as in print_summary
+    print(message, file=sys.stderr if output_format == "json" else sys.stdout)
+
+
+def _follow_result_from_payload(url: str, payload: Optional[dict]) -> FollowResult:
+    if payload is None:
+        return FollowResult(
+            url=url,
+            status="error",
+            reason="Chrome extension did not report a result within the timeout window.",
+        )
+    reason = payload.get("reason") or None
+    return FollowResult(url=url, status=str(payload.get("status", "error")), reason=reason)
+
+
 def main(argv: Optional[list[str]] = None) -> int:
     args = parse_arguments(argv)
 
-    if args.queue_file:
-        queue_urls = read_queue_file(args.queue_file)
-        urls = list(queue_urls)
+    entries: Iterator[QueueEntry]
+    queue = None
+    prospection_db = None
+    if args.queue_db:
+        prospection_db = ProspectionDB(args.queue_db)
+        prospection_db.migrate()
+        companies = prospection_db.iter_companies_to_follow(args.max_attempts)
+        first_company = next(companies, None)
+        if first_company is None:
+            prospection_db.close()
+            raise SystemExit(f"Database '{args.queue_db}' does not contain any company left to follow.")
+        entries = (QueueEntry(company.link, company_id=company.id) for company in chain([first_company], companies))
+    elif args.queue_file:
+        queue = JournaledQueue(args.queue_file)
+        if not queue.has_pending():
+            raise SystemExit(f"Queue file '{args.queue_file}' does not contain any URLs.")
+        entries = queue.pending()
     else:
-        queue_urls = None
         urls = parse_urls(args)
+        entries = (QueueEntry(url) for url in urls)
 
-    quota_tracker = DailyQuotaTracker()
+    quota_ledger = QuotaLedger(args.quota_file)
 
     if args.daily_limit > 0:
-        allowed = quota_tracker.remaining(args.daily_limit)
+        allowed = quota_ledger.remaining(args.daily_limit)
         if allowed <= 0:
-            print(f"Daily limit of {args.daily_limit} URLs already reached today. Add new URLs tomorrow.")
+            quota_ledger.close()
+            print_notice(f"Daily limit of {args.daily_limit} URLs already reached today. Add new URLs tomorrow.",
+                         args.output_format)
             return 0
-        if len(urls) > allowed:
-            print(f"Daily limit allows processing {allowed} more URLs today; remaining entries stay in the queue.")
-            if args.queue_file and queue_urls is not None:
-                urls = queue_urls[:allowed]
-            else:
-                urls = urls[:allowed]
+        # only read one entry past the allowance to know whether some stay in the queue
+        allowed_entries = list(islice(entries, allowed + 1))
+        if len(allowed_entries) > allowed:
+            print_notice(f"Daily limit allows processing {allowed} more URLs today; remaining entries stay in the queue.",
+                         args.output_format)
+            allowed_entries = allowed_entries[:allowed]
+        entries = iter(allowed_entries)
 
     result_store = ResultStore()
-    server = start_result_server(result_store)
-    server.page_duration = max(float(args.page_duration), 0.0)
-    port = server.server_address[1]
-
-    results: List[FollowResult] = []
-    task_url_map: dict[str, str] = {}
+    server = start_result_server(result_store, page_duration=max(float(args.page_duration), 0.0), port=args.port)
+    port = server.port
+    print(f"Metrics served on http://127.0.0.1:{port}/metrics", file=sys.stderr)
+
+    summary = ResultSummary()
+    results_total = server.metrics.counter(
+        "prospection_results_total", "Results recorded, per status and reason", ("status", "reason"),
+        max_series=MAX_RESULT_SERIES)
+    launch_to_report = server.metrics.histogram(
+        "prospection_launch_to_report_seconds", "Time from opening a tab to the report of its result",
+        LAUNCH_TO_REPORT_BUCKETS)
+    queue_depth = server.metrics.gauge("prospection_queue_depth", "URLs left in the queue")
+    quota_remaining = server.metrics.gauge("prospection_quota_remaining", "Launches still allowed today")
+
+    # counted once, then decremented as entries leave the queue, instead of reading the queue after each result
+    if prospection_db is not None:
+        queue_depth.set(prospection_db.count_companies_to_follow(args.max_attempts))
+    elif queue is not None:
+        queue_depth.set(queue.pending_count())
+    else:
+        queue_depth.set(len(urls))
+
+    def in_queue(entry: QueueEntry) -> bool:
+        # a company of the database stays to follow until it is added or failed max_attempts times
+        return (prospection_db is not None and entry.company_id is not None
+                and prospection_db.is_company_to_follow(entry.company_id, args.max_attempts))
+
+    def update_gauges(left: int = 0) -> None:
+        # read from this thread, the ledger and the queue aren't shared with the server
+        quota_remaining.set(quota_ledger.remaining(args.daily_limit))
+        if left:
+            queue_depth.dec(left)
+
+    result_sink = open_result_sinks(args)
+    launched = False
+
+    def record(entry: QueueEntry, task_id: str, follow_result: FollowResult) -> None:
+        result_sink.write(follow_result)
+        summary.add(follow_result)
+        results_total.inc(status=follow_result.status, reason=follow_result.reason or "")
+        if prospection_db is not None:
+            prospection_db.record_follow_result(_follow_result_row(task_id, entry, follow_result))
+        if queue is not None:
+            queue.consume(entry)
+        update_gauges(0 if in_queue(entry) else 1)
+
+    # task_id -> (entry, timeout error) of the tasks whose report may still come
+    timed_out: dict[str, tuple[QueueEntry, FollowResult]] = {}
+
+    def reconcile() -> None:
+        for task_id, (entry, previous) in list(timed_out.items()):
+            payload = result_store.claim(task_id)
+            if payload is None:
+                continue
+            del timed_out[task_id]
+            follow_result = _follow_result_from_payload(previous.url, payload)
+            result_sink.write(follow_result)
+            summary.replace(previous, follow_result)
+            results_total.inc(status=follow_result.status, reason=follow_result.reason or "")
+            if prospection_db is not None:
+                was_in_queue = in_queue(entry)
+                # same task_id, replaces the timeout error
+                prospection_db.record_follow_result(_follow_result_row(task_id, entry, follow_result))
+                queue_depth.inc(in_queue(entry) - was_in_queue)
 
     try:
-        for index, url in enumerate(urls, start=1):
+        update_gauges()
+        for entry in entries:
+            url = entry.url
+            task_id = uuid.uuid4().hex
             try:
                 normalised_url = normalise_company_url(url)
             except ValueError as exc:
-                follow_result = FollowResult(url=url, status="error", reason=str(exc))
-                results.append(follow_result)
-                if args.queue_output:
-                    append_incremental_result(args.queue_output, follow_result)
+                record(entry, task_id, FollowResult(url=url, status="error", reason=str(exc)))
                 continue
 
-            task_id = uuid.uuid4().hex
-            task_url_map[task_id] = normalised_url
+            if launched and args.delay_between > 0:
+                time.sleep(args.delay_between)
+            # checked right before the launch, other runs may have used the quota in the meantime
+            if not quota_ledger.acquire(args.daily_limit):
+                print_notice(f"Daily limit of {args.daily_limit} URLs reached; remaining entries stay in the queue.",
+                             args.output_format)
+                break
+            launched = True
+
             launcher_url = (
                 f"http://127.0.0.1:{port}/launch?"
                 f"task_id={task_id}&url={quote(normalised_url, safe='')}&duration={args.page_duration}"
             )
+            # registered first, the extension may report before wait_for is reached
+            result_store.register(task_id)
+            launched_at = time.monotonic()
             webbrowser.open_new_tab(launcher_url)
 
             payload = result_store.wait_for(task_id, args.callback_timeout)
+            if payload is not None:
+                launch_to_report.observe(time.monotonic() - launched_at)
+            follow_result = _follow_result_from_payload(normalised_url, payload)
+            record(entry, task_id, follow_result)
             if payload is None:
-                follow_result = FollowResult(
-                    url=normalised_url,
-                    status="error",
-                    reason="Chrome extension did not report a result within the timeout window.",
-                )
-            else:
-                reason = payload.get("reason") or None
-                follow_result = FollowResult(
-                    url=normalised_url,
-                    status=str(payload.get("status", "error")),
-                    reason=reason if reason else None,
-                )
-
-            results.append(follow_result)
-
-            if args.queue_output:
-                append_incremental_result(args.queue_output, follow_result)
-
-            quota_tracker.record(args.daily_limit)
-
-            if args.queue_file and queue_urls is not None:
-                remaining = queue_urls[index:]
-                write_queue_file(args.queue_file, remaining)
-
-            if index < len(urls) and args.delay_between > 0:
-                time.sleep(args.delay_between)
-    finally:
-        server.shutdown()
-        server.server_close()
+                timed_out[task_id] = (entry, follow_result)
+            reconcile()
 
-    render_results(results, args.output_format, args.output_path)
-    return compute_exit_code(results)
+        deadline = time.monotonic() + max(args.reconcile_grace, 0)
+        while timed_out and time.monotonic() < deadline:
+            time.sleep(min(RECONCILE_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+            reconcile()
+    finally:
+        server.close()
+        result_sink.close()
+        quota_ledger.close()
+        if queue is not None:
+            queue.compact()
+        if prospection_db is not None:
+            prospection_db.close()
+
+    print_summary(summary, args.output_format)
+    return summary.exit_code()
 
 
 if __name__ == "__main__":
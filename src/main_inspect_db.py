@@ -64,7 +64,7 @@ def display_sample_data(nb_companies: int = 5, nb_employees: int = 5):
     db = ProspectionDB(prospection_db_name)
     
     print_separator("SAMPLE DATA - COMPANIES NOT ADDED")
-    companies = db.get_all_companies_not_added()[:nb_companies]
+    companies = list(db.iter_companies_not_added(limit=nb_companies))
     if companies:
         for i, company in enumerate(companies, 1):
             print(f"{i:2d}. {company.name[:50]:<50} | {company.link}")
@@ -72,7 +72,7 @@ def display_sample_data(nb_companies: int = 5, nb_employees: int = 5):
         print("No companies remaining to add.")
     
     print_separator("SAMPLE DATA - EMPLOYEES NOT ADDED")
-    employees = db.get_all_employees_not_added()[:nb_employees]
+    employees = list(db.iter_employees_not_added(limit=nb_employees))
     if employees:
         for i, employee in enumerate(employees, 1):
             company_name = employee.company.name[:30] if employee.company.name else "Unknown"
@@ -86,7 +86,8 @@ def display_recently_added(nb_companies: int = 5, nb_employees: int = 5):
     db = ProspectionDB(prospection_db_name)
     
     print_separator("RECENTLY ADDED - COMPANIES")
-    added_companies = db.get_all_companies_added()[-nb_companies:] if db.get_all_companies_added() else []
+    # most recent first from the index, then back to chronological order
+    added_companies = list(db.iter_companies_added(limit=nb_companies, order='desc'))[::-1]
     if added_companies:
         for i, company in enumerate(added_companies, 1):
             print(f"{i:2d}. {company.name[:50]:<50} | {company.link}")
@@ -94,7 +95,7 @@ def display_recently_added(nb_companies: int = 5, nb_employees: int = 5):
         print("No companies have been added yet.")
     
     print_separator("RECENTLY ADDED - EMPLOYEES")
-    added_employees = db.get_all_employees_added()[-nb_employees:] if db.get_all_employees_added() else []
+    added_employees = list(db.iter_employees_added(limit=nb_employees, order='desc'))[::-1]
     if added_employees:
         for i, employee in enumerate(added_employees, 1):
             company_name = employee.company.name[:30] if employee.company.name else "Unknown"
@@ -103,10 +104,32 @@ def display_recently_added(nb_companies: int = 5, nb_employees: int = 5):
     else:
         print("No employees have been added yet.")
 
+def display_follow_results(nb_errors: int = 5):
+    """Display the outcome of the follow attempts made with the follow CLI in --queue-db mode"""
+    db = ProspectionDB(prospection_db_name)
+
+    print_separator("FOLLOW RESULTS")
+    follow_stats = db.get_follow_stats()
+    if not follow_stats:
+        print("No follow attempts recorded yet.")
+        return
+    total_attempts = sum(follow_stats.values())
+    print(f"{'Status':<20} {'Count':<10} {'Percentage':<12}")
+    print("-" * 42)
+    for status, count in follow_stats.items():
+        print(f"{status:<20} {count:<10} {count / total_attempts * 100:<11.1f}%")
+
+    errors = list(db.iter_follow_results(limit=nb_errors, status='error'))
+    if errors:
+        print("\nLatest errors:")
+        for i, result in enumerate(errors, 1):
+            print(f"{i:2d}. {result.reported_at} | {result.url}")
+            print(f"    Reason: {result.reason or 'Unknown'}")
+
 def update_companies_already_added(nb_companies: int):
     """Update specified number of companies as added (for testing purposes)"""
     db = ProspectionDB(prospection_db_name)
-    companies = db.get_all_companies_not_added()[:nb_companies]
+    companies = list(db.iter_companies_not_added(limit=nb_companies))
     
     print(f"\nMarking {len(companies)} companies as added:")
     for company in companies:
@@ -118,12 +141,17 @@ def update_companies_already_added(nb_companies: int):
 
 def main():
     """Main function to display all statistics and information"""
+    # upgrade older database files so the listings below can use the indexes
+    with ProspectionDB(prospection_db_name) as db:
+        db.migrate()
     display_comprehensive_stats()
     print_separator()
     display_sample_data()
     print_separator()
     display_recently_added()
     print_separator()
+    display_follow_results()
+    print_separator()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,172 @@
+"""Counters, gauges and histograms rendered in the Prometheus text format.
+
+A small registry, enough for the ``/metrics`` endpoint of the callback server
+without depending on prometheus_client.  Metrics are updated from any thread;
+values only known at scrape time come from a function set on the metric.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Callable, Iterator, Optional, Sequence, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# label value standing for the series past max_series
+OVERFLOW_LABEL = "other"
+
+LabelValues = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str, quotes: bool = True) -> str:
+    """Escaped label value, or help text without quotes"""
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quotes else value
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 max_series: Optional[int] = None) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        # beyond this many label sets, new ones are counted under OVERFLOW_LABEL
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._values: dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], Union[float, dict[LabelValues, float]]]] = None
+
+    def set_function(self, function: Callable[[], Union[float, dict[LabelValues, float]]]) -> None:
+        """Read the value at scrape time instead, a dict of label values -> value for labelled metrics"""
+        self._function = function
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects the labels {self.labelnames}, got {tuple(labels)}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        if self.max_series is not None and key not in self._values and len(self._values) >= self.max_series:
+            key = (OVERFLOW_LABEL,) * len(key)
+        return key
+
+    def _current(self) -> dict[LabelValues, float]:
+        if self._function is None:
+            with self._lock:
+                return dict(self._values)
+        value = self._function()
+        return value if isinstance(value, dict) else {(): value}
+
+    def samples(self) -> Iterator[Sample]:
+        for key, value in sorted(self._current().items()):
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        with self._lock:
+            key = self._key(labels)
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], labelnames: Sequence[str] = (),
+                 max_series: Optional[int] = None) -> None:
+        super().__init__(name, help_text, labelnames, max_series)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (count per bucket, +Inf included, sum)
+        self._histograms: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._values.setdefault(key, 0)  # only tracks the series, for max_series
+            counts, total = self._histograms.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))] += 1
+            self._histograms[key] = (counts, total + value)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            histograms = {key: (list(counts), total) for key, (counts, total) in self._histograms.items()}
+        for key, (counts, total) in sorted(histograms.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = (), **kwargs) -> Counter:
+        return self.register(Counter(name, help_text, labelnames, **kwargs))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (), **kwargs) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames, **kwargs))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float], labelnames: Sequence[str] = (),
+                  **kwargs) -> Histogram:
+        return self.register(Histogram(name, help_text, buckets, labelnames, **kwargs))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.help, quotes=False)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
@@ -1,72 +1,236 @@
 from abc import ABC, abstractmethod
+import logging
 import sqlite3
+import time
 import webbrowser
+from typing import Optional
 
-from src.csv_parser import Company, ProspectParser
+from src.csv_parser import Company, Employee, ProspectParser, RecordColumns
+from src.db_prospection import ProspectionDB
 
 unknown_company = Company(name='unknown', link='')
 
+
+class RecordBatch:
+    """One batch of parsed records, shared by all the visitors of a pipeline.
+
+    Holds RecordColumns or records, and builds the other representation on first use
+    only, so a batch is materialized once whatever the number of visitors reading it.
+    """
+
+    def __init__(self, columns: Optional[RecordColumns] = None, companies: Optional[list[Company]] = None,
+                 employees: Optional[list[Employee]] = None, pool: Optional[dict[str, Company]] = None):
+        self._columns = columns
+        self._companies = companies
+        self._employees = employees
+        self._pool = pool
+
+    @property
+    def columns(self) -> RecordColumns:
+        if self._columns is None:
+            self._columns = RecordColumns.from_records(self._companies, self._employees)
+        return self._columns
+
+    @property
+    def companies(self) -> list[Company]:
+        if self._companies is None:
+            self._companies, self._employees = self._columns.to_records(self._pool)
+        return self._companies
+
+    @property
+    def employees(self) -> list[Employee]:
+        if self._employees is None:
+            self._companies, self._employees = self._columns.to_records(self._pool)
+        return self._employees
+
+
+def iter_record_batches(element: ProspectParser):
+    """Batches of a parser : chunk by chunk when it streams, all its records at once otherwise"""
+    if element.chunksize:
+        pool: dict[str, Company] = {}
+        for columns in element.iter_columns():
+            yield RecordBatch(columns, pool=pool)
+    elif element.records_built:
+        yield RecordBatch(companies=element.get_companies(), employees=element.get_user_profiles())
+    else:
+        # one read, the records are only built if a visitor asks for them
+        yield RecordBatch(element.read_columns(), pool={})
+
+
 class PropectVisitor(ABC):
-    @abstractmethod
+    """Receives the records of a parser batch by batch.
+
+    begin() is called before the first batch, flush() after each batch and close() once
+    at the end, with failed set when a batch could not be processed. visit() runs the
+    visitor alone over a parser, use VisitorPipeline to feed several of them in one pass.
+    """
+
     def visit(self, element: ProspectParser):
+        VisitorPipeline([self]).visit(element)
+
+    def begin(self, element: ProspectParser):
         pass
 
+    @abstractmethod
+    def visit_batch(self, batch: RecordBatch):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self, failed: bool = False):
+        pass
+
+
+class VisitorPipeline(PropectVisitor):
+    """Streams the records of a parser once through any number of visitors."""
+
+    def __init__(self, visitors: list[PropectVisitor]):
+        self.visitors = list(visitors)
 
-class SysoutVisitor(PropectVisitor):
     def visit(self, element: ProspectParser):
-        companies = element.get_companies()
-        employees = element.get_user_profiles()
+        self.begin(element)
+        failed = True
+        try:
+            for batch in iter_record_batches(element):
+                self.visit_batch(batch)
+                self.flush()
+            failed = False
+        finally:
+            self.close(failed)
+
+    def begin(self, element: ProspectParser):
+        for visitor in self.visitors:
+            visitor.begin(element)
+
+    def visit_batch(self, batch: RecordBatch):
+        for visitor in self.visitors:
+            visitor.visit_batch(batch)
 
+    def flush(self):
+        for visitor in self.visitors:
+            visitor.flush()
+
+    def close(self, failed: bool = False):
+        # every visitor is closed, even when one of them fails to
+        error = None
+        for visitor in self.visitors:
+            try:
+                visitor.close(failed)
+            except Exception as exc:
+                error = error or exc
+        if error is not None:
+            raise error
+
+
+class SysoutVisitor(PropectVisitor):
+    def visit_batch(self, batch: RecordBatch):
         print("Companies:")
-        for company in companies:
+        for company in batch.companies:
             print(f"Name: {company.name}, Link: {company.link}")
 
         print("\nEmployees:")
-        for employee in employees:
+        for employee in batch.employees:
             print(f"Link: {employee.link}, Company: {employee.company.name}")
 
+
+class LoggingVisitor(PropectVisitor):
+    """Logs how many companies and employees went through the pipeline, from the batch sizes only."""
+
+    def __init__(self, description: str):
+        self.description = description
+        self.companies = 0
+        self.employees = 0
+
+    def begin(self, element: ProspectParser):
+        self.companies = self.employees = 0
+
+    def visit_batch(self, batch: RecordBatch):
+        self.companies += batch.columns.listed_companies
+        self.employees += len(batch.columns.employee_links)
+
+    def close(self, failed: bool = False):
+        status = "failed" if failed else "done"
+        logging.info(f"{self.description}: {self.companies} companies, {self.employees} employees - {status}")
+
+
 class SQLLiteSaveVisitor(PropectVisitor):
 
     def __init__(self, db_path: str, has_been_added: bool):
-        import sqlite3
         self.db_path = db_path
         self.has_been_added = has_been_added
-
+        self.con: Optional[sqlite3.Connection] = None
+        self.cur: Optional[sqlite3.Cursor] = None
 
     def visit(self, element: ProspectParser):
-        # Implement the logic to save the parsed data to the database
-        companies = element.get_companies() + [unknown_company]
-        employees = element.get_user_profiles()
-
-        con = sqlite3.connect(self.db_path, timeout=5.0)
-        cur = con.cursor()
-
         try:
-            # Batch company records insertion
-            cur.executemany('''INSERT INTO company (company_name, company_link, is_added) VALUES (?, ?, ?) ON CONFLICT DO NOTHING''',
-                                    [(company.name, company.link, self.has_been_added) for company in companies])
-
-            # retrieve the company ids and company name
-            lower_company_names = [employee.company.name.lower() for employee in employees]
-            placeholders = ','.join(['?'] * len(lower_company_names))
-            query = f'''SELECT rowid, company_name FROM company WHERE lower(company_name) IN ({placeholders})'''
-            cur.execute(query, lower_company_names)
-
-            company_ids = cur.fetchall()
-            company_id_map = {name: rowid for rowid, name in company_ids}
-#
-            # Batch employee records insertion
-            cur.executemany('''INSERT INTO employee (employee_link, company_id, is_added) VALUES (?, ?, ?) ON CONFLICT DO NOTHING''',
-                                    [(employee.link, company_id_map.get(employee.company.name, None), self.has_been_added) for employee in employees])
-
-            # Commit the changes
-            con.commit()
+            super().visit(element)
         except sqlite3.Error as e:
             print(f"SQLite error: {e}")
+
+    def begin(self, element: ProspectParser):
+        self.con = ProspectionDB(self.db_path).connect()
+        self.cur = self.con.cursor()
+        self.create_staging_tables(self.cur)
+        self.save_batch(self.cur, [unknown_company], [])
+
+    def visit_batch(self, batch: RecordBatch):
+        self.save_columns(self.cur, batch.columns)
+
+    def flush(self):
+        # one transaction per batch, only one batch is held in memory when the parser streams
+        self.con.commit()
+
+    def close(self, failed: bool = False):
+        if self.con is None:
+            return
+        try:
+            if failed:
+                self.con.rollback()
+            else:
+                self.con.commit()
         finally:
-            cur.close()
-            con.close()
+            self.cur.close()
+            self.con.close()
+            self.con = self.cur = None
+
+    def create_staging_tables(self, cur):
+        # temp tables only live in this connection, rows are loaded with executemany so the
+        # number of records is never limited by the max number of sql variables
+        cur.execute('''CREATE TEMP TABLE IF NOT EXISTS staging_company
+                       (company_name TEXT, company_link TEXT, company_key TEXT)''')
+        cur.execute('''CREATE TEMP TABLE IF NOT EXISTS staging_employee
+                       (employee_link TEXT, employee_key TEXT, company_name TEXT, company_link TEXT, company_key TEXT)''')
+
+    def save_batch(self, cur, companies: list[Company], employees: list[Employee]):
+        self.save_columns(cur, RecordColumns.from_records(companies, employees))
 
+    def save_columns(self, cur, columns: RecordColumns):
+        cur.execute('''DELETE FROM staging_company''')
+        cur.execute('''DELETE FROM staging_employee''')
+
+        cur.executemany('''INSERT INTO staging_company (company_name, company_link, company_key) VALUES (?, ?, ?)''',
+                        columns.company_rows())
+        cur.executemany('''INSERT INTO staging_employee (employee_link, employee_key, company_name, company_link, company_key)
+                           VALUES (?, ?, ?, ?, ?)''',
+                        columns.employee_rows())
+
+        # "WHERE true" lets sqlite parse the upsert clause after a SELECT.
+        # The unique company_key makes a company already imported by another provider, spelled differently, a conflict
+        cur.execute('''INSERT INTO company (company_name, company_link, company_key, is_added)
+                       SELECT company_name, company_link, company_key, ? FROM staging_company WHERE true
+                       ON CONFLICT DO NOTHING''', (self.has_been_added,))
+
+        # link each employee to its company by canonical key first, then by link, then by case-insensitive name.
+        # All lookups are index searches (idx_company_key, company_link UNIQUE, idx_company_lower_name)
+        cur.execute('''INSERT INTO employee (employee_link, employee_key, company_id, is_added)
+                       SELECT s.employee_link, s.employee_key,
+                              coalesce((SELECT c.rowid FROM company c WHERE c.company_key = s.company_key),
+                                       (SELECT c.rowid FROM company c WHERE c.company_link = s.company_link),
+                                       (SELECT min(c.rowid) FROM company c WHERE lower(c.company_name) = lower(s.company_name))),
+                              ?
+                       FROM staging_employee s WHERE true
+                       ON CONFLICT DO NOTHING''', (self.has_been_added,))
 
 
 class OpenBrowserVisitor(PropectVisitor):
@@ -74,23 +238,30 @@ class OpenBrowserVisitor(PropectVisitor):
     def __init__(self, chunk_size: int = 5, delay: int = 15):
         self.chunk_size = chunk_size
         self.delay = delay
+        self._pending: list[str] = []
 
-    def visit(self, element: ProspectParser):
-        companies = element.get_companies()
-        employees = element.get_user_profiles()
+    def begin(self, element: ProspectParser):
+        self._pending = []
+
+    def visit_batch(self, batch: RecordBatch):
+        self._pending += [company.link for company in batch.companies] + [employee.link for employee in batch.employees]
+        # full chunks are opened as soon as they are available, the rest waits for the next batch
+        full = len(self._pending) - len(self._pending) % self.chunk_size
+        self.open_urls_in_browser(list(self.chunk_list(self._pending[:full], self.chunk_size)), self.delay)
+        self._pending = self._pending[full:]
 
-        all_links = [company.link for company in companies] + [employee.link for employee in employees]
-        chunked_list = list(self.chunk_list(all_links, self.chunk_size))
-        self.open_urls_in_browser(chunked_list, self.delay)
+    def close(self, failed: bool = False):
+        if self._pending and not failed:
+            self.open_urls_in_browser([self._pending], self.delay)
+        self._pending = []
 
     def chunk_list(self, lst, size):
         """Yield successive n-sized chunks from lst."""
         for i in range(0, len(lst), size):
             yield lst[i:i + size]
 
-    def open_urls_in_browser(chunks: list[list[str]], delay: int = 5):
+    def open_urls_in_browser(self, chunks: list[list[str]], delay: int = 5):
         for chunk in chunks:
             for url in chunk:
                 webbrowser.open(url)
             time.sleep(delay)
-
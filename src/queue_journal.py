@@ -0,0 +1,128 @@
+"""Plain text queue file consumed through a sidecar journal.
+
+The queue stays a file with one URL per line that can be edited or appended to by
+hand.  Instead of rewriting the remaining lines after every processed URL, the
+byte offset reached in the queue is appended to ``<queue>.journal``; the next run
+resumes from the last offset and reads the queue lazily from there.  Consumed
+lines are dropped from the queue once per run by :meth:`JournaledQueue.compact`,
+which writes the pending lines to a temporary file and renames it over the queue,
+so a crash leaves either the old or the new queue, never a truncated one.
+
+The journal starts with the inode of the queue it describes and every entry
+carries the consumed URL.  A journal whose inode or last URL no longer matches
+the queue (compacted, or rewritten by hand) is stale and ignored.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_HEADER = "queue-journal 1"
+
+
+@dataclass(frozen=True)
+class QueueEntry:
+    url: str
+    # byte offset just after the line of this URL, None when it doesn't come from a queue file
+    end_offset: Optional[int] = None
+    # row of the company when the queue is the prospection database
+    company_id: Optional[int] = None
+
+
+class JournaledQueue:
+    def __init__(self, queue_file: str) -> None:
+        self.path = Path(queue_file)
+        self.journal_path = Path(f"{queue_file}{JOURNAL_SUFFIX}")
+        if not self.path.exists():
+            raise SystemExit(f"Queue file '{queue_file}' does not exist.")
+        self.offset = self._load_offset()
+        self._journal = None
+
+    def _load_offset(self) -> int:
+        """Offset recorded by the last valid journal entry, 0 when there is no usable journal"""
+        try:
+            lines = self.journal_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return 0
+        if not lines or lines[0] != f"{JOURNAL_HEADER} {os.stat(self.path).st_ino}":
+            return 0
+
+        offset, url = 0, None
+        for line in lines[1:]:
+            recorded_offset, _, recorded_url = line.partition("\t")
+            if not recorded_offset.isdigit() or not recorded_url:
+                break  # torn write of the last entry
+            offset, url = int(recorded_offset), recorded_url
+        if url is not None and self._url_ending_at(offset) != url:
+            return 0
+        return offset
+
+    def _url_ending_at(self, offset: int) -> Optional[str]:
+        """The last non blank line before offset"""
+        with self.path.open("rb") as handle:
+            start = max(0, offset - 64 * 1024)
+            handle.seek(start)
+            lines = handle.read(offset - start).splitlines()
+        for line in reversed(lines):
+            if line.strip():
+                return line.decode("utf-8").strip()
+        return None
+
+    def pending(self) -> Iterator[QueueEntry]:
+        """URLs not consumed yet, read lazily from the journal offset"""
+        with self.path.open("rb") as handle:
+            handle.seek(self.offset)
+            for line in iter(handle.readline, b""):
+                url = line.decode("utf-8").strip()
+                if url:
+                    yield QueueEntry(url, handle.tell())
+
+    def pending_count(self) -> int:
+        return sum(1 for _entry in self.pending())
+
+    def has_pending(self) -> bool:
+        return next(self.pending(), None) is not None
+
+    def consume(self, entry: QueueEntry) -> None:
+        """Record that entry, and every entry before it, has been processed"""
+        if self._journal is None:
+            exists = self.journal_path.exists() and self.offset > 0
+            self._journal = self.journal_path.open("a" if exists else "w", encoding="utf-8")
+            if not exists:
+                self._journal.write(f"{JOURNAL_HEADER} {os.stat(self.path).st_ino}\n")
+        self._journal.write(f"{entry.end_offset}\t{entry.url}\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self.offset = entry.end_offset
+
+    def close(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def compact(self) -> None:
+        """Drop the consumed lines from the queue file and remove the journal"""
+        self.close()
+        if self.offset == 0:
+            return
+        descriptor, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as temp, self.path.open("rb") as queue:
+                queue.seek(self.offset)
+                for line in iter(queue.readline, b""):
+                    if line.strip():
+                        temp.write(line if line.endswith(b"\n") else line + b"\n")
+                temp.flush()
+                os.fsync(temp.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        # the renamed queue has a new inode, a journal left behind by a crash here is ignored
+        self.journal_path.unlink(missing_ok=True)
+        self.offset = 0
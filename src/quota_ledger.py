@@ -0,0 +1,139 @@
+"""Daily quota of URL launches shared by every follow CLI running under the same profile.
+
+The counts live in a small SQLite file with one row per day.  A process doesn't
+write every launch: it reserves a lease of up to ``lease_size`` launches in one
+transaction, hands them out from memory, and writes how many it really used when
+it takes the next lease or closes.  The reservation checks the limit under the
+write lock, so concurrent runs never go past it together.  Leases left unused by
+a crash are lost for the day, which errs on the side of the limit.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+DEFAULT_LEDGER_PATH = Path.home() / ".prospection_daily_quota.db"
+# the JSON file of the previous tracker, its count of today is imported when the ledger is created
+LEGACY_JSON_PATH = Path.home() / ".prospection_daily_quota.json"
+DEFAULT_LEASE_SIZE = 10
+
+
+def _local_today() -> date:
+    return datetime.now().astimezone().date()
+
+
+class QuotaLedger:
+    def __init__(self, path: Optional[str] = None, lease_size: int = DEFAULT_LEASE_SIZE,
+                 today: Callable[[], date] = _local_today, legacy_path: Optional[Path] = None) -> None:
+        if lease_size <= 0:
+            raise ValueError("lease_size must be positive")
+        self.path = Path(path) if path else DEFAULT_LEDGER_PATH
+        self.lease_size = lease_size
+        self._today = today
+        self._con: Optional[sqlite3.Connection] = None
+        # only the default ledger takes over the count of the previous tracker
+        self._legacy_path = legacy_path or (None if path else LEGACY_JSON_PATH)
+        # launches reserved and used from the current lease, and the day it belongs to
+        self._lease_day: Optional[str] = None
+        self._leased = 0
+        self._used = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._con is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # transactions are opened explicitly with BEGIN IMMEDIATE
+            self._con = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._con.execute('''CREATE TABLE IF NOT EXISTS quota_day
+                                 (day TEXT PRIMARY KEY, used INTEGER NOT NULL DEFAULT 0,
+                                 reserved INTEGER NOT NULL DEFAULT 0, updated_at TEXT NOT NULL)''')
+            self._import_legacy_json()
+        return self._con
+
+    def _import_legacy_json(self) -> None:
+        if self._legacy_path is None or not self._legacy_path.exists():
+            return
+        try:
+            payload = json.loads(self._legacy_path.read_text(encoding="utf-8"))
+            day, count = str(payload["date"]), int(payload.get("count", 0))
+        except (OSError, ValueError, KeyError, TypeError):
+            return  # unreadable, it only gave a starting count anyway
+        if day == self._today().isoformat():
+            self._con.execute('''INSERT INTO quota_day (day, used, reserved, updated_at)
+                                 VALUES (?, ?, ?, datetime('now')) ON CONFLICT DO NOTHING''', (day, count, count))
+
+    def remaining(self, limit: int) -> float:
+        """Launches still allowed today, across all processes"""
+        if limit <= 0:
+            return float("inf")
+        day = self._today().isoformat()
+        row = self._connection().execute('SELECT reserved FROM quota_day WHERE day = ?', (day,)).fetchone()
+        reserved = row[0] if row else 0
+        unused_lease = self._leased - self._used if self._lease_day == day else 0
+        return max(0, limit - reserved) + unused_lease
+
+    def acquire(self, limit: int) -> bool:
+        """Take one launch from today's quota, False when the limit is reached"""
+        if limit <= 0:
+            return True
+        day = self._today().isoformat()
+        if self._lease_day != day or self._used >= self._leased:
+            if not self._renew_lease(day, limit):
+                return False
+        self._used += 1
+        return True
+
+    def _renew_lease(self, day: str, limit: int) -> bool:
+        con = self._connection()
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            self._settle(con)
+            row = con.execute('SELECT reserved FROM quota_day WHERE day = ?', (day,)).fetchone()
+            lease = min(self.lease_size, limit - (row[0] if row else 0))
+            if lease > 0:
+                con.execute('''INSERT INTO quota_day (day, reserved, updated_at) VALUES (?, ?, datetime('now'))
+                               ON CONFLICT (day) DO UPDATE SET reserved = reserved + excluded.reserved,
+                               updated_at = excluded.updated_at''', (day, lease))
+            con.execute('COMMIT')
+        except BaseException:
+            con.execute('ROLLBACK')
+            raise
+        self._lease_day, self._leased, self._used = day, max(lease, 0), 0
+        return lease > 0
+
+    def _settle(self, con: sqlite3.Connection) -> None:
+        """Write the launches used from the current lease and give back the unused ones"""
+        if self._lease_day is None:
+            return
+        con.execute('''UPDATE quota_day SET used = used + ?, reserved = reserved - ?, updated_at = datetime('now')
+                       WHERE day = ?''', (self._used, self._leased - self._used, self._lease_day))
+        self._lease_day, self._leased, self._used = None, 0, 0
+
+    def close(self) -> None:
+        if self._con is None:
+            return
+        if self._lease_day is not None:
+            self._con.execute('BEGIN IMMEDIATE')
+            try:
+                self._settle(self._con)
+                self._con.execute('COMMIT')
+            except BaseException:
+                self._con.execute('ROLLBACK')
+                raise
+        self._con.close()
+        self._con = None
+
+    def history(self, days: Optional[int] = None) -> list[tuple[str, int]]:
+        """(day, launches used) of the most recent days first"""
+        rows = self._connection().execute('SELECT day, used FROM quota_day ORDER BY day DESC LIMIT ?',
+                                          (-1 if days is None else days,)).fetchall()
+        return [(day, used) for day, used in rows]
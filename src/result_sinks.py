@@ -0,0 +1,278 @@
+"""Destinations of the follow results, written as they arrive.
+
+Each sink keeps its file open for the whole run and flushes it according to a
+FlushPolicy, so a crash loses at most the results of one flush window.  The
+final summary comes from ResultSummary counters: no sink keeps the results.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Iterable, Optional, TextIO
+
+try:  # pragma: no cover - pyarrow is only needed for the parquet output
+    import pyarrow
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ModuleNotFoundError:  # pragma: no cover
+    PYARROW_AVAILABLE = False
+
+RESULT_FIELDS = ("timestamp", "url", "status", "reason")
+SINK_FORMATS = ("csv", "jsonl", "parquet")
+
+
+@dataclass
+class FollowResult:
+    url: str
+    status: str
+    reason: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        payload = {"url": self.url, "status": self.status}
+        if self.reason:
+            payload["reason"] = self.reason
+        return payload
+
+
+@dataclass(frozen=True)
+class FlushPolicy:
+    """Flush after `every` results, or once `interval` seconds passed since the last flush."""
+
+    every: int = 1
+    interval: Optional[float] = None
+
+
+class ResultSink(ABC):
+    """Base class of the sinks, subclasses implement _write and _flush."""
+
+    def __init__(self, policy: FlushPolicy = FlushPolicy()) -> None:
+        self.policy = policy
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, result: FollowResult) -> None:
+        self._write(result)
+        self._pending += 1
+        if self._pending >= self.policy.every or (
+                self.policy.interval is not None and time.monotonic() - self._last_flush >= self.policy.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        self._flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+
+    @abstractmethod
+    def _write(self, result: FollowResult) -> None:
+        pass
+
+    @abstractmethod
+    def _flush(self) -> None:
+        pass
+
+
+def _timestamp() -> str:
+    return datetime.now(UTC).isoformat(timespec="seconds")
+
+
+class _StreamSink(ResultSink):
+    """Sink writing text to a stream, closed with the sink when it opened it."""
+
+    def __init__(self, stream: TextIO, policy: FlushPolicy = FlushPolicy(), owns_stream: bool = False) -> None:
+        super().__init__(policy)
+        self.stream = stream
+        self._owns_stream = owns_stream
+
+    @classmethod
+    def append_to(cls, path: str, policy: FlushPolicy = FlushPolicy()):
+        destination = Path(path)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        return cls(destination.open("a", encoding="utf-8", newline=""), policy, owns_stream=True)
+
+    def _flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        super().close()
+        if self._owns_stream:
+            self.stream.close()
+
+
+class CsvResultSink(_StreamSink):
+    """timestamp,url,status,reason rows, the header written when the file is empty."""
+
+    def __init__(self, stream: TextIO, policy: FlushPolicy = FlushPolicy(), owns_stream: bool = False) -> None:
+        super().__init__(stream, policy, owns_stream)
+        self._writer = csv.writer(stream)
+        if not stream.tell():
+            self._writer.writerow(RESULT_FIELDS)
+
+    def _write(self, result: FollowResult) -> None:
+        self._writer.writerow((_timestamp(), result.url, result.status, result.reason or ""))
+
+
+class JsonlResultSink(_StreamSink):
+    """One JSON object per line."""
+
+    def _write(self, result: FollowResult) -> None:
+        self.stream.write(json.dumps({"timestamp": _timestamp(), **result.as_dict()}) + "\n")
+
+
+class ParquetResultSink(ResultSink):
+    """One row group per flush.  Parquet files can't be appended to: the file is
+    replaced on every run, and is only readable once the sink is closed."""
+
+    def __init__(self, path: str, policy: FlushPolicy = FlushPolicy(every=1000)) -> None:
+        if not PYARROW_AVAILABLE:
+            raise SystemExit("The parquet output needs pyarrow: pip install pyarrow")
+        super().__init__(policy)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._schema = pyarrow.schema([(field, pyarrow.string()) for field in RESULT_FIELDS])
+        self._writer = pyarrow.parquet.ParquetWriter(str(self.path), self._schema)
+        self._columns: dict[str, list] = {field: [] for field in RESULT_FIELDS}
+
+    def _write(self, result: FollowResult) -> None:
+        for field, value in zip(RESULT_FIELDS, (_timestamp(), result.url, result.status, result.reason)):
+            self._columns[field].append(value)
+
+    def _flush(self) -> None:
+        if self._columns["url"]:
+            self._writer.write_table(pyarrow.table(self._columns, schema=self._schema))
+            self._columns = {field: [] for field in RESULT_FIELDS}
+
+    def close(self) -> None:
+        super().close()
+        self._writer.close()
+
+
+def open_result_sink(path: str, sink_format: Optional[str] = None, policy: Optional[FlushPolicy] = None) -> ResultSink:
+    """Sink for path, in sink_format or else the format given by its extension (csv by default)"""
+    if sink_format is None:
+        suffix = Path(path).suffix.lower().lstrip(".")
+        sink_format = suffix if suffix in SINK_FORMATS else "csv"
+    if sink_format == "parquet":
+        return ParquetResultSink(path, policy) if policy else ParquetResultSink(path)
+    if sink_format not in SINK_FORMATS:
+        raise ValueError(f"Unknown result format '{sink_format}'")
+    sink_class = JsonlResultSink if sink_format == "jsonl" else CsvResultSink
+    return sink_class.append_to(path, policy or FlushPolicy())
+
+
+class TableResultSink(_StreamSink):
+    """The `url | status | reason` table printed by the CLI, one row per result."""
+
+    HEADER = f"{'URL':<80} | STATUS         | REASON"
+
+    def __init__(self, stream: TextIO, policy: FlushPolicy = FlushPolicy(), owns_stream: bool = False) -> None:
+        super().__init__(stream, policy, owns_stream)
+        self.stream.write(f"{self.HEADER}\n{'-' * len(self.HEADER)}\n")
+
+    def _write(self, result: FollowResult) -> None:
+        self.stream.write(f"{result.url:<80} | {result.status:<14} | {result.reason or ''}\n")
+
+
+class JsonArrayResultSink(_StreamSink):
+    """A JSON array streamed one element at a time, closed by close()."""
+
+    def __init__(self, stream: TextIO, policy: FlushPolicy = FlushPolicy(), owns_stream: bool = False) -> None:
+        super().__init__(stream, policy, owns_stream)
+        self.stream.write("[")
+        self._separator = "\n  "
+
+    def _write(self, result: FollowResult) -> None:
+        self.stream.write(self._separator + json.dumps(result.as_dict()))
+        self._separator = ",\n  "
+
+    def close(self) -> None:
+        self.stream.write("\n]\n" if self._separator != "\n  " else "]\n")
+        super().close()
+
+
+def open_output_sink(output_format: str, stream: TextIO, policy: FlushPolicy = FlushPolicy(),
+                     owns_stream: bool = False) -> ResultSink:
+    sink_class = JsonArrayResultSink if output_format == "json" else TableResultSink
+    return sink_class(stream, policy, owns_stream)
+
+
+class MultiResultSink(ResultSink):
+    """Writes every result to all of its sinks, closes all of them even if one fails."""
+
+    def __init__(self, sinks: Iterable[ResultSink]) -> None:
+        super().__init__()
+        self.sinks = list(sinks)
+
+    def write(self, result: FollowResult) -> None:
+        # each sink flushes according to its own policy
+        self._write(result)
+
+    def _write(self, result: FollowResult) -> None:
+        for sink in self.sinks:
+            sink.write(result)
+
+    def _flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        error = None
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as exc:  # closing the others first
+                error = error or exc
+        if error is not None:
+            raise error
+
+
+class ResultSummary:
+    """Running counts of the results per status."""
+
+    def __init__(self) -> None:
+        self.statuses: Counter = Counter()
+
+    def add(self, result: FollowResult) -> None:
+        self.statuses[result.status] += 1
+
+    def replace(self, previous: FollowResult, result: FollowResult) -> None:
+        """Count result instead of previous, already added"""
+        self.statuses[previous.status] -= 1
+        self.statuses += Counter()  # drops the statuses left at 0
+        self.add(result)
+
+    @property
+    def total(self) -> int:
+        return sum(self.statuses.values())
+
+    @property
+    def errors(self) -> int:
+        return self.statuses["error"]
+
+    def render(self) -> str:
+        counts = ", ".join(f"{count} {status}" for status, count in sorted(self.statuses.items()))
+        return f"Processed {self.total} URLs" + (f": {counts}" if counts else ".")
+
+    def exit_code(self) -> int:
+        return 1 if self.errors else 0
+
+
+def print_summary(summary: ResultSummary, output_format: str) -> None:
+    # stdout stays a valid JSON document in json format
+    print(summary.render(), file=sys.stderr if output_format == "json" else sys.stdout)
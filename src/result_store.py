@@ -0,0 +1,139 @@
+"""Results reported by the Chrome extension, handed to the task waiting for them.
+
+Every launched task gets its own future when it is registered, so a report only
+wakes the waiter of its task, from a thread (wait_for) or from a coroutine
+(wait_for_async).  Reports nobody waits for anymore (late, after the timeout of
+their task) or never registered (unknown) are kept for ``ttl`` seconds, in case
+a reconciliation claims them, then evicted.  Counters record all of these.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+
+DEFAULT_UNCLAIMED_TTL = 600.0
+# unclaimed reports kept at most, the oldest are evicted first
+DEFAULT_MAX_UNCLAIMED = 10_000
+
+
+class ResultStore:
+    """Thread-safe registry of the tasks waiting for a report."""
+
+    def __init__(self, ttl: float = DEFAULT_UNCLAIMED_TTL, max_unclaimed: int = DEFAULT_MAX_UNCLAIMED,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self.max_unclaimed = max_unclaimed
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending: dict[str, Future] = {}
+        # task_id -> (expiry, payload) of reports without waiter, oldest first
+        self._unclaimed: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        # task_id -> expiry of the tasks that timed out, to tell late reports from unknown ones
+        self._timed_out: OrderedDict[str, float] = OrderedDict()
+        self.counters: Counter = Counter()
+
+    def register(self, task_id: str) -> Future:
+        """Expect a report for task_id, to call before launching the task"""
+        with self._lock:
+            future = self._pending.get(task_id)
+            if future is None:
+                future = self._pending[task_id] = Future()
+                unclaimed = self._unclaimed.pop(task_id, None)
+                if unclaimed is not None:  # reported before being registered
+                    self.counters["delivered"] += 1
+                    future.set_result(unclaimed[1])
+            return future
+
+    def add_result(self, task_id: str, payload: dict) -> bool:
+        """Hand payload to the waiter of task_id, returns False when nobody waits for it"""
+        with self._lock:
+            self.counters["reported"] += 1
+            self._evict_expired()
+            future = self._pending.get(task_id)
+            if future is not None and future.done():
+                self.counters["duplicate"] += 1
+                return False
+            if future is None:
+                late = self._timed_out.pop(task_id, None) is not None
+                self.counters["late" if late else "unknown"] += 1
+                self._unclaimed[task_id] = (self._clock() + self.ttl, payload)
+                self._unclaimed.move_to_end(task_id)
+                while len(self._unclaimed) > self.max_unclaimed:
+                    self._unclaimed.popitem(last=False)
+                    self.counters["evicted"] += 1
+                return False
+            self.counters["delivered"] += 1
+            # only wakes the waiter of this future
+            future.set_result(payload)
+        return True
+
+    def claim(self, task_id: str) -> Optional[dict]:
+        """Take the unclaimed report of task_id, if it is still kept"""
+        with self._lock:
+            self._evict_expired()
+            unclaimed = self._unclaimed.pop(task_id, None)
+        return unclaimed[1] if unclaimed else None
+
+    def wait_for(self, task_id: str, timeout: float) -> Optional[dict]:
+        """Block until task_id is reported, None after timeout seconds"""
+        future = self.register(task_id)
+        try:
+            future.result(timeout=max(timeout, 0))
+        except FutureTimeoutError:
+            pass
+        return self._release(task_id, future)
+
+    async def wait_for_async(self, task_id: str, timeout: float) -> Optional[dict]:
+        """Same as wait_for without blocking the event loop"""
+        future = self.register(task_id)
+        try:
+            # shielded so that the timeout doesn't cancel the future a report may be setting
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), max(timeout, 0))
+        except asyncio.TimeoutError:
+            pass
+        return self._release(task_id, future)
+
+    def _release(self, task_id: str, future: Future) -> Optional[dict]:
+        """Forget a waited task, its payload if it was reported in time"""
+        with self._lock:
+            if self._pending.get(task_id) is future:
+                del self._pending[task_id]
+            if future.done():
+                return future.result()
+            self.counters["timeouts"] += 1
+            self._timed_out[task_id] = self._clock() + self.ttl
+            self._evict_expired()
+            future.cancel()
+        return None
+
+    def _evict_expired(self) -> None:
+        """Drop what outlived its ttl, called with the lock held"""
+        now = self._clock()
+        while self._unclaimed:
+            task_id, (expiry, _payload) = next(iter(self._unclaimed.items()))
+            if expiry > now:
+                break
+            del self._unclaimed[task_id]
+            self.counters["evicted"] += 1
+        while self._timed_out and next(iter(self._timed_out.values())) <= now:
+            self._timed_out.popitem(last=False)
+        while len(self._timed_out) > self.max_unclaimed:
+            self._timed_out.popitem(last=False)
+
+    def counters_snapshot(self) -> dict[str, int]:
+        """Copy of the counters, safe to read from another thread"""
+        with self._lock:
+            return dict(self.counters)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._pending)
+
+    @property
+    def unclaimed(self) -> int:
+        return len(self._unclaimed)
@@ -0,0 +1,68 @@
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from benchmarks import bench_callback_server, bench_csv_projection
+from benchmarks.generators import ExportShape, write_builtwith_csv, write_mantiks_csv
+from benchmarks.run_suite import main
+
+
+class GeneratorTests(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmpdir.name)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_exports_are_reproducible(self):
+        shape = ExportShape(200, extra_columns=3, duplicate_rate=0.2, employees_per_company=10, seed=7)
+        for writer in (write_mantiks_csv, write_builtwith_csv):
+            first, second = self.tmpdir / "first.csv", self.tmpdir / "second.csv"
+            writer(first, shape)
+            writer(second, shape)
+            self.assertEqual(first.read_bytes(), second.read_bytes())
+
+    def test_suite_writes_comparable_json(self):
+        baseline = self.tmpdir / "baseline.json"
+        args = ["--sizes", "100", "--repeat", "1", "--employees-per-company", "10"]
+        self.assertEqual(main(args + ["--output", str(baseline)]), 0)
+
+        report = json.loads(baseline.read_text(encoding="utf-8"))
+        cases = {result["case"] for result in report["results"]}
+        self.assertTrue({"parse.mantiks.records", "ingest.in_process", "stats.counters",
+                         "listing.employees_not_added", "update.bulk_companies"} <= cases)
+        self.assertEqual(report["meta"]["shape"]["seed"], 42)
+
+        # with a baseline 1000 times slower, no case is a regression
+        for result in report["results"]:
+            result["min_seconds"] *= 1000
+        baseline.write_text(json.dumps(report), encoding="utf-8")
+        self.assertEqual(main(args + ["--output", str(self.tmpdir / "new.json"), "--compare", str(baseline)]), 0)
+
+
+class CsvProjectionTests(unittest.TestCase):
+    def test_runs_on_a_generated_wide_export(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            bench_csv_projection.main(["--rows", "50", "--extra-columns", "20"])
+
+        self.assertIn("50 rows x 23 columns", output.getvalue())
+        self.assertIn("projected read (c)", output.getvalue())
+
+
+class CallbackServerLoadTests(unittest.TestCase):
+    def test_both_servers_answer_every_request(self):
+        with redirect_stdout(io.StringIO()):
+            results = bench_callback_server.main(["--clients", "4", "--requests", "10"])
+
+        self.assertEqual([result.server for result in results], ["threading", "asyncio"])
+        self.assertTrue(all(result.requests == 40 for result in results))
+        self.assertEqual(results[1].peak_server_threads, 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
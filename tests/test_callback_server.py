@@ -0,0 +1,220 @@
+import http.client
+import json
+import shutil
+import socket
+import subprocess
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+from src.callback_server import start_result_server
+from src.result_store import ResultStore
+
+
+class CallbackServerTests(unittest.TestCase):
+    def setUp(self):
+        self.store = ResultStore()
+        self.server = start_result_server(self.store, page_duration=45.0)
+
+    def tearDown(self):
+        self.server.close()
+
+    def connection(self):
+        return http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+
+    def post_report(self, connection, payload):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        connection.request("POST", "/report", body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        return response
+
+    def test_listens_on_localhost_only(self):
+        self.assertEqual(self.server.server_address[0], "127.0.0.1")
+
+    def test_launch_page_hands_the_task_to_the_extension(self):
+        connection = self.connection()
+        url = "https://www.linkedin.com/company/acme/"
+        connection.request("GET", f"/launch?task_id=abc&url={quote(url, safe='')}")
+        response = connection.getresponse()
+        body = response.read().decode()
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertIn('"task_id": "abc"', body)
+        self.assertIn(f'"port": {self.server.port}', body)
+        self.assertIn('"page_duration": 45.0', body)
+        self.assertIn(json.dumps(url), body)
+
+    def test_invalid_launches(self):
+        connection = self.connection()
+        for target in ("/launch?task_id=abc", "/launch?task_id=abc&url=javascript%3Aalert(1)"):
+            connection.request("GET", target)
+            response = connection.getresponse()
+            response.read()
+            self.assertEqual(response.status, 400)
+
+    def test_report_is_delivered_to_the_store(self):
+        self.store.register("abc")
+        response = self.post_report(self.connection(), {"task_id": "abc", "url": "https://x", "status": "follow"})
+
+        self.assertEqual(response.status, 204)
+        self.assertEqual(self.store.wait_for("abc", timeout=1)["status"], "follow")
+
+    def test_invalid_reports(self):
+        connection = self.connection()
+        self.assertEqual(self.post_report(connection, b"{not json").status, 400)
+        self.assertEqual(self.post_report(connection, {"task_id": "abc"}).status, 400)
+        self.assertEqual(self.post_report(connection, [1, 2]).status, 400)
+        connection.request("GET", "/report")
+        response = connection.getresponse()
+        response.read()
+        self.assertEqual(response.status, 404)
+
+    def post_batch(self, payload):
+        connection = self.connection()
+        connection.request("POST", "/report/batch", body=json.dumps(payload).encode(),
+                           headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response, response.read()
+
+    def test_report_batch_is_delivered_to_the_store(self):
+        self.store.register("a")
+        response, body = self.post_batch({"reports": [
+            {"task_id": "a", "url": "https://x", "status": "follow"},
+            {"task_id": "b", "url": "https://x"},
+            "nope",
+            {"task_id": "c", "url": "https://x", "status": "error", "reason": "timeout"},
+        ]})
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(body), {
+            "accepted": ["a", "c"],
+            "rejected": [{"task_id": "b", "error": "Missing fields: status"},
+                         {"task_id": None, "error": "Expected a JSON object"}],
+        })
+        self.assertEqual(self.store.wait_for("a", timeout=1)["status"], "follow")
+        self.assertEqual(self.store.claim("c")["reason"], "timeout")
+
+    def test_invalid_report_batches(self):
+        for payload in ({"task_id": "a"}, [{"task_id": "a"}], {"reports": "a"}):
+            self.assertEqual(self.post_batch(payload)[0].status, 400)
+
+    def test_metrics_expose_reports_timeouts_and_request_latencies(self):
+        self.store.register("a")
+        self.post_batch({"reports": [{"task_id": "a", "url": "https://x", "status": "follow"}]})
+        self.store.wait_for("a", timeout=1)
+        self.store.wait_for("b", timeout=0)
+        connection = self.connection()
+        connection.request("GET", "/missing")
+        connection.getresponse().read()
+
+        connection.request("GET", "/metrics")
+        response = connection.getresponse()
+        body = response.read().decode()
+
+        self.assertEqual(response.status, 200)
+        self.assertTrue(response.getheader("Content-Type").startswith("text/plain; version=0.0.4"))
+        self.assertIn('prospection_reports_total{outcome="delivered"} 1\n', body)
+        self.assertIn("prospection_callback_timeouts_total 1\n", body)
+        self.assertIn("prospection_tasks_waiting 0\n", body)
+        self.assertIn('prospection_http_request_duration_seconds_count{method="POST",path="/report/batch",status="200"} 1',
+                      body)
+        self.assertIn('prospection_http_request_duration_seconds_count{method="other",path="other",status="404"} 1',
+                      body)
+
+    def test_connections_are_kept_alive(self):
+        connection = self.connection()
+        self.post_report(connection, {"task_id": "a", "url": "https://x", "status": "follow"})
+        sock = connection.sock
+        response = self.post_report(connection, {"task_id": "b", "url": "https://x", "status": "follow"})
+
+        self.assertEqual(response.status, 204)
+        self.assertIs(connection.sock, sock)
+        self.assertEqual(self.store.counters["reported"], 2)
+
+    def test_connection_close_is_honoured(self):
+        with socket.create_connection(("127.0.0.1", self.server.port), timeout=5) as sock:
+            sock.sendall(b"GET /missing HTTP/1.0\r\n\r\n")
+            data = b""
+            while chunk := sock.recv(4096):
+                data += chunk
+        self.assertTrue(data.startswith(b"HTTP/1.1 404"))
+        self.assertIn(b"Connection: close", data)
+
+    def test_requests_do_not_spawn_threads(self):
+        threads_before = threading.active_count()
+        peak = []
+
+        def report(index):
+            connection = self.connection()
+            for attempt in range(5):
+                self.post_report(connection, {"task_id": f"{index}-{attempt}", "url": "https://x", "status": "follow"})
+            peak.append(threading.active_count())
+            connection.close()
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            list(executor.map(report, range(20)))
+
+        self.assertEqual(self.store.counters["reported"], 100)
+        # only the 20 client threads, none on the server side
+        self.assertLessEqual(max(peak), threads_before + 20)
+
+
+# drives the outbox of background.js with the fetch of node, storage kept in memory
+OUTBOX_DRIVER = """
+const storage = {};
+global.chrome = {
+  runtime: { lastError: null },
+  storage: { local: {
+    get: (defaults, callback) => callback({ ...defaults, ...storage }),
+    set: (items, callback) => { Object.assign(storage, items); callback(); },
+  } },
+};
+const { enqueueReport, flushOutbox, cancelRetry, retryState } = require(process.argv[1]);
+(async () => {
+  const [port, count] = [Number(process.argv[2]), Number(process.argv[3])];
+  for (let index = 0; index < count; index += 1) {
+    await enqueueReport({ port, taskId: `task-${index}`, url: 'https://x', status: 'follow' });
+  }
+  const left = await flushOutbox();
+  console.log(JSON.stringify({ left: left.length, ...retryState() }));
+  cancelRetry();
+})();
+"""
+
+
+@unittest.skipIf(shutil.which("node") is None, "node is not installed")
+class ExtensionOutboxTests(unittest.TestCase):
+    BACKGROUND_JS = Path(__file__).resolve().parent.parent / "chrome_plugin" / "background.js"
+
+    def flush(self, port, count):
+        completed = subprocess.run(["node", "-e", OUTBOX_DRIVER, str(self.BACKGROUND_JS), str(port), str(count)],
+                                   capture_output=True, text=True, timeout=30, check=True)
+        return json.loads(completed.stdout)
+
+    def test_outbox_is_flushed_to_the_server_in_batches(self):
+        store = ResultStore()
+        for index in range(45):
+            store.register(f"task-{index}")
+        server = start_result_server(store)
+        try:
+            self.assertEqual(self.flush(server.port, 45), {"left": 0, "failures": 0, "scheduled": False})
+        finally:
+            server.close()
+
+        self.assertEqual(store.counters["delivered"], 45)
+        self.assertEqual(store.wait_for("task-44", timeout=0)["status"], "follow")
+
+    def test_reports_stay_in_the_outbox_while_the_server_is_down(self):
+        server = start_result_server(ResultStore())
+        port = server.port
+        server.close()
+
+        self.assertEqual(self.flush(port, 3), {"left": 3, "failures": 1, "scheduled": True})
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
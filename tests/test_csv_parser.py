@@ -0,0 +1,438 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from src.csv_parser import (
+    PYARROW_AVAILABLE,
+    BuiltwithCSVParser,
+    Company,
+    Employee,
+    MantiksCSVParser,
+    ParserProviderType,
+    ProspectParser,
+    RecordColumns,
+    linkedin_url_keys,
+    unknown_company,
+)
+from src.db_prospection import ProspectionDB
+from src.linkedin_company_follow import linkedin_url_key
+from src.parser_visitors import PropectVisitor, SQLLiteSaveVisitor, VisitorPipeline
+
+MANTIKS_CSV = """Company name,Company LinkedIn,LinkedIn profil,Job title
+Acme,linkedin.com/company/acme,linkedin.com/in/alice,Dev
+Acme,linkedin.com/company/acme,linkedin.com/in/bob,Dev
+Globex,linkedin.com/company/globex,linkedin.com/in/carol,CTO
+Initech,linkedin.com/company/initech,,PM
+Globex,linkedin.com/company/globex,linkedin.com/in/carol,CTO
+"""
+
+BUILTWITH_CSV = """BuiltWith export header line
+Domain,Company,Linkedin,Technology A
+acme.com,Acme,linkedin.com/company/acme,1
+globex.com,Globex,linkedin.com/company/globex,1
+acme.fr,Acme,linkedin.com/company/acme,1
+"""
+
+
+class ParserTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmpdir.name)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def write_csv(self, name: str, contents: str) -> str:
+        path = self.tmpdir / name
+        path.write_text(contents, encoding="utf-8")
+        return str(path)
+
+
+class StreamingParseTests(ParserTestCase):
+    def test_mantiks_batches_match_eager_parse(self):
+        path = self.write_csv("mantiks.csv", MANTIKS_CSV)
+        eager = MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil")
+        streamed = MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil", chunksize=2)
+
+        self.assertEqual(list(streamed.iter_companies()), eager.get_companies())
+        self.assertEqual(list(streamed.iter_employees()), eager.get_user_profiles())
+
+    def test_batches_never_exceed_chunksize(self):
+        path = self.write_csv("mantiks.csv", MANTIKS_CSV)
+        parser = MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil", chunksize=2)
+
+        batches = list(parser.iter_batches())
+        self.assertEqual(len(batches), 3)
+        for companies, employees in batches:
+            self.assertLessEqual(len(companies), 2)
+            self.assertLessEqual(len(employees), 2)
+
+    def test_builtwith_streaming_skips_banner_line(self):
+        path = self.write_csv("builtwith.csv", BUILTWITH_CSV)
+        parser = BuiltwithCSVParser(path, "Company", "Linkedin", "", chunksize=1)
+
+        links = [company.link for company in parser.iter_companies()]
+        self.assertEqual(links, ["linkedin.com/company/acme", "linkedin.com/company/globex"])
+        self.assertEqual(list(parser.iter_employees()), [])
+
+
+class LazyParseTests(ParserTestCase):
+    def test_nothing_is_read_before_first_access(self):
+        parser = MantiksCSVParser(str(self.tmpdir / "missing.csv"), "Company name", "Company LinkedIn", "LinkedIn profil")
+        self.assertEqual(parser.rows_read, 0)
+        with self.assertRaises(FileNotFoundError):
+            parser.get_companies()
+
+    def test_parsers_do_not_share_their_records(self):
+        mantiks = MantiksCSVParser(self.write_csv("mantiks.csv", MANTIKS_CSV),
+                                   "Company name", "Company LinkedIn", "LinkedIn profil")
+        builtwith = BuiltwithCSVParser(self.write_csv("builtwith.csv", BUILTWITH_CSV), "Company", "Linkedin", "")
+
+        self.assertEqual(len(mantiks.get_companies()), 3)
+        self.assertEqual(len(builtwith.get_companies()), 2)
+        self.assertEqual(len(mantiks.get_user_profiles()), 3)
+        self.assertEqual(builtwith.get_user_profiles(), [])
+
+    def test_companies_only_build_company_records(self):
+        parser = MantiksCSVParser(self.write_csv("mantiks.csv", MANTIKS_CSV),
+                                  "Company name", "Company LinkedIn", "LinkedIn profil")
+
+        companies = parser.get_companies()
+        self.assertIsNone(parser._employees)
+        self.assertIs(parser.get_companies(), companies)
+        self.assertIs(parser.get_user_profiles()[0].company, companies[0])
+
+    def test_no_dataframe_is_kept_once_an_entity_is_built(self):
+        parser = MantiksCSVParser(self.write_csv("mantiks.csv", MANTIKS_CSV),
+                                  "Company name", "Company LinkedIn", "LinkedIn profil")
+        with mock.patch.object(parser, "read_columns", wraps=parser.read_columns) as read_columns:
+            parser.get_companies()
+            self.assertFalse(any(isinstance(value, pd.DataFrame) for value in vars(parser).values()))
+            # the employees come from a read of their own
+            parser.get_user_profiles()
+        self.assertEqual(read_columns.call_count, 2)
+
+    def test_profiles_build_both_entities_in_one_read(self):
+        parser = MantiksCSVParser(self.write_csv("mantiks.csv", MANTIKS_CSV),
+                                  "Company name", "Company LinkedIn", "LinkedIn profil")
+        other = MantiksCSVParser(parser.path, "Company name", "Company LinkedIn", "LinkedIn profil")
+
+        employees = parser.get_user_profiles()
+        self.assertEqual([c.link for c in parser._companies], [c.link for c in other.get_companies()])
+        self.assertIs(employees[0].company, parser.get_companies()[0])
+
+    def test_company_generator_matches_list(self):
+        path = self.write_csv("mantiks.csv", MANTIKS_CSV)
+        parser = MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil")
+
+        self.assertEqual(list(parser.iter_companies(chunksize=1)), parser.get_companies())
+
+
+class CompactRecordTests(ParserTestCase):
+    def test_records_are_frozen_and_slotted(self):
+        company = Company("Acme", "linkedin.com/company/acme")
+        with self.assertRaises(AttributeError):
+            company.name = "Other"
+        self.assertFalse(hasattr(company, "__dict__"))
+        self.assertFalse(hasattr(Employee("linkedin.com/in/alice", company), "__dict__"))
+
+    def test_employees_share_their_company(self):
+        path = self.write_csv("mantiks.csv", MANTIKS_CSV)
+        eager = MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil")
+        streamed = MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil", chunksize=2)
+
+        for parser_employees in (eager.get_user_profiles(), list(streamed.iter_employees())):
+            alice, bob = parser_employees[:2]
+            self.assertIs(alice.company, bob.company)
+        acme = eager.get_companies()[0]
+        self.assertIs(eager.get_user_profiles()[0].company, acme)
+
+    def test_columns_store_each_company_once(self):
+        parser = InMemoryParser([], [])
+        parser.company_name_column, parser.company_link_column, parser.employee_link_column = "name", "link", "profile"
+        df = pd.DataFrame({
+            "name": ["Acme", "Acme", "ACME", "Solo"],
+            "link": ["linkedin.com/company/acme", "linkedin.com/company/acme", "https://www.linkedin.com/company/Acme/",
+                     None],
+            "profile": ["linkedin.com/in/a", "linkedin.com/in/b", "linkedin.com/in/c", "linkedin.com/in/d"],
+        })
+
+        columns = parser.columns_from_df(df)
+
+        self.assertEqual(columns.listed_companies, 1)
+        self.assertEqual(columns.company_names, ["Acme", "Solo"])
+        self.assertEqual(columns.employee_companies.tolist(), [0, 0, 0, 1])
+        companies, employees = columns.to_records()
+        self.assertEqual(companies, [Company("Acme", "linkedin.com/company/acme", "company/acme")])
+        self.assertTrue(all(employee.company is companies[0] for employee in employees[:3]))
+        self.assertEqual(employees[3].company, Company("Solo", None, None))
+
+    def test_columns_round_trip_records(self):
+        acme = Company("Acme", "linkedin.com/company/acme")
+        columns = RecordColumns.from_records(
+            [acme, None], [Employee("linkedin.com/in/a", acme), Employee("linkedin.com/in/b", unknown_company)])
+
+        self.assertEqual(list(columns.company_rows()), [("Acme", "linkedin.com/company/acme", "company/acme")])
+        self.assertEqual(list(columns.employee_rows()), [
+            ("linkedin.com/in/a", "in/a", "Acme", "linkedin.com/company/acme", "company/acme"),
+            ("linkedin.com/in/b", "in/b", "unknown", "", None),
+        ])
+
+
+class ColumnProjectionTests(ParserTestCase):
+    def test_resolves_columns_case_insensitively(self):
+        path = self.write_csv("mantiks.csv", MANTIKS_CSV)
+        parser = MantiksCSVParser(path, "COMPANY NAME", "company linkedin", "Linkedin Profil", chunksize=1)
+
+        self.assertEqual(
+            parser.resolve_columns(path, ParserProviderType.MANTIKS),
+            ["Company name", "Company LinkedIn", "LinkedIn profil"],
+        )
+
+    def test_reads_only_needed_columns_as_strings(self):
+        path = self.write_csv("builtwith.csv", BUILTWITH_CSV)
+        parser = BuiltwithCSVParser(path, "Company", "Linkedin", "", chunksize=1)
+
+        df = parser.open_as_df(path, ParserProviderType.BUILT_WITH)
+        self.assertEqual(list(df.columns), ["Company", "Linkedin"])
+        self.assertTrue(all(dtype == object for dtype in df.dtypes))
+
+    def test_missing_columns_are_ignored(self):
+        path = self.write_csv("mantiks.csv", MANTIKS_CSV)
+        parser = MantiksCSVParser(path, "Company name", "Company LinkedIn", "")
+
+        self.assertEqual(len(parser.get_companies()), 3)
+        self.assertEqual(parser.get_user_profiles(), [])
+
+    def test_rejects_unknown_engine(self):
+        path = self.write_csv("mantiks.csv", MANTIKS_CSV)
+        with self.assertRaises(ValueError):
+            MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil", engine="python")
+
+    @unittest.skipIf(PYARROW_AVAILABLE, "pyarrow is installed")
+    def test_pyarrow_engine_requires_pyarrow(self):
+        path = self.write_csv("mantiks.csv", MANTIKS_CSV)
+        with self.assertRaises(ValueError):
+            MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil", engine="pyarrow")
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_pyarrow_engine_matches_c_engine(self):
+        path = self.write_csv("builtwith.csv", BUILTWITH_CSV)
+        c_parser = BuiltwithCSVParser(path, "Company", "Linkedin", "")
+        arrow_parser = BuiltwithCSVParser(path, "Company", "Linkedin", "", engine="pyarrow")
+
+        self.assertEqual(arrow_parser.get_companies(), c_parser.get_companies())
+
+
+class SQLLiteSaveVisitorStreamingTests(ParserTestCase):
+    def test_streaming_visit_writes_all_records(self):
+        db_path = str(self.tmpdir / "prospection.db")
+        ProspectionDB(db_path).init_db()
+        path = self.write_csv("mantiks.csv", MANTIKS_CSV)
+        parser = MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil", chunksize=2)
+
+        SQLLiteSaveVisitor(db_path, False).visit(parser)
+
+        con = sqlite3.connect(db_path)
+        companies = con.execute("SELECT company_link FROM company ORDER BY rowid").fetchall()
+        employees = con.execute("SELECT employee_link FROM employee ORDER BY rowid").fetchall()
+        con.close()
+        self.assertEqual([row[0] for row in companies], [
+            "",
+            "linkedin.com/company/acme",
+            "linkedin.com/company/globex",
+            "linkedin.com/company/initech",
+        ])
+        self.assertEqual([row[0] for row in employees], [
+            "linkedin.com/in/alice",
+            "linkedin.com/in/bob",
+            "linkedin.com/in/carol",
+        ])
+
+
+DIRTY_MANTIKS_CSV = """Company name,Company LinkedIn,LinkedIn profil,Job title
+ Acme ,HTTPS://WWW.LinkedIn.com/company/Acme/ , linkedin.com/in/alice,Dev
+Acme,https://www.linkedin.com/company/Acme/,  ,Dev
+Website,https://acme.com,linkedin.com/in/bob,Dev
+Globex,linkedin.com/company/globex,linkedin.com/company/carol,CTO
+Nobody,,,PM
+Acme,https://www.linkedin.com/company/Acme/,linkedin.com/in/alice,Dev
+"""
+
+
+class NormalizationTests(ParserTestCase):
+    def test_cleans_links_and_writes_rejects_with_reason(self):
+        path = self.write_csv("dirty.csv", DIRTY_MANTIKS_CSV)
+        rejects_path = str(self.tmpdir / "dirty.rejects.csv")
+        parser = MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil",
+                                  rejects_path=rejects_path)
+
+        self.assertEqual([(c.name, c.link) for c in parser.get_companies()],
+                         [("Acme", "https://www.linkedin.com/company/Acme/"), ("Globex", "linkedin.com/company/globex")])
+        self.assertEqual([e.link for e in parser.get_user_profiles()], ["linkedin.com/in/alice"])
+        # Globex only loses its employee link, it is reported but not rejected
+        self.assertEqual((parser.rows_read, parser.rows_rejected), (6, 3))
+
+        rejects = pd.read_csv(rejects_path, dtype=str)
+        self.assertEqual(list(rejects["Company name"]), ["Website", "Globex", "Nobody", "Acme"])
+        self.assertEqual(list(rejects["reason"]),
+                         ["invalid_company_link", "invalid_employee_link", "no_link", "duplicate"])
+
+    def test_streaming_rewrites_the_rejects_file(self):
+        path = self.write_csv("dirty.csv", DIRTY_MANTIKS_CSV)
+        rejects_path = str(self.tmpdir / "dirty.rejects.csv")
+        parser = MantiksCSVParser(path, "Company name", "Company LinkedIn", "LinkedIn profil",
+                                  chunksize=2, rejects_path=rejects_path)
+
+        for _ in range(2):
+            employees = list(parser.iter_employees())
+            # plus the Globex row, which only lost its employee link
+            self.assertEqual(len(pd.read_csv(rejects_path)), parser.rows_rejected + 1)
+        self.assertEqual([e.link for e in employees], ["linkedin.com/in/alice"])
+        # the repeated alice row is in another chunk : dropped by iter_batches, not reported as duplicate
+        self.assertEqual(parser.rows_rejected, 2)
+
+    def test_company_is_kept_when_the_employee_link_is_not_a_profile(self):
+        path = self.write_csv("employees.csv", (
+            "Company name,Company LinkedIn,Company LinkedIn Employees\n"
+            "Acme,linkedin.com/company/acme,https://www.linkedin.com/search/results/people/?currentCompany=1\n"
+            "Globex,linkedin.com/company/globex,https://www.linkedin.com/company/globex/people/\n"))
+        rejects_path = str(self.tmpdir / "employees.rejects.csv")
+        parser = MantiksCSVParser(path, "Company name", "Company LinkedIn", "Company LinkedIn Employees",
+                                  rejects_path=rejects_path)
+
+        self.assertEqual([c.name for c in parser.get_companies()], ["Acme", "Globex"])
+        self.assertEqual(parser.get_user_profiles(), [])
+        self.assertEqual(parser.rows_rejected, 0)
+        rejects = pd.read_csv(rejects_path, dtype=str)
+        self.assertEqual(list(rejects["reason"]), ["invalid_employee_link"] * 2)
+
+    def test_empty_cells_become_missing(self):
+        parser = InMemoryParser([], [])
+        parser.company_name_column, parser.company_link_column, parser.employee_link_column = "name", "link", "profile"
+        kept, rejects = parser.normalize_df(pd.DataFrame(
+            {"name": ["  "], "link": [" linkedin.com/company/acme "], "profile": [""]}, dtype=str))
+        self.assertEqual(kept.to_dict(orient="records"),
+                         [{"name": None, "link": "linkedin.com/company/acme", "profile": None}])
+        self.assertTrue(rejects.empty)
+
+
+class InMemoryParser(ProspectParser):
+    def __init__(self, companies, employees):
+        super().__init__("", "", "", "")
+        self._companies = companies
+        self._employees = employees
+
+
+class RecordBatchTests(ParserTestCase):
+    def test_whole_export_is_built_once_for_all_visitors(self):
+        parser = MantiksCSVParser(self.write_csv("mantiks.csv", MANTIKS_CSV),
+                                  "Company name", "Company LinkedIn", "LinkedIn profil")
+        seen = []
+
+        class Reader(PropectVisitor):
+            def visit_batch(self, batch):
+                seen.append((len(batch.columns.employee_links), len(batch.companies), len(batch.employees)))
+
+        with mock.patch.object(parser, "columns_from_df", wraps=parser.columns_from_df) as columns_from_df, \
+                mock.patch.object(RecordColumns, "from_records", wraps=RecordColumns.from_records) as from_records:
+            VisitorPipeline([Reader(), Reader()]).visit(parser)
+
+        self.assertEqual(seen, [(3, 3, 3), (3, 3, 3)])
+        self.assertEqual(columns_from_df.call_count, 1)
+        from_records.assert_not_called()
+
+
+class SQLLiteSaveVisitorLinkingTests(ParserTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db_path = str(self.tmpdir / "prospection.db")
+        ProspectionDB(self.db_path).init_db()
+
+    def employee_companies(self):
+        con = sqlite3.connect(self.db_path)
+        rows = con.execute("SELECT e.employee_link, c.company_name FROM employee e"
+                           " LEFT JOIN company c ON c.rowid = e.company_id ORDER BY e.rowid").fetchall()
+        con.close()
+        return rows
+
+    def test_links_by_company_link_then_case_insensitive_name(self):
+        acme = Company("Acme", "linkedin.com/company/acme")
+        parser = InMemoryParser(
+            [acme, Company("Globex Corp", "linkedin.com/company/globex")],
+            [
+                Employee("linkedin.com/in/alice", Company("ACME Inc", "linkedin.com/company/acme")),
+                Employee("linkedin.com/in/bob", Company("globex corp", None)),
+                Employee("linkedin.com/in/carol", Company("Nobody", None)),
+                Employee("linkedin.com/in/alice", acme),
+            ],
+        )
+
+        SQLLiteSaveVisitor(self.db_path, False).visit(parser)
+
+        self.assertEqual(self.employee_companies(), [
+            ("linkedin.com/in/alice", "Acme"),
+            ("linkedin.com/in/bob", "Globex Corp"),
+            ("linkedin.com/in/carol", None),
+        ])
+
+    def test_more_employees_than_sqlite_variables(self):
+        companies = [Company(f"Company {i}", f"linkedin.com/company/{i}") for i in range(100)]
+        employees = [Employee(f"linkedin.com/in/{i}", companies[i % 100]) for i in range(40_000)]
+
+        SQLLiteSaveVisitor(self.db_path, False).visit(InMemoryParser(companies, employees))
+
+        con = sqlite3.connect(self.db_path)
+        linked = con.execute("SELECT count(*) FROM employee WHERE company_id IS NOT NULL").fetchone()[0]
+        con.close()
+        self.assertEqual(linked, 40_000)
+
+    def test_company_lookups_are_index_searches(self):
+        con = sqlite3.connect(self.db_path)
+        plan = con.execute("EXPLAIN QUERY PLAN SELECT min(c.rowid) FROM company c WHERE lower(c.company_name) = ?",
+                           ("acme",)).fetchall()
+        con.close()
+        self.assertIn("idx_company_lower_name", " | ".join(row[3] for row in plan))
+
+    def test_same_company_from_two_providers_is_stored_once(self):
+        builtwith = InMemoryParser([Company("Acme", "https://www.linkedin.com/company/acme/")], [])
+        mantiks = InMemoryParser(
+            [Company("ACME Corp", "linkedin.com/company/Acme")],
+            [Employee("https://www.linkedin.com/in/alice/", Company("ACME Corp", "linkedin.com/company/Acme")),
+             Employee("linkedin.com/in/Alice", Company("ACME Corp", "linkedin.com/company/Acme"))],
+        )
+
+        SQLLiteSaveVisitor(self.db_path, False).visit(builtwith)
+        SQLLiteSaveVisitor(self.db_path, False).visit(mantiks)
+
+        con = sqlite3.connect(self.db_path)
+        companies = con.execute("SELECT company_name, company_key FROM company WHERE company_key IS NOT NULL").fetchall()
+        con.close()
+        self.assertEqual(companies, [("Acme", "company/acme")])
+        self.assertEqual(self.employee_companies(), [("https://www.linkedin.com/in/alice/", "Acme")])
+
+
+class LinkedinUrlKeysTests(unittest.TestCase):
+    def test_matches_the_scalar_key(self):
+        urls = ["https://www.linkedin.com/company/Acme/", " linkedin.com/in/ren%C3%A9e?x=1", "https://acme.com",
+                None, "fr.linkedin.com/school/mit", ""]
+        keys = linkedin_url_keys(pd.Series(urls, dtype=object))
+        self.assertEqual(list(keys), [linkedin_url_key(url) for url in urls])
+
+    def test_parsed_records_carry_their_keys(self):
+        parser = InMemoryParser([], [])
+        parser.company_name_column, parser.company_link_column, parser.employee_link_column = "name", "link", "profile"
+        df = pd.DataFrame({"name": ["Acme"], "link": ["linkedin.com/company/Acme/"],
+                           "profile": ["https://www.linkedin.com/in/alice"]})
+        companies, employees = parser.records_from_df(df)
+        self.assertEqual(companies[0].key, "company/acme")
+        self.assertEqual(employees[0].key, "in/alice")
+        self.assertEqual(employees[0].company.key, "company/acme")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
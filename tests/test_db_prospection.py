@@ -0,0 +1,401 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from src.db_prospection import SCHEMA_VERSION, CompanyDB, FollowResultDB, ProspectionDB
+
+
+class ProspectionDBTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self._tmpdir.name) / "prospection.db")
+        self.db = ProspectionDB(self.db_path)
+        self.db.init_db()
+
+    def tearDown(self):
+        self.db.close()
+        self._tmpdir.cleanup()
+
+    def insert_companies(self, *rows):
+        con = sqlite3.connect(self.db_path)
+        con.executemany("INSERT INTO company (company_name, company_link, is_added) VALUES (?, ?, ?)", rows)
+        con.commit()
+        con.close()
+
+
+class ConnectionManagementTests(ProspectionDBTestCase):
+    def test_connection_is_reused_and_tuned(self):
+        con = self.db.connection()
+        self.assertIs(self.db.connection(), con)
+        self.assertEqual(con.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(con.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(con.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+        self.assertEqual(con.execute("PRAGMA cache_size").fetchone()[0], -65536)
+
+    def test_each_thread_gets_its_own_connection(self):
+        main_connection = self.db.connection()
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(self.db.connection()))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(seen[0], main_connection)
+
+    def test_context_manager_closes_connections(self):
+        with ProspectionDB(self.db_path) as db:
+            con = db.connection()
+            db.get_companies_stats()
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            con.execute("SELECT 1")
+
+    def test_updates_are_visible_to_other_connections(self):
+        self.insert_companies(("Acme", "linkedin.com/company/acme", 0))
+        company = self.db.get_all_companies_not_added()[0]
+
+        self.db.updateAddedCompany(company)
+
+        con = sqlite3.connect(self.db_path)
+        self.assertEqual(con.execute("SELECT is_added FROM company").fetchone()[0], 1)
+        con.close()
+        self.assertEqual(self.db.get_all_companies_added(), [CompanyDB(company.id, "Acme", "linkedin.com/company/acme")])
+
+
+class StatsTests(ProspectionDBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.insert_companies(
+            ("Acme", "linkedin.com/company/acme", 1),
+            ("Globex", "linkedin.com/company/globex", 0),
+            ("Initech", "linkedin.com/company/initech", 0),
+        )
+        con = self.db.connection()
+        con.executemany("INSERT INTO employee (employee_link, company_id, is_added) VALUES (?, 1, ?)",
+                        [("linkedin.com/in/alice", 1), ("linkedin.com/in/bob", 0)])
+        con.commit()
+
+    def assert_stats(self, stats: dict, total: int, added: int, remaining: int):
+        self.assertEqual((stats["total"], stats["added"], stats["remaining"]), (total, added, remaining))
+
+    def test_aggregate_stats(self):
+        self.assertFalse(self.db.has_stats_counters())
+        self.assert_stats(self.db.get_companies_stats(), 3, 1, 2)
+        self.assert_stats(self.db.get_employees_stats(), 2, 1, 1)
+        self.assertAlmostEqual(self.db.get_companies_stats()["percentage_added"], 100 / 3)
+
+    def test_counters_follow_inserts_updates_and_deletes(self):
+        self.db.enable_stats_counters()
+        self.assert_stats(self.db.get_companies_stats(), 3, 1, 2)
+
+        self.insert_companies(("Hooli", "linkedin.com/company/hooli", 0))
+        self.db.updateAddedCompany(CompanyDB(2, "Globex", "linkedin.com/company/globex"))
+        con = self.db.connection()
+        con.execute("INSERT INTO company (company_name, company_link, is_added) VALUES ('Acme', 'linkedin.com/company/acme', 0)"
+                    " ON CONFLICT DO NOTHING")
+        con.execute("DELETE FROM employee WHERE employee_link = 'linkedin.com/in/bob'")
+        con.commit()
+
+        self.assert_stats(self.db.get_companies_stats(), 4, 2, 2)
+        self.assert_stats(self.db.get_employees_stats(), 1, 1, 0)
+        self.assertEqual(self.db.check_stats_counters(), {})
+
+    def test_check_detects_and_rebuilds_drift(self):
+        self.db.enable_stats_counters()
+        con = self.db.connection()
+        con.execute("UPDATE stats_counter SET total = 42 WHERE entity = 'company'")
+        con.commit()
+
+        self.assertEqual(self.db.check_stats_counters(), {"company": ((42, 1, 2), (3, 1, 2))})
+        self.db.check_stats_counters(rebuild=True)
+        self.assertEqual(self.db.check_stats_counters(), {})
+        self.assert_stats(self.db.get_companies_stats(), 3, 1, 2)
+
+    def test_disable_falls_back_to_aggregate(self):
+        self.db.enable_stats_counters()
+        self.db.disable_stats_counters()
+        self.insert_companies(("Hooli", "linkedin.com/company/hooli", 0))
+        self.assert_stats(self.db.get_companies_stats(), 4, 1, 3)
+
+    def test_drop_existing_removes_counters(self):
+        self.db.enable_stats_counters()
+        self.db.init_db(drop_existing=True)
+        self.assertFalse(self.db.has_stats_counters())
+        self.insert_companies(("Hooli", "linkedin.com/company/hooli", 0))
+        self.assert_stats(self.db.get_companies_stats(), 1, 0, 1)
+
+
+class KeysetIterationTests(ProspectionDBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.insert_companies(*[
+            (f"Company {i}", f"linkedin.com/company/company-{i}", i % 3 == 0) for i in range(1, 11)
+        ])
+        con = self.db.connection()
+        con.executemany("INSERT INTO employee (employee_link, company_id, is_added) VALUES (?, ?, ?)",
+                        [(f"linkedin.com/in/person-{i}", i, i % 2 == 0) for i in range(1, 11)])
+        con.commit()
+
+    def test_pages_cover_every_row_once(self):
+        ids = [company.id for company in self.db.iter_companies_not_added(page_size=2)]
+        self.assertEqual(ids, [1, 2, 4, 5, 7, 8, 10])
+        self.assertEqual([c.id for c in self.db.get_all_companies_not_added()], ids)
+
+    def test_first_and_last_n(self):
+        self.assertEqual([c.id for c in self.db.iter_companies_not_added(limit=3, page_size=2)], [1, 2, 4])
+        self.assertEqual([c.id for c in self.db.iter_companies_added(limit=2, order="desc")], [9, 6])
+        self.assertEqual([e.id for e in self.db.iter_employees_added(limit=2, order="desc", page_size=1)], [10, 8])
+
+    def test_employees_are_joined_with_their_company(self):
+        employee = next(self.db.iter_employees_not_added())
+        self.assertEqual(employee.link, "linkedin.com/in/person-1")
+        self.assertEqual(employee.company, CompanyDB(1, "Company 1", "linkedin.com/company/company-1"))
+
+    def test_rows_can_be_updated_while_iterating(self):
+        for company in self.db.iter_companies_not_added(page_size=2):
+            self.db.updateAddedCompany(company)
+        self.assertEqual(list(self.db.iter_companies_not_added()), [])
+        self.assertEqual(len(self.db.get_all_companies_added()), 10)
+
+    def test_rejects_unknown_order(self):
+        with self.assertRaises(ValueError):
+            list(self.db.iter_companies_added(order="random"))
+
+    def test_listings_are_bounded_index_scans(self):
+        con = self.db.connection()
+        for is_added, index in ((0, "idx_company_not_added"), (1, "idx_company_added")):
+            plan = con.execute(
+                "EXPLAIN QUERY PLAN SELECT rowid, company_name, company_link FROM company"
+                " WHERE is_added = ? AND rowid < ? ORDER BY rowid DESC LIMIT ?", (is_added, 100, 5)
+            ).fetchall()
+            details = " | ".join(row[3] for row in plan)
+            self.assertIn(f"USING INDEX {index}", details)
+            self.assertNotIn("TEMP B-TREE", details)
+
+
+class BulkUpdateTests(ProspectionDBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.insert_companies(*[
+            (f"Company {i}", f"linkedin.com/company/company-{i}", 0) for i in range(1, 6)
+        ])
+        con = self.db.connection()
+        con.executemany("INSERT INTO employee (employee_link, company_id, is_added) VALUES (?, ?, 0)",
+                        [(f"linkedin.com/in/person-{i}", i % 2 + 1) for i in range(1, 6)])
+        con.commit()
+
+    def test_marks_ids_and_counts_only_real_changes(self):
+        self.assertEqual(self.db.mark_companies_added([1, 2, 3]), 3)
+        self.assertEqual(self.db.mark_companies_added([3, 4, 42]), 1)
+        self.assertEqual([c.id for c in self.db.iter_companies_not_added()], [5])
+
+        self.assertEqual(self.db.mark_companies_added([1, 2], is_added=False), 2)
+        self.assertEqual([c.id for c in self.db.iter_companies_not_added()], [1, 2, 5])
+
+    def test_empty_ids(self):
+        self.assertEqual(self.db.mark_employees_added([]), 0)
+
+    def test_marks_by_predicate(self):
+        self.assertEqual(self.db.mark_employees_added_where("company_id = ?", (1,)), 2)
+        self.assertEqual([e.id for e in self.db.iter_employees_added()], [2, 4])
+        self.assertEqual(self.db.mark_employees_added_where("company_id = ?", (1,)), 0)
+
+    def test_single_row_helpers_still_work(self):
+        self.db.updateAddedEmployee(next(self.db.iter_employees_not_added()))
+        self.assertEqual([e.id for e in self.db.iter_employees_added()], [1])
+
+
+LEGACY_SCHEMA = """
+CREATE TABLE company (company_name TEXT, company_link TEXT UNIQUE, is_added BOOLEAN);
+CREATE TABLE employee (employee_link TEXT, company_id INTEGER, is_added BOOLEAN,
+                       FOREIGN KEY (company_id) REFERENCES company (rowid));
+INSERT INTO company VALUES ('Acme', 'linkedin.com/company/acme', 0);
+INSERT INTO employee VALUES ('linkedin.com/in/alice', 1, 0);
+INSERT INTO employee VALUES ('linkedin.com/in/alice', 1, 1);
+INSERT INTO employee VALUES ('linkedin.com/in/bob', 1, 0);
+INSERT INTO employee VALUES ('linkedin.com/in/bob', 1, 0);
+INSERT INTO employee VALUES (NULL, 1, 0);
+INSERT INTO employee VALUES (NULL, 1, 0);
+"""
+
+
+class MigrationTests(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self._tmpdir.name) / "legacy.db")
+        con = sqlite3.connect(self.db_path)
+        con.executescript(LEGACY_SCHEMA)
+        con.close()
+        self.db = ProspectionDB(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        self._tmpdir.cleanup()
+
+    def query_plan(self, query: str, params: tuple = ()) -> str:
+        rows = self.db.connection().execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        return " | ".join(row[3] for row in rows)
+
+    def test_upgrades_legacy_file_in_place(self):
+        self.assertEqual(self.db.schema_version(), 0)
+        self.assertEqual(self.db.migrate(), SCHEMA_VERSION)
+        self.assertEqual(self.db.migrate(), SCHEMA_VERSION)
+
+    def test_init_db_migrates_new_files(self):
+        db = ProspectionDB(str(Path(self._tmpdir.name) / "fresh.db"))
+        db.init_db()
+        self.assertEqual(db.schema_version(), SCHEMA_VERSION)
+        db.init_db(drop_existing=True)
+        self.assertEqual(db.schema_version(), SCHEMA_VERSION)
+        db.close()
+
+    def test_refuses_newer_schema(self):
+        self.db.connection().execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        with self.assertRaises(RuntimeError):
+            self.db.migrate()
+
+    def test_not_added_listings_use_partial_indexes(self):
+        self.db.migrate()
+        self.assertIn(
+            "USING INDEX idx_company_not_added",
+            self.query_plan("SELECT rowid, company_name, company_link FROM company WHERE is_added = 0"),
+        )
+        self.assertIn(
+            "USING INDEX idx_employee_not_added",
+            self.query_plan("SELECT e.rowid FROM employee e LEFT JOIN company c on c.rowid = e.company_id"
+                            " WHERE e.is_added = 0"),
+        )
+
+    def test_employee_company_lookup_uses_index(self):
+        self.db.migrate()
+        self.assertIn(
+            "idx_employee_company_id",
+            self.query_plan("SELECT rowid FROM employee WHERE company_id = ?", (1,)),
+        )
+
+    def test_lower_company_name_lookup_uses_expression_index(self):
+        self.db.migrate()
+        self.assertIn(
+            "USING INDEX idx_company_lower_name",
+            self.query_plan("SELECT rowid, company_name FROM company WHERE lower(company_name) IN (?, ?)", ("a", "b")),
+        )
+
+    def test_employee_links_are_deduplicated_and_unique(self):
+        self.db.migrate()
+        con = self.db.connection()
+        rows = con.execute("SELECT employee_link, is_added FROM employee ORDER BY rowid").fetchall()
+        self.assertEqual(rows, [("linkedin.com/in/alice", 1), ("linkedin.com/in/bob", 0), (None, 0), (None, 0)])
+
+        con.execute("INSERT INTO employee (employee_link, company_id, is_added) VALUES (?, 1, 0) ON CONFLICT DO NOTHING",
+                    ("linkedin.com/in/bob",))
+        self.assertEqual(con.execute("SELECT count(*) FROM employee").fetchone()[0], 4)
+        self.assertIn(
+            "idx_employee_link",
+            self.query_plan("SELECT rowid FROM employee WHERE employee_link = ?", ("x",)),
+        )
+
+
+class LinkedinKeyMigrationTests(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self._tmpdir.name) / "legacy.db")
+        con = sqlite3.connect(self.db_path)
+        con.executescript(LEGACY_SCHEMA.split("INSERT")[0])
+        con.executemany("INSERT INTO company VALUES (?, ?, ?)", [
+            ("Acme", "https://www.linkedin.com/company/acme/", 0),
+            ("Acme Inc", "linkedin.com/company/ACME", 1),
+            ("Globex", "linkedin.com/company/globex", 0),
+            ("No link", None, 0),
+        ])
+        con.executemany("INSERT INTO employee VALUES (?, ?, ?)", [
+            ("linkedin.com/in/alice", 1, 0),
+            ("https://www.linkedin.com/in/Alice/", 2, 1),
+            ("linkedin.com/in/bob", 2, 0),
+            ("linkedin.com/in/carol", 3, 0),
+        ])
+        con.commit()
+        con.close()
+        self.db = ProspectionDB(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        self._tmpdir.cleanup()
+
+    def test_backfills_keys_and_merges_duplicates(self):
+        self.db.migrate()
+        con = self.db.connection()
+        self.assertEqual(con.execute("SELECT rowid, company_key, is_added FROM company ORDER BY rowid").fetchall(), [
+            (1, "company/acme", 1), (3, "company/globex", 0), (4, None, 0),
+        ])
+        self.assertEqual(con.execute("SELECT employee_key, company_id, is_added FROM employee ORDER BY rowid").fetchall(), [
+            ("in/alice", 1, 1), ("in/bob", 1, 0), ("in/carol", 3, 0),
+        ])
+
+    def test_key_lookups_use_unique_indexes(self):
+        self.db.migrate()
+        con = self.db.connection()
+        plan = " | ".join(row[3] for row in con.execute(
+            "EXPLAIN QUERY PLAN SELECT rowid FROM company WHERE company_key = ?", ("company/acme",)))
+        self.assertIn("idx_company_key", plan)
+        con.execute("INSERT INTO company (company_name, company_link, company_key, is_added)"
+                    " VALUES ('ACME', 'fr.linkedin.com/company/acme', 'company/acme', 0) ON CONFLICT DO NOTHING")
+        self.assertEqual(con.execute("SELECT count(*) FROM company").fetchone()[0], 3)
+
+
+class FollowResultTests(ProspectionDBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.insert_companies(
+            ("Acme", "https://www.linkedin.com/company/acme", 0),
+            ("Globex", "https://www.linkedin.com/company/globex", 0),
+            ("Initech", "https://www.linkedin.com/company/initech", 0),
+        )
+
+    def test_followed_status_marks_the_company_as_added(self):
+        self.db.record_follow_result(FollowResultDB("t1", 1, "https://www.linkedin.com/company/acme", "follow"))
+        self.db.record_follow_result(FollowResultDB("t2", 2, "https://www.linkedin.com/company/globex", "error",
+                                                    "Follow button not found"))
+        self.db.record_follow_result(FollowResultDB("t3", 3, "https://www.linkedin.com/company/initech",
+                                                    "already followed"))
+
+        self.assertEqual([company.id for company in self.db.iter_companies_not_added()], [2])
+        self.assertEqual(self.db.get_follow_stats(), {"already followed": 1, "error": 1, "follow": 1})
+        errors = list(self.db.iter_follow_results(status="error"))
+        self.assertEqual([(result.task_id, result.reason) for result in errors], [("t2", "Follow button not found")])
+        self.assertTrue(errors[0].reported_at)
+
+    def test_companies_failing_too_often_are_skipped(self):
+        for task_id in ("t1", "t2"):
+            self.db.record_follow_result(FollowResultDB(task_id, 2, "https://www.linkedin.com/company/globex", "error"))
+
+        self.assertEqual([company.id for company in self.db.iter_companies_to_follow(max_attempts=2)], [1, 3])
+        self.assertEqual([company.id for company in self.db.iter_companies_to_follow(max_attempts=3)], [1, 2, 3])
+        self.assertEqual([company.id for company in self.db.iter_companies_to_follow(max_attempts=0)], [1, 2, 3])
+        self.assertEqual([company.id for company in self.db.iter_companies_to_follow(2, page_size=1)], [1, 3])
+        self.assertEqual([self.db.count_companies_to_follow(max_attempts) for max_attempts in (2, 3, 0)], [2, 3, 3])
+        self.assertFalse(self.db.is_company_to_follow(2, max_attempts=2))
+        self.assertTrue(self.db.is_company_to_follow(2, max_attempts=3))
+
+    def test_companies_without_link_are_not_followed(self):
+        self.insert_companies(("unknown", "", 0), ("No link", None, 0))
+
+        for max_attempts in (0, 3):
+            self.assertEqual([company.id for company in self.db.iter_companies_to_follow(max_attempts)], [1, 2, 3])
+            self.assertEqual(self.db.count_companies_to_follow(max_attempts), 3)
+            self.assertFalse(self.db.is_company_to_follow(4, max_attempts))
+
+    def test_follow_queries_use_indexes(self):
+        con = self.db.connection()
+        plan = " | ".join(row[3] for row in con.execute(
+            "EXPLAIN QUERY PLAN SELECT count(*) FROM follow_result WHERE company_id = ? AND status = 'error'", (1,)))
+        self.assertIn("idx_follow_result_company", plan)
+        plan = " | ".join(row[3] for row in con.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM follow_result WHERE status = ? ORDER BY reported_at DESC LIMIT 5",
+            ("error",)))
+        self.assertIn("idx_follow_result_status", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,198 @@
+import io
+import json
+import tempfile
+import threading
+import unittest
+import urllib.request
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from src import main_add_linkedin_companies_and_employees as follow_cli
+from src.db_prospection import ProspectionDB
+from src.queue_journal import JournaledQueue
+from src.result_sinks import PYARROW_AVAILABLE
+
+
+class FollowCliTests(unittest.TestCase):
+    def report_follow(self, launcher_url):
+        """Stands for the extension, reports the launched task right away"""
+        parsed = urlparse(launcher_url)
+        params = parse_qs(parsed.query)
+        body = json.dumps({"task_id": params["task_id"][0], "url": params["url"][0], "status": "follow"}).encode()
+        request = urllib.request.Request(f"http://{parsed.netloc}/report", data=body, method="POST")
+        urllib.request.urlopen(request, timeout=5).close()
+        return True
+
+    def run_cli(self, tmpdir, *args):
+        with mock.patch.object(follow_cli.webbrowser, "open_new_tab", side_effect=self.report_follow), \
+                redirect_stdout(io.StringIO()):
+            return follow_cli.main(["--quota-file", str(Path(tmpdir) / "quota.db"),
+                                    "--delay-between", "0", "--callback-timeout", "5", *args])
+
+    def test_processed_urls_leave_the_queue_and_the_rest_stays(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue_path = Path(tmpdir) / "Input.txt"
+            queue_path.write_text("https://a\nhttps://b\nhttps://c\n", encoding="utf-8")
+
+            code = self.run_cli(tmpdir, "--queue-file", str(queue_path), "--daily-limit", "2")
+
+            self.assertEqual(code, 0)
+            self.assertEqual(queue_path.read_text(encoding="utf-8"), "https://c\n")
+            self.assertFalse(Path(f"{queue_path}.journal").exists())
+
+    def test_queue_db_follows_pending_companies_and_stores_results(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "prospection.db")
+            with ProspectionDB(db_path) as db:
+                db.init_db()
+                db.connection().executemany(
+                    "INSERT INTO company (company_name, company_link, is_added) VALUES (?, ?, ?)",
+                    [("Acme", "https://www.linkedin.com/company/acme", 1),
+                     ("Globex", "https://www.linkedin.com/company/globex", 0),
+                     ("Initech", "https://www.linkedin.com/company/initech", 0)])
+                db.connection().commit()
+
+            code = self.run_cli(tmpdir, "--queue-db", db_path, "--daily-limit", "0")
+
+            self.assertEqual(code, 0)
+            with ProspectionDB(db_path) as db:
+                self.assertEqual(db.get_companies_stats()["remaining"], 0)
+                self.assertEqual(db.get_follow_stats(), {"follow": 2})
+                self.assertEqual(sorted(result.company_id for result in db.iter_follow_results()), [2, 3])
+            with self.assertRaises(SystemExit):
+                self.run_cli(tmpdir, "--queue-db", db_path)
+
+    def test_json_output_stays_valid_when_the_limit_is_reached_mid_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue_path = Path(tmpdir) / "Input.txt"
+            queue_path.write_text("https://a\nhttps://b\nhttps://c\n", encoding="utf-8")
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with mock.patch.object(follow_cli.webbrowser, "open_new_tab", side_effect=self.report_follow), \
+                    mock.patch.object(follow_cli.QuotaLedger, "acquire", side_effect=[True, False]), \
+                    redirect_stdout(stdout), redirect_stderr(stderr):
+                follow_cli.main(["--queue-file", str(queue_path), "--daily-limit", "2", "--delay-between", "0",
+                                 "--quota-file", str(Path(tmpdir) / "quota.db"), "--output-format", "json"])
+
+        self.assertEqual([result["status"] for result in json.loads(stdout.getvalue())], ["follow"])
+        self.assertIn("Daily limit allows processing 2 more URLs today", stderr.getvalue())
+        self.assertIn("Daily limit of 2 URLs reached", stderr.getvalue())
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_queue_output_keeps_the_flush_default_of_its_format(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for extra, parquet_every in (((), 1000), (("--flush-every", "5"), 5)):
+                args = follow_cli.parse_arguments(["--queue-output", str(Path(tmpdir) / "results.parquet"), *extra])
+                sink = follow_cli.open_result_sinks(args)
+                try:
+                    self.assertEqual(sink.sinks[-1].policy.every, parquet_every)
+                finally:
+                    sink.close()
+
+    def test_metrics_are_served_while_running(self):
+        scrapes = []
+
+        def scrape_and_report(launcher_url):
+            netloc = urlparse(launcher_url).netloc
+            with urllib.request.urlopen(f"http://{netloc}/metrics", timeout=5) as response:
+                scrapes.append(response.read().decode())
+            return self.report_follow(launcher_url)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue_path = Path(tmpdir) / "Input.txt"
+            queue_path.write_text("https://a\nhttps://b\nhttps://c\n", encoding="utf-8")
+            with mock.patch.object(follow_cli.webbrowser, "open_new_tab", side_effect=scrape_and_report), \
+                    mock.patch.object(JournaledQueue, "pending_count", autospec=True,
+                                      side_effect=JournaledQueue.pending_count) as pending_count, \
+                    redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                follow_cli.main(["--queue-file", str(queue_path), "--daily-limit", "10", "--delay-between", "0",
+                                 "--quota-file", str(Path(tmpdir) / "quota.db")])
+
+        self.assertIn("prospection_queue_depth 3\n", scrapes[0])
+        self.assertIn("prospection_quota_remaining 10\n", scrapes[0])
+        self.assertIn('prospection_results_total{status="follow",reason=""} 2\n', scrapes[2])
+        self.assertIn("prospection_queue_depth 1\n", scrapes[2])
+        self.assertIn("prospection_quota_remaining 8\n", scrapes[2])
+        self.assertIn("prospection_launch_to_report_seconds_count 2\n", scrapes[2])
+        # the queue is counted once, not read again after each result
+        self.assertEqual(pending_count.call_count, 1)
+
+    def test_queue_db_depth_drains_to_zero(self):
+        scrapes, servers = [], []
+        start_server = follow_cli.start_result_server
+
+        def scrape_and_report(launcher_url):
+            netloc = urlparse(launcher_url).netloc
+            with urllib.request.urlopen(f"http://{netloc}/metrics", timeout=5) as response:
+                scrapes.append(response.read().decode())
+            return self.report_follow(launcher_url)
+
+        def start_result_server(*args, **kwargs):
+            servers.append(start_server(*args, **kwargs))
+            return servers[-1]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "prospection.db")
+            with ProspectionDB(db_path) as db:
+                db.init_db()
+                db.connection().executemany(
+                    "INSERT INTO company (company_name, company_link, is_added) VALUES (?, ?, ?)",
+                    [("unknown", "", 0),
+                     ("Hooli", "https://www.linkedin.com/company/hooli", 0),
+                     ("Globex", "https://www.linkedin.com/company/globex", 0),
+                     ("Initech", "https://www.linkedin.com/company/initech", 0)])
+                db.connection().executemany(
+                    "INSERT INTO follow_result (task_id, company_id, url, status, reported_at)"
+                    " VALUES (?, 2, '', 'error', datetime('now'))",
+                    [("t1",), ("t2",), ("t3",)])
+                db.connection().commit()
+
+            with mock.patch.object(follow_cli.webbrowser, "open_new_tab", side_effect=scrape_and_report), \
+                    mock.patch.object(follow_cli, "start_result_server", side_effect=start_result_server), \
+                    redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                follow_cli.main(["--queue-db", db_path, "--daily-limit", "0", "--max-attempts", "3",
+                                 "--delay-between", "0", "--quota-file", str(Path(tmpdir) / "quota.db")])
+
+        # neither the company without a link nor the one past --max-attempts are counted
+        self.assertIn("prospection_queue_depth 2\n", scrapes[0])
+        self.assertIn("prospection_queue_depth 1\n", scrapes[1])
+        self.assertIn("prospection_queue_depth 0\n", servers[0].metrics.render())
+
+    def report_late(self, launcher_url):
+        """Stands for the outbox of the extension, flushed after the timeout of the task"""
+        parsed = urlparse(launcher_url)
+        params = parse_qs(parsed.query)
+        body = json.dumps({"reports": [{"task_id": params["task_id"][0], "url": params["url"][0],
+                                        "status": "follow"}]}).encode()
+        request = urllib.request.Request(f"http://{parsed.netloc}/report/batch", data=body, method="POST")
+        threading.Timer(0.3, lambda: urllib.request.urlopen(request, timeout=5).close()).start()
+        return True
+
+    def test_late_reports_are_reconciled_by_task_id(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "prospection.db")
+            output_path = Path(tmpdir) / "results.jsonl"
+            with ProspectionDB(db_path) as db:
+                db.init_db()
+                db.connection().execute("INSERT INTO company (company_name, company_link, is_added) "
+                                        "VALUES ('Acme', 'https://www.linkedin.com/company/acme', 0)")
+                db.connection().commit()
+
+            with mock.patch.object(follow_cli.webbrowser, "open_new_tab", side_effect=self.report_late), \
+                    redirect_stdout(io.StringIO()):
+                code = follow_cli.main(["--queue-db", db_path, "--daily-limit", "0", "--delay-between", "0",
+                                        "--quota-file", str(Path(tmpdir) / "quota.db"),
+                                        "--callback-timeout", "0.05", "--reconcile-grace", "5",
+                                        "--queue-output", str(output_path)])
+
+            self.assertEqual(code, 0)
+            rows = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+            self.assertEqual([row["status"] for row in rows], ["error", "follow"])
+            with ProspectionDB(db_path) as db:
+                self.assertEqual(db.get_follow_stats(), {"follow": 1})
+                self.assertEqual(db.get_companies_stats()["remaining"], 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
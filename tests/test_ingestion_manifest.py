@@ -0,0 +1,224 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from src.csv_parser import ParserProviderType
+from src.db_prospection import ProspectionDB
+from src.ingestion_manifest import SETTLE_SECONDS, load_manifest, plan_ingestion, record_ingestion
+from src.ingestion_pipeline import run_pipeline
+
+
+class ManifestTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmpdir.name)
+        (self.tmpdir / "exports").mkdir()
+        self.db = ProspectionDB(str(self.tmpdir / "prospection.db"))
+        self.db.init_db()
+
+    def tearDown(self):
+        self.db.close()
+        self._tmpdir.cleanup()
+
+    def write_manifest(self, sources) -> str:
+        path = self.tmpdir / "manifest.json"
+        path.write_text(json.dumps({"sources": sources}), encoding="utf-8")
+        return str(path)
+
+    def write_export(self, name: str, *companies: str) -> Path:
+        path = self.tmpdir / "exports" / name
+        lines = ["Company name,Company LinkedIn"] + [f"{c},linkedin.com/company/{c.lower()}" for c in companies]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return path
+
+
+class LoadManifestTests(ManifestTestCase):
+    def test_expands_globs_relative_to_manifest(self):
+        self.write_export("b.csv", "Globex")
+        self.write_export("a.csv", "Acme")
+        manifest = self.write_manifest([{
+            "provider": "mantiks", "path": "exports/*.csv",
+            "company_name_column": "Company name", "company_link_column": "Company LinkedIn",
+        }])
+
+        sources = load_manifest(manifest)
+
+        self.assertEqual([source.description for source in sources], ["a.csv", "b.csv"])
+        self.assertEqual(sources[0].provider, ParserProviderType.MANTIKS)
+        self.assertEqual(sources[0].employee_link_column, "")
+        self.assertTrue(os.path.isabs(sources[0].path))
+
+    def test_rejects_invalid_entries(self):
+        with self.assertRaises(ValueError):
+            load_manifest(self.write_manifest([{"provider": "mantiks", "path": "x.csv"}]))
+        with self.assertRaises(ValueError):
+            load_manifest(self.write_manifest([{
+                "provider": "apollo", "path": "x.csv", "company_name_column": "a", "company_link_column": "b",
+            }]))
+        with self.assertRaises(ValueError):
+            load_manifest(str(self.tmpdir / "missing.json"))
+
+
+class LedgerTests(ManifestTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_export("a.csv", "Acme")
+        self.write_export("b.csv", "Globex")
+        self.manifest = self.write_manifest([{
+            "provider": "mantiks", "path": "exports/*.csv",
+            "company_name_column": "Company name", "company_link_column": "Company LinkedIn",
+        }])
+
+    def import_manifest(self, force: bool = False) -> list[str]:
+        planned, _ = plan_ingestion(self.db, load_manifest(self.manifest), force=force)
+        report = run_pipeline([p.source for p in planned], self.db.db_path, workers=0)
+        record_ingestion(self.db, planned, report)
+        return [p.source.description for p in planned]
+
+    def test_only_new_files_are_imported_again(self):
+        self.assertEqual(self.import_manifest(), ["a.csv", "b.csv"])
+        self.assertEqual(self.import_manifest(), [])
+
+        self.write_export("c.csv", "Initech")
+        self.assertEqual(self.import_manifest(), ["c.csv"])
+
+        ledger = self.db.get_ingested_file(str(self.tmpdir / "exports" / "c.csv"))
+        self.assertEqual(ledger.companies, 1)
+        self.assertEqual(len(ledger.content_hash), 64)
+        con = sqlite3.connect(self.db.db_path)
+        self.assertEqual(con.execute("SELECT count(*) FROM company").fetchone()[0], 4)
+        con.close()
+
+    def test_touched_file_with_same_content_is_skipped(self):
+        self.import_manifest()
+        path = self.tmpdir / "exports" / "a.csv"
+        os.utime(path, (1_000_000, 1_000_000))
+
+        self.assertEqual(self.import_manifest(), [])
+        self.assertEqual(self.db.get_ingested_file(str(path)).mtime, 1_000_000)
+
+    def test_modified_file_is_imported_again(self):
+        self.import_manifest()
+        self.write_export("a.csv", "Acme", "Hooli")
+        self.assertEqual(self.import_manifest(), ["a.csv"])
+
+    def test_force_imports_everything(self):
+        self.import_manifest()
+        self.assertEqual(self.import_manifest(force=True), ["a.csv", "b.csv"])
+
+
+class IncrementalImportTests(ManifestTestCase):
+    def setUp(self):
+        super().setUp()
+        self.export = self.tmpdir / "exports" / "search.csv"
+        self.export.write_text("Company name,Company LinkedIn\nAcme,linkedin.com/company/acme\n", encoding="utf-8")
+        self.manifest = self.write_manifest([{
+            "provider": "mantiks", "path": "exports/search.csv",
+            "company_name_column": "Company name", "company_link_column": "Company LinkedIn",
+        }])
+
+    def import_manifest(self):
+        planned, _ = plan_ingestion(self.db, load_manifest(self.manifest))
+        report = run_pipeline([p.source for p in planned], self.db.db_path, workers=0)
+        record_ingestion(self.db, planned, report)
+        return planned, report
+
+    def company_links(self):
+        con = sqlite3.connect(self.db.db_path)
+        links = [row[0] for row in con.execute("SELECT company_link FROM company WHERE company_link != '' ORDER BY rowid")]
+        con.close()
+        return links
+
+    def append(self, text: str):
+        with self.export.open("a", encoding="utf-8") as handle:
+            handle.write(text)
+
+    def settle(self):
+        """Stands for an export nobody writes to anymore"""
+        settled = time.time() - SETTLE_SECONDS - 1
+        os.utime(self.export, (settled, settled))
+
+    def test_only_appended_rows_are_parsed(self):
+        self.import_manifest()
+        size = self.export.stat().st_size
+        self.append("Globex,linkedin.com/company/globex\nInitech,linkedin.com/company/initech\n")
+
+        planned, report = self.import_manifest()
+
+        self.assertTrue(planned[0].incremental)
+        self.assertEqual(planned[0].source.start_offset, size)
+        self.assertEqual(report.sources[0].rows, 2)
+        self.assertEqual(self.company_links(), [
+            "linkedin.com/company/acme", "linkedin.com/company/globex", "linkedin.com/company/initech",
+        ])
+        ledger = self.db.get_ingested_file(str(self.export))
+        self.assertEqual((ledger.rows, ledger.companies, ledger.size), (3, 3, self.export.stat().st_size))
+
+    def test_file_without_trailing_newline(self):
+        self.export.write_text("Company name,Company LinkedIn\nAcme,linkedin.com/company/acme", encoding="utf-8")
+        self.settle()
+        self.import_manifest()
+        self.append("\nGlobex,linkedin.com/company/globex")
+        self.settle()
+
+        planned, report = self.import_manifest()
+
+        self.assertTrue(planned[0].incremental)
+        self.assertEqual(report.sources[0].rows, 1)
+        self.assertEqual(self.company_links(), ["linkedin.com/company/acme", "linkedin.com/company/globex"])
+
+    def test_partial_last_row_is_left_for_the_next_run(self):
+        self.import_manifest()
+        size = self.export.stat().st_size
+        self.append("Globex,linkedin.com/company/globex\nInitech,linkedin.com/com")
+
+        planned, report = self.import_manifest()
+
+        self.assertEqual(planned[0].source.end_offset, size + len("Globex,linkedin.com/company/globex\n"))
+        self.assertEqual(report.sources[0].rows, 1)
+        self.assertEqual(self.db.get_ingested_file(str(self.export)).size, planned[0].source.end_offset)
+
+        self.append("pany/initech\n")
+        planned, report = self.import_manifest()
+
+        self.assertTrue(planned[0].incremental)
+        self.assertEqual(report.sources[0].rows, 1)
+        self.assertEqual(self.company_links(), [
+            "linkedin.com/company/acme", "linkedin.com/company/globex", "linkedin.com/company/initech",
+        ])
+
+    def test_changed_prefix_falls_back_to_full_scan(self):
+        self.import_manifest()
+        self.export.write_text("Company name,Company LinkedIn\nHooli,linkedin.com/company/hooli\n"
+                               "Globex,linkedin.com/company/globex\n", encoding="utf-8")
+
+        planned, report = self.import_manifest()
+
+        self.assertFalse(planned[0].incremental)
+        self.assertEqual(report.sources[0].rows, 2)
+        self.assertEqual(self.db.get_ingested_file(str(self.export)).rows, 2)
+
+    def test_builtwith_banner_and_header_are_kept_in_front_of_appended_rows(self):
+        export = self.tmpdir / "exports" / "builtwith.csv"
+        export.write_text("banner\nDomain,Company,Linkedin\nacme.com,Acme,linkedin.com/company/acme\n", encoding="utf-8")
+        self.manifest = self.write_manifest([{
+            "provider": "builtwith", "path": "exports/builtwith.csv",
+            "company_name_column": "Company", "company_link_column": "Linkedin",
+        }])
+        self.import_manifest()
+        with export.open("a", encoding="utf-8") as handle:
+            handle.write("globex.com,Globex,linkedin.com/company/globex\n")
+
+        planned, report = self.import_manifest()
+
+        self.assertTrue(planned[0].incremental)
+        self.assertEqual(report.sources[0].rows, 1)
+        self.assertEqual(self.company_links(), ["linkedin.com/company/acme", "linkedin.com/company/globex"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.csv_parser import ParserProviderType
+from src.db_prospection import ProspectionDB
+from src import ingestion_pipeline
+from src.ingestion_pipeline import BatchWriter, IngestionSource, run_pipeline
+
+
+def write_mantiks_csv(path: Path, start: int, count: int) -> None:
+    lines = ["Company name,Company LinkedIn,LinkedIn profil"]
+    for i in range(start, start + count):
+        lines.append(f"Company {i % 7},linkedin.com/company/company-{i % 7},linkedin.com/in/person-{i}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class RunPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmpdir.name)
+        self.db_path = str(self.tmpdir / "prospection.db")
+        with ProspectionDB(self.db_path) as db:
+            db.init_db()
+
+        self.sources = []
+        for index in range(3):
+            path = self.tmpdir / f"mantiks-{index}.csv"
+            write_mantiks_csv(path, index * 50, 60)  # overlapping ranges, duplicates must be ignored
+            self.sources.append(IngestionSource(ParserProviderType.MANTIKS, str(path), "Company name",
+                                                "Company LinkedIn", "LinkedIn profil", f"file {index}"))
+        builtwith = self.tmpdir / "builtwith.csv"
+        builtwith.write_text("banner\nCompany,Linkedin\nHooli,linkedin.com/company/hooli\n", encoding="utf-8")
+        self.sources.append(IngestionSource(ParserProviderType.BUILT_WITH, str(builtwith), "Company", "Linkedin", "",
+                                            "builtwith"))
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def assert_database_content(self):
+        con = sqlite3.connect(self.db_path)
+        companies = con.execute("SELECT count(*) FROM company").fetchone()[0]
+        employees = con.execute("SELECT count(*) FROM employee").fetchone()[0]
+        unlinked = con.execute("SELECT count(*) FROM employee WHERE company_id IS NULL").fetchone()[0]
+        con.close()
+        self.assertEqual(companies, 7 + 1 + 1)  # 7 mantiks companies, hooli, unknown
+        self.assertEqual(employees, 160)
+        self.assertEqual(unlinked, 0)
+
+    def test_parallel_workers(self):
+        report = run_pipeline(self.sources, self.db_path, workers=2, chunksize=16, commit_every=50)
+
+        self.assert_database_content()
+        self.assertEqual([timing.employees for timing in report.sources], [60, 60, 60, 0])
+        self.assertTrue(all(timing.error is None for timing in report.sources))
+        self.assertGreater(report.commits, 1)
+
+    def test_in_process(self):
+        run_pipeline(self.sources, self.db_path, workers=0, chunksize=16)
+        self.assert_database_content()
+
+    def test_writer_connection_is_tuned(self):
+        with BatchWriter(self.db_path) as writer:
+            self.assertEqual(writer.con.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertEqual(writer.con.execute("PRAGMA busy_timeout").fetchone()[0], 30000)
+
+    def test_missing_file_is_reported_without_stopping_the_others(self):
+        missing = IngestionSource(ParserProviderType.MANTIKS, str(self.tmpdir / "missing.csv"), "a", "b", "c", "missing")
+        report = run_pipeline([missing] + self.sources, self.db_path, workers=2, chunksize=16)
+
+        self.assertIn("FileNotFoundError", report.sources[0].error)
+        self.assert_database_content()
+
+    def test_workers_report_rejected_rows(self):
+        dirty = self.tmpdir / "dirty.csv"
+        dirty.write_text("Company name,Company LinkedIn,LinkedIn profil\n"
+                         "Acme,https://acme.com,linkedin.com/in/zed\n", encoding="utf-8")
+        rejects_path = str(self.tmpdir / "dirty.rejects.csv")
+        source = IngestionSource(ParserProviderType.MANTIKS, str(dirty), "Company name", "Company LinkedIn",
+                                 "LinkedIn profil", "dirty", rejects_path=rejects_path)
+
+        report = run_pipeline(self.sources + [source], self.db_path, workers=2, chunksize=16)
+
+        self.assertEqual((report.sources[-1].rows, report.sources[-1].rejected), (1, 1))
+        self.assertIn("invalid_company_link", Path(rejects_path).read_text(encoding="utf-8"))
+        self.assert_database_content()
+
+    def run_with_broken_source(self, broken):
+        create_parser = ingestion_pipeline.create_parser
+
+        def create_or_break(source, chunksize):
+            if source.description == "broken":
+                broken()
+            return create_parser(source, chunksize)
+
+        source = IngestionSource(ParserProviderType.MANTIKS, "broken.csv", "a", "b", "c", "broken")
+        with mock.patch.object(ingestion_pipeline, "create_parser", side_effect=create_or_break), \
+                mock.patch.object(ingestion_pipeline, "POOL_POLL_SECONDS", 0.1):
+            return run_pipeline([source] + self.sources, self.db_path, workers=2, chunksize=16)
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == "fork", "workers must inherit the patched create_parser")
+    def test_parser_creation_error_is_reported(self):
+        def broken():
+            raise ValueError("bad columns")
+
+        report = self.run_with_broken_source(broken)
+
+        self.assertEqual(report.sources[0].error, "ValueError: bad columns")
+        self.assert_database_content()
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == "fork", "workers must inherit the patched create_parser")
+    def test_dead_worker_does_not_block_the_writer(self):
+        report = self.run_with_broken_source(lambda: os._exit(1))
+
+        self.assertEqual(report.sources[0].error, "worker process died")
+        self.assert_database_content()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -5,6 +5,7 @@ from src.linkedin_company_follow import (
     ButtonSnapshot,
     detect_login_required,
     evaluate_button_state,
+    linkedin_url_key,
     merge_unique_urls,
     normalise_company_url,
 )
@@ -30,6 +31,28 @@ class NormaliseCompanyUrlTests(unittest.TestCase):
             normalise_company_url("   ")
 
 
+class LinkedinUrlKeyTests(unittest.TestCase):
+    def test_spellings_of_the_same_company_share_a_key(self):
+        for url in (
+            "https://www.linkedin.com/company/acme/",
+            "http://linkedin.com/company/Acme",
+            "  www.linkedin.com/company/acme?trk=public_profile  ",
+            "linkedin.com/company/acme/about/",
+            "https://fr.linkedin.com/company/acme#main",
+            "https://www.linkedin.com/fr/company/acme",
+        ):
+            self.assertEqual(linkedin_url_key(url), "company/acme", url)
+
+    def test_profiles_and_encoded_slugs(self):
+        self.assertEqual(linkedin_url_key("https://www.linkedin.com/in/Jane-Doe-123/"), "in/jane-doe-123")
+        self.assertEqual(linkedin_url_key("linkedin.com/in/ren%C3%A9e"), "in/renée")
+        self.assertEqual(linkedin_url_key("linkedin.com/school/mit"), "school/mit")
+
+    def test_non_linkedin_urls_have_no_key(self):
+        for url in (None, "", "   ", "https://acme.com/company/acme", "linkedin.com/feed/", "notlinkedin.com/in/x"):
+            self.assertIsNone(linkedin_url_key(url), url)
+
+
 class EvaluateButtonStateTests(unittest.TestCase):
     def snapshot(self, **kwargs):
         defaults = {
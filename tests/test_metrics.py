@@ -0,0 +1,78 @@
+import math
+import unittest
+
+from src.metrics import MetricsRegistry
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counters_and_gauges(self):
+        results = self.registry.counter("results_total", "Results", ("status", "reason"))
+        results.inc(status="follow", reason="")
+        results.inc(2, status="error", reason='Button "Follow"\nmissing')
+        self.registry.gauge("quota_remaining", "Quota").set(math.inf)
+
+        self.assertEqual(self.registry.render(), (
+            "# HELP results_total Results\n"
+            "# TYPE results_total counter\n"
+            'results_total{status="error",reason="Button \\"Follow\\"\\nmissing"} 2\n'
+            'results_total{status="follow",reason=""} 1\n'
+            "# HELP quota_remaining Quota\n"
+            "# TYPE quota_remaining gauge\n"
+            "quota_remaining +Inf\n"
+        ))
+
+    def test_gauges_go_up_and_down(self):
+        depth = self.registry.gauge("depth", "Depth")
+        depth.set(3)
+        depth.dec()
+        depth.inc(0.5)
+        depth.dec(2)
+
+        self.assertIn("depth 0.5\n", self.registry.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram("latency_seconds", "Latency", (0.1, 1))
+        for value in (0.05, 0.5, 0.5, 3):
+            latency.observe(value)
+
+        lines = self.registry.render().splitlines()[2:]
+        self.assertEqual(lines, [
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            "latency_seconds_sum 4.05",
+            "latency_seconds_count 4",
+        ])
+
+    def test_functions_are_read_at_scrape_time(self):
+        depth = [3]
+        self.registry.gauge("depth", "Depth").set_function(lambda: depth[0])
+        self.registry.counter("outcomes_total", "Outcomes", ("outcome",)).set_function(
+            lambda: {("late",): 2, ("delivered",): 5})
+        depth[0] = 1
+
+        self.assertIn("depth 1\n", self.registry.render())
+        self.assertIn('outcomes_total{outcome="delivered"} 5\noutcomes_total{outcome="late"} 2\n',
+                      self.registry.render())
+
+    def test_series_are_bounded(self):
+        counter = self.registry.counter("reasons_total", "Reasons", ("reason",), max_series=2)
+        for reason in ("a", "b", "c", "d", "a"):
+            counter.inc(reason=reason)
+
+        self.assertIn('reasons_total{reason="a"} 2', self.registry.render())
+        self.assertIn('reasons_total{reason="other"} 2', self.registry.render())
+
+    def test_labels_are_checked(self):
+        counter = self.registry.counter("results_total", "Results", ("status",))
+        with self.assertRaises(ValueError):
+            counter.inc(reason="x")
+        with self.assertRaises(ValueError):
+            self.registry.counter("results_total", "Again")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,132 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.csv_parser import MantiksCSVParser
+from src.db_prospection import ProspectionDB
+from src.parser_visitors import (
+    LoggingVisitor,
+    OpenBrowserVisitor,
+    PropectVisitor,
+    RecordBatch,
+    SQLLiteSaveVisitor,
+    VisitorPipeline,
+)
+
+MANTIKS_CSV = """Company name,Company LinkedIn,LinkedIn profil
+Acme,linkedin.com/company/acme,linkedin.com/in/alice
+Acme,linkedin.com/company/acme,linkedin.com/in/bob
+Globex,linkedin.com/company/globex,linkedin.com/in/carol
+Initech,linkedin.com/company/initech,linkedin.com/in/dave
+Initech,linkedin.com/company/initech,linkedin.com/in/erin
+"""
+
+
+class RecordingVisitor(PropectVisitor):
+    def __init__(self, fail_on_batch: int = -1):
+        self.calls = []
+        self.batches = []
+        self.fail_on_batch = fail_on_batch
+
+    def begin(self, element):
+        self.calls.append("begin")
+
+    def visit_batch(self, batch: RecordBatch):
+        if len(self.batches) == self.fail_on_batch:
+            raise RuntimeError("broken sink")
+        self.batches.append(batch)
+        self.calls.append("batch")
+
+    def flush(self):
+        self.calls.append("flush")
+
+    def close(self, failed: bool = False):
+        self.calls.append("close failed" if failed else "close")
+
+
+class VisitorPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmpdir.name)
+        self.path = self.tmpdir / "mantiks.csv"
+        self.path.write_text(MANTIKS_CSV, encoding="utf-8")
+        self.db_path = str(self.tmpdir / "prospection.db")
+        with ProspectionDB(self.db_path) as db:
+            db.init_db()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def parser(self, chunksize=None):
+        return MantiksCSVParser(str(self.path), "Company name", "Company LinkedIn", "LinkedIn profil",
+                                chunksize=chunksize)
+
+    def test_visitors_share_one_pass_over_the_export(self):
+        first, second = RecordingVisitor(), RecordingVisitor()
+        parser = self.parser(chunksize=2)
+
+        with mock.patch.object(parser, "open_as_chunks", wraps=parser.open_as_chunks) as open_as_chunks:
+            VisitorPipeline([first, second]).visit(parser)
+
+        self.assertEqual(open_as_chunks.call_count, 1)
+        self.assertEqual(first.calls, ["begin"] + ["batch", "flush"] * 3 + ["close"])
+        self.assertEqual([id(batch) for batch in first.batches], [id(batch) for batch in second.batches])
+        batch = first.batches[0]
+        self.assertIs(batch.companies, second.batches[0].companies)
+        self.assertEqual([e.link for e in batch.employees], ["linkedin.com/in/alice", "linkedin.com/in/bob"])
+
+    def test_failure_closes_every_visitor(self):
+        broken, other = RecordingVisitor(fail_on_batch=1), RecordingVisitor()
+
+        with self.assertRaises(RuntimeError):
+            VisitorPipeline([broken, other]).visit(self.parser(chunksize=2))
+
+        self.assertEqual(broken.calls[-1], "close failed")
+        self.assertEqual(other.calls[-1], "close failed")
+
+    def test_sqlite_commits_each_batch(self):
+        recorder = RecordingVisitor(fail_on_batch=2)
+        sqlite_visitor = SQLLiteSaveVisitor(self.db_path, False)
+
+        with self.assertRaises(RuntimeError):
+            VisitorPipeline([sqlite_visitor, recorder]).visit(self.parser(chunksize=2))
+
+        con = sqlite3.connect(self.db_path)
+        employees = con.execute("SELECT count(*) FROM employee").fetchone()[0]
+        con.close()
+        # the first two batches were committed, the third one rolled back
+        self.assertEqual(employees, 4)
+
+    def test_sqlite_connection_is_tuned(self):
+        visitor = SQLLiteSaveVisitor(self.db_path, False)
+        visitor.begin(self.parser())
+        try:
+            self.assertEqual(visitor.con.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertEqual(visitor.con.execute("PRAGMA cache_size").fetchone()[0], -65536)
+        finally:
+            visitor.close()
+
+    def test_logging_visitor_counts_without_building_records(self):
+        logger = LoggingVisitor("mantiks")
+
+        with self.assertLogs(level="INFO") as logs:
+            VisitorPipeline([logger, SQLLiteSaveVisitor(self.db_path, False)]).visit(self.parser(chunksize=2))
+
+        self.assertEqual((logger.companies, logger.employees), (4, 5))
+        self.assertIn("mantiks: 4 companies, 5 employees - done", logs.output[0])
+
+    def test_browser_visitor_opens_links_by_chunk(self):
+        visitor = OpenBrowserVisitor(chunk_size=4, delay=0)
+
+        with mock.patch("src.parser_visitors.webbrowser.open") as open_url, \
+                mock.patch("src.parser_visitors.time.sleep") as sleep:
+            visitor.visit(self.parser())
+
+        self.assertEqual(open_url.call_count, 3 + 5)
+        self.assertEqual(sleep.call_count, 2)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
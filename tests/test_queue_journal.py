@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.queue_journal import JournaledQueue
+
+
+class JournaledQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.queue_path = Path(self.tmpdir.name) / "Input.txt"
+        self.queue_path.write_text("https://a\n\nhttps://b\nhttps://c", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def urls(self, queue):
+        return [entry.url for entry in queue.pending()]
+
+    def test_missing_queue_file(self):
+        with self.assertRaises(SystemExit):
+            JournaledQueue(str(self.queue_path.with_name("missing.txt")))
+
+    def test_reopened_queue_resumes_after_consumed_entries(self):
+        queue = JournaledQueue(str(self.queue_path))
+        entries = queue.pending()
+        queue.consume(next(entries))
+        queue.consume(next(entries))
+        queue.close()
+
+        # the queue file itself is left untouched until compaction
+        self.assertEqual(self.queue_path.read_text(encoding="utf-8"), "https://a\n\nhttps://b\nhttps://c")
+        self.assertEqual(self.urls(JournaledQueue(str(self.queue_path))), ["https://c"])
+
+    def test_appended_urls_are_picked_up(self):
+        queue = JournaledQueue(str(self.queue_path))
+        queue.consume(next(queue.pending()))
+        queue.close()
+        with self.queue_path.open("a", encoding="utf-8") as handle:
+            handle.write("\nhttps://d\n")
+
+        self.assertEqual(self.urls(JournaledQueue(str(self.queue_path))), ["https://b", "https://c", "https://d"])
+
+    def test_torn_journal_entry_is_ignored(self):
+        queue = JournaledQueue(str(self.queue_path))
+        queue.consume(next(queue.pending()))
+        queue.close()
+        with queue.journal_path.open("a", encoding="utf-8") as handle:
+            handle.write("1")  # crash in the middle of the next entry
+
+        self.assertEqual(self.urls(JournaledQueue(str(self.queue_path))), ["https://b", "https://c"])
+
+    def test_journal_of_a_rewritten_queue_is_ignored(self):
+        queue = JournaledQueue(str(self.queue_path))
+        queue.consume(next(queue.pending()))
+        queue.close()
+        # edited in place, the inode is the same but the consumed line is gone
+        with self.queue_path.open("r+", encoding="utf-8") as handle:
+            handle.write("https://x\nhttps://y\n")
+            handle.truncate()
+
+        self.assertEqual(self.urls(JournaledQueue(str(self.queue_path))), ["https://x", "https://y"])
+
+    def test_compact_replaces_queue_and_removes_journal(self):
+        queue = JournaledQueue(str(self.queue_path))
+        inode = os.stat(self.queue_path).st_ino
+        queue.consume(next(queue.pending()))
+        queue.compact()
+
+        self.assertEqual(self.queue_path.read_text(encoding="utf-8"), "https://b\nhttps://c\n")
+        self.assertFalse(queue.journal_path.exists())
+        self.assertNotEqual(os.stat(self.queue_path).st_ino, inode)
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ["Input.txt"])
+        self.assertEqual(self.urls(JournaledQueue(str(self.queue_path))), ["https://b", "https://c"])
+
+    def test_journal_left_by_a_crash_after_compaction_is_ignored(self):
+        queue = JournaledQueue(str(self.queue_path))
+        queue.consume(next(queue.pending()))
+        queue.close()
+        journal = queue.journal_path.read_text(encoding="utf-8")
+        queue.compact()
+        queue.journal_path.write_text(journal, encoding="utf-8")
+
+        self.assertEqual(self.urls(JournaledQueue(str(self.queue_path))), ["https://b", "https://c"])
+
+    def test_compact_without_consumed_entries_keeps_the_file(self):
+        queue = JournaledQueue(str(self.queue_path))
+        inode = os.stat(self.queue_path).st_ino
+        queue.compact()
+
+        self.assertEqual(os.stat(self.queue_path).st_ino, inode)
+
+    def test_pending_reads_lazily(self):
+        self.queue_path.write_text("".join(f"https://company/{i}\n" for i in range(10_000)), encoding="utf-8")
+        queue = JournaledQueue(str(self.queue_path))
+        entries = queue.pending()
+        first = next(entries)
+        entries.close()
+
+        self.assertEqual(first.url, "https://company/0")
+        self.assertEqual(first.end_offset, len("https://company/0\n"))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from src.quota_ledger import QuotaLedger
+
+
+def acquire_many(path, limit, attempts):
+    with QuotaLedger(path, lease_size=3) as ledger:
+        return sum(ledger.acquire(limit) for _ in range(attempts))
+
+
+class QuotaLedgerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmpdir.name) / "quota.db")
+        self.day = date(2024, 5, 1)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def ledger(self, **kwargs):
+        return QuotaLedger(self.path, today=lambda: self.day, **kwargs)
+
+    def test_limit_is_enforced(self):
+        with self.ledger(lease_size=4) as ledger:
+            self.assertEqual(ledger.remaining(5), 5)
+            self.assertEqual([ledger.acquire(5) for _ in range(7)], [True] * 5 + [False] * 2)
+            self.assertEqual(ledger.remaining(5), 0)
+        with self.ledger() as ledger:
+            self.assertFalse(ledger.acquire(5))
+            self.assertTrue(ledger.acquire(0))
+            self.assertEqual(ledger.remaining(0), float("inf"))
+
+    def test_disk_is_only_written_once_per_lease(self):
+        with self.ledger(lease_size=10) as ledger:
+            with mock.patch.object(ledger, "_renew_lease", wraps=ledger._renew_lease) as renew_lease:
+                for _ in range(25):
+                    ledger.acquire(100)
+            self.assertEqual(renew_lease.call_count, 3)
+            # a run in progress holds its lease, nothing past it can be taken elsewhere
+            with self.ledger() as other:
+                self.assertEqual(other.remaining(100), 70)
+        with self.ledger() as ledger:
+            self.assertEqual(ledger.remaining(100), 75)
+            self.assertEqual(ledger.history(), [("2024-05-01", 25)])
+
+    def test_counts_restart_every_day_and_history_is_kept(self):
+        with self.ledger(lease_size=2) as ledger:
+            for _ in range(3):
+                ledger.acquire(3)
+            self.assertFalse(ledger.acquire(3))
+            self.day = date(2024, 5, 2)
+            self.assertTrue(ledger.acquire(3))
+
+            self.assertEqual(ledger.remaining(3), 2)
+        with self.ledger() as ledger:
+            self.assertEqual(ledger.history(), [("2024-05-02", 1), ("2024-05-01", 3)])
+            self.assertEqual(ledger.history(days=1), [("2024-05-02", 1)])
+
+    def test_limit_holds_across_processes(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            acquired = list(executor.map(acquire_many, [self.path] * 4, [30] * 4, [20] * 4))
+
+        self.assertEqual(sum(acquired), 30)
+        with QuotaLedger(self.path) as ledger:
+            self.assertEqual(sum(used for _day, used in ledger.history()), 30)
+
+    def test_count_of_the_legacy_file_is_imported(self):
+        legacy_path = Path(self.tmpdir.name) / "quota.json"
+        legacy_path.write_text(json.dumps({"date": "2024-05-01", "count": 7}), encoding="utf-8")
+        with self.ledger(legacy_path=legacy_path) as ledger:
+            self.assertEqual(ledger.remaining(10), 3)
+
+    def test_unreadable_legacy_file_is_ignored(self):
+        legacy_path = Path(self.tmpdir.name) / "quota.json"
+        legacy_path.write_text('{"date": "2024-05-01", "cou', encoding="utf-8")
+        with self.ledger(lease_size=1) as ledger:
+            ledger.acquire(10)
+        with self.ledger(legacy_path=legacy_path) as ledger:
+            # the existing count is kept, not reset to 0
+            self.assertEqual(ledger.remaining(10), 9)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
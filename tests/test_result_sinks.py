@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.result_sinks import (
+    PYARROW_AVAILABLE,
+    CsvResultSink,
+    FlushPolicy,
+    FollowResult,
+    JsonArrayResultSink,
+    MultiResultSink,
+    ResultSink,
+    ResultSummary,
+    open_result_sink,
+)
+
+RESULTS = [
+    FollowResult(url="https://www.linkedin.com/company/a", status="follow"),
+    FollowResult(url="https://www.linkedin.com/company/b", status="error", reason='Button "Follow" missing, retry later'),
+    FollowResult(url="https://www.linkedin.com/company/c", status="already followed"),
+]
+
+
+class FileSinkTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_csv_quotes_reasons_and_writes_header_once(self):
+        path = self.dir / "results.csv"
+        for result in RESULTS:
+            with open_result_sink(str(path)) as sink:
+                sink.write(result)
+
+        with path.open(encoding="utf-8", newline="") as handle:
+            rows = list(csv.DictReader(handle))
+        self.assertEqual([row["status"] for row in rows], ["follow", "error", "already followed"])
+        self.assertEqual(rows[1]["reason"], 'Button "Follow" missing, retry later')
+        self.assertTrue(all(row["timestamp"] for row in rows))
+
+    def test_jsonl(self):
+        path = self.dir / "results.jsonl"
+        with open_result_sink(str(path)) as sink:
+            for result in RESULTS:
+                sink.write(result)
+
+        rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([row["url"] for row in rows], [result.url for result in RESULTS])
+        self.assertEqual(rows[1]["reason"], RESULTS[1].reason)
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow.parquet
+
+        path = self.dir / "results.parquet"
+        with open_result_sink(str(path), policy=FlushPolicy(every=2)) as sink:
+            for result in RESULTS:
+                sink.write(result)
+
+        parquet_file = pyarrow.parquet.ParquetFile(str(path))
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        table = parquet_file.read()
+        self.assertEqual(table.column("status").to_pylist(), ["follow", "error", "already followed"])
+        self.assertEqual(table.column("reason").to_pylist(), [None, RESULTS[1].reason, None])
+
+    def test_flush_policy(self):
+        path = self.dir / "results.csv"
+        sink = CsvResultSink.append_to(str(path), FlushPolicy(every=2))
+        sink.write(RESULTS[0])
+        self.assertEqual(path.read_text(encoding="utf-8"), "")
+        sink.write(RESULTS[1])
+        self.assertEqual(len(path.read_text(encoding="utf-8").splitlines()), 3)
+
+        with mock.patch("src.result_sinks.time.monotonic", return_value=sink._last_flush + 60):
+            sink.policy = FlushPolicy(every=100, interval=30)
+            sink.write(RESULTS[2])
+        self.assertEqual(len(path.read_text(encoding="utf-8").splitlines()), 4)
+        sink.close()
+        self.assertTrue(sink.stream.closed)
+
+
+class OutputSinkTests(unittest.TestCase):
+    def test_json_array_is_valid_however_many_results(self):
+        for count in (0, 1, 3):
+            buffer = io.StringIO()
+            with JsonArrayResultSink(buffer) as sink:
+                for result in RESULTS[:count]:
+                    sink.write(result)
+            self.assertEqual(json.loads(buffer.getvalue()), [result.as_dict() for result in RESULTS[:count]])
+
+    def test_sinks_implement_write_and_flush(self):
+        class IncompleteSink(ResultSink):
+            def _write(self, result):
+                pass
+
+        with self.assertRaises(TypeError):
+            IncompleteSink()
+
+    def test_multi_sink_closes_every_sink(self):
+        class FailingSink(ResultSink):
+            def _write(self, result):
+                pass
+
+            def _flush(self):
+                raise OSError("disk full")
+
+        buffer = io.StringIO()
+        sink = MultiResultSink([FailingSink(FlushPolicy(every=100)), JsonArrayResultSink(buffer)])
+        with self.assertRaises(OSError):
+            sink.close()
+        self.assertEqual(json.loads(buffer.getvalue()), [])
+
+
+class ResultSummaryTests(unittest.TestCase):
+    def test_counts_per_status(self):
+        summary = ResultSummary()
+        for result in RESULTS:
+            summary.add(result)
+
+        self.assertEqual(summary.total, 3)
+        self.assertEqual(summary.exit_code(), 1)
+        self.assertEqual(summary.render(), "Processed 3 URLs: 1 already followed, 1 error, 1 follow")
+        self.assertEqual(ResultSummary().exit_code(), 0)
+
+    def test_replaced_results_are_counted_once(self):
+        summary = ResultSummary()
+        summary.add(RESULTS[1])
+        summary.replace(RESULTS[1], RESULTS[0])
+
+        self.assertEqual(summary.render(), "Processed 1 URLs: 1 follow")
+        self.assertEqual(summary.exit_code(), 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
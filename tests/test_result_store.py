@@ -0,0 +1,142 @@
+import asyncio
+import random
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.result_store import ResultStore
+
+
+class ResultStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.store = ResultStore(ttl=60, max_unclaimed=3, clock=lambda: self.now)
+
+    def test_report_reaches_its_waiter(self):
+        self.store.register("a")
+        self.assertTrue(self.store.add_result("a", {"status": "follow"}))
+
+        self.assertEqual(self.store.wait_for("a", timeout=1), {"status": "follow"})
+        self.assertEqual(self.store.waiting, 0)
+        self.assertEqual(self.store.counters["delivered"], 1)
+
+    def test_report_only_wakes_the_matching_waiter(self):
+        self.store.register("a")
+        self.store.register("b")
+        self.store.add_result("b", {"status": "follow"})
+
+        self.assertTrue(self.store.register("b").done())
+        self.assertFalse(self.store.register("a").done())
+
+    def test_report_before_registration_is_claimed_by_the_waiter(self):
+        self.assertFalse(self.store.add_result("a", {"status": "follow"}))
+        self.assertEqual(self.store.counters["unknown"], 1)
+
+        self.assertEqual(self.store.wait_for("a", timeout=0), {"status": "follow"})
+        self.assertEqual(self.store.unclaimed, 0)
+
+    def test_late_reports_are_counted_and_evicted(self):
+        self.assertIsNone(self.store.wait_for("a", timeout=0.01))
+        self.assertEqual(self.store.counters["timeouts"], 1)
+        self.assertEqual(self.store.waiting, 0)
+
+        self.assertFalse(self.store.add_result("a", {"status": "follow"}))
+        self.assertEqual(self.store.counters["late"], 1)
+        self.assertEqual(self.store.unclaimed, 1)
+
+        self.now = 61
+        self.store.add_result("unknown", {"status": "error"})
+        self.assertIsNone(self.store.claim("a"))
+        self.assertEqual(self.store.counters["evicted"], 1)
+        self.assertEqual(self.store.claim("unknown"), {"status": "error"})
+
+    def test_unclaimed_reports_are_bounded(self):
+        for task_id in "abcde":
+            self.store.add_result(task_id, {})
+
+        self.assertEqual(self.store.unclaimed, 3)
+        self.assertEqual(self.store.counters["evicted"], 2)
+        self.assertIsNone(self.store.claim("a"))
+        self.assertEqual(self.store.claim("e"), {})
+
+    def test_duplicate_reports_are_ignored(self):
+        self.store.register("a")
+        self.store.add_result("a", {"status": "follow"})
+        self.assertFalse(self.store.add_result("a", {"status": "error"}))
+
+        self.assertEqual(self.store.wait_for("a", timeout=0), {"status": "follow"})
+        self.assertEqual(self.store.counters["duplicate"], 1)
+
+    def test_async_wait(self):
+        async def scenario():
+            waiter = asyncio.ensure_future(self.store.wait_for_async("a", timeout=5))
+            await asyncio.sleep(0)
+            threading.Timer(0.01, self.store.add_result, ("a", {"status": "follow"})).start()
+            timed_out = await self.store.wait_for_async("b", timeout=0.01)
+            return await waiter, timed_out
+
+        self.assertEqual(asyncio.run(scenario()), ({"status": "follow"}, None))
+        self.assertEqual(self.store.counters["timeouts"], 1)
+
+
+class ResultStoreStressTests(unittest.TestCase):
+    TASKS = 5000
+
+    def reports(self, store, task_ids):
+        def report(chunk):
+            for task_id in chunk:
+                store.add_result(task_id, {"task_id": task_id})
+
+        shuffled = random.Random(7).sample(task_ids, len(task_ids))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(report, [shuffled[i::8] for i in range(8)]))
+
+    def test_thousands_of_async_waiters(self):
+        store = ResultStore()
+        task_ids = [f"task-{i}" for i in range(self.TASKS)]
+
+        async def scenario():
+            for task_id in task_ids:
+                store.register(task_id)
+            waiters = [store.wait_for_async(task_id, timeout=30) for task_id in task_ids]
+            reporter = threading.Thread(target=self.reports, args=(store, task_ids))
+            reporter.start()
+            results = await asyncio.gather(*waiters)
+            reporter.join()
+            return results
+
+        results = asyncio.run(scenario())
+        self.assertEqual([result["task_id"] for result in results], task_ids)
+        self.assertEqual(store.counters["delivered"], self.TASKS)
+        self.assertEqual(store.waiting, 0)
+        self.assertEqual(store.unclaimed, 0)
+
+    def test_concurrent_threads_with_timeouts_and_late_reports(self):
+        store = ResultStore()
+        answered = [f"task-{i}" for i in range(2000)]
+        # waited for, but reported after their timeout
+        late = [f"late-{i}" for i in range(200)]
+        for task_id in answered:
+            store.register(task_id)
+
+        with ThreadPoolExecutor(max_workers=64) as executor:
+            waits = [executor.submit(store.wait_for, task_id, 30) for task_id in answered]
+            timeouts = [executor.submit(store.wait_for, task_id, 0.05) for task_id in late]
+            start = time.monotonic()
+            self.reports(store, answered)
+            self.assertTrue(all(future.result() is None for future in timeouts))
+            self.reports(store, late + [f"unknown-{i}" for i in range(100)])
+            self.assertEqual([future.result()["task_id"] for future in waits], answered)
+        self.assertLess(time.monotonic() - start, 20)
+
+        self.assertEqual(store.counters["delivered"], 2000)
+        self.assertEqual(store.counters["timeouts"], 200)
+        self.assertEqual(store.counters["late"], 200)
+        self.assertEqual(store.counters["unknown"], 100)
+        self.assertEqual(store.unclaimed, 300)
+        self.assertEqual(store.waiting, 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()